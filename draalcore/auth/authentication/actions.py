@@ -14,6 +14,7 @@ from django.contrib.auth import authenticate, login, logout, get_user_model
 
 # Project imports
 from draalcore.exceptions import ActionError
+from draalcore.rest.auth import expire_request_token
 from draalcore.rest.actions import CreateActionWithParameters, CreateAction, AbstractModelGetAction
 from draalcore.models.fields import StringFieldType, NotNullable
 
@@ -44,6 +45,8 @@ class LogoutAction(CreateAction):
     DISPLAY_NAME = 'Sign-out'
 
     def _execute(self):
+        # Token is expired only when the client signs out using the token, other clients of the user remain signed in
+        expire_request_token(self.request_obj.request)
         logout(self.request_obj.request)
         return 'Sign-out successful'
 
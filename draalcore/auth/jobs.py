@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Periodic maintenance jobs of user accounts"""
+
+# System imports
+import datetime
+from django.conf import settings
+from django.utils.timezone import now as datetime_now
+
+# Project imports
+from draalcore.auth.models import UserAccountProfile
+from draalcore.scheduler import periodic_job
+
+
+@periodic_job(interval=3600, jitter=60)
+def expire_accounts():
+    """Mark accounts that were not activated within ACCOUNT_ACTIVATION_DAYS as expired, return number of expired accounts."""
+    joined = datetime_now() - datetime.timedelta(days=settings.ACCOUNT_ACTIVATION_DAYS)
+    accounts = UserAccountProfile.objects.filter(account_status=UserAccountProfile.ACCOUNT_ACTIVE,
+                                                 user__date_joined__lte=joined).select_related('user')
+
+    count = 0
+    for account in accounts.iterator():
+        account.editing_user = account.user
+        account.set_values(account_status=UserAccountProfile.ACCOUNT_EXPIRED)
+        count += 1
+
+    return count
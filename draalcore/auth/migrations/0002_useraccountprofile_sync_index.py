@@ -0,0 +1,17 @@
+# Generated by Django 3.2.4 on 2026-10-19 15:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('draalcore_auth', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='useraccountprofile',
+            index=models.Index(fields=['last_modified', 'id'], name='useraccount_last_mo_0d35cb_idx'),
+        ),
+    ]
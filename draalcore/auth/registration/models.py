@@ -92,7 +92,7 @@ class UserAccountProfile(ModelLogger):
 
     objects = UserAccountManager()
 
-    class Meta:
+    class Meta(ModelLogger.Meta):
         db_table = 'useraccount'
 
     def __str__(self):
@@ -105,7 +105,7 @@ class UserAccountProfile(ModelLogger):
 
     def activate_account(self):
         user = self.user
-        self.modified_by = user
+        self.editing_user = user
         if not self.activation_key_expired:
             user.is_active = True
             user.save()
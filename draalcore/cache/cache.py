@@ -3,12 +3,20 @@
 """Cache interface and base classes"""
 
 # System imports
+import time
+import hashlib
+import functools
 from abc import ABCMeta
+from django.apps import apps
 from django.core.cache import cache
+from django.db import models, connection, transaction
+from django.db.models.query import QuerySet, ModelIterable
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.core.exceptions import EmptyResultSet
 
 
 __author__ = "Juha Ojanpera"
-__copyright__ = "Copyright 2013-2015"
+__copyright__ = "Copyright 2013-2015,2021"
 __email__ = "juha.ojanpera@gmail.com"
 __status__ = "Development"
 
@@ -100,7 +108,8 @@ class CacheObject(object):
         """
         return DataCache(self._cache_key, callback,
                          cache_reset=self._cache_reset,
-                         timeout=timeout)
+                         timeout=timeout,
+                         cache_backend=self._cache_backend)
 
     def invalidate(self):
         """Invalidates cache object."""
@@ -112,8 +121,9 @@ class CacheBase(object):
 
     __metaclass__ = ABCMeta
 
-    def __init__(self):
+    def __init__(self, cache_backend=cache):
         self._base_key = self.__class__.__name__
+        self._cache_backend = cache_backend
 
     def create_cache_key(self, key_components):
         """Create cache key from key components.
@@ -148,7 +158,7 @@ class CacheBase(object):
         """
         cache_keys = fn(**kwargs)
         for key in cache_keys:
-            CacheObject(key).invalidate()
+            CacheObject(key, cache_backend=self._cache_backend).invalidate()
 
         return cache_keys
 
@@ -165,4 +175,316 @@ class CacheBase(object):
         """
         cache_keys = fn(**kwargs)
         assert len(cache_keys) == 1
-        return CacheObject(cache_keys[0], cache_reset).cache_obj(callback, timeout)
+        return CacheObject(cache_keys[0], cache_reset, self._cache_backend).cache_obj(callback, timeout)
+
+
+# Prefix for cache keys that hold the current version of an invalidation tag
+TAG_KEY_PREFIX = 'draalcore_tag_'
+
+# Marker for cache hit miss, None is valid value to cache
+_MISSING = object()
+
+# Models whose signals are already connected to tag invalidation
+_signal_models = set()
+
+
+def model_tag(model):
+    """Return invalidation tag name for model class or instance."""
+    return model._meta.label_lower
+
+
+def invalidate_tags(*tags, cache_backend=cache):
+    """
+    Invalidate all cached method results that depend on specified tags.
+
+    Parameters
+    ----------
+    tags
+       Tag names or model classes.
+    """
+    version = str(time.time())
+    cache_backend.set_many({TAG_KEY_PREFIX + _tag_name(tag): version for tag in tags}, None)
+
+
+def _tag_name(tag):
+    return model_tag(tag) if isinstance(tag, type) and issubclass(tag, models.Model) else str(tag)
+
+
+def _invalidate_models(*models_cls):
+    """
+    Invalidate tags of changed models. Within transaction the tags are invalidated again on commit
+    so that results cached by concurrent readers before the commit do not outlive the commit.
+    """
+    invalidate_tags(*models_cls)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: invalidate_tags(*models_cls))
+
+
+def _model_changed(sender, **kwargs):
+    """Signal receiver invalidating tags of changed model."""
+    _invalidate_models(sender)
+
+
+def _m2m_changed(sender, instance, model, **kwargs):
+    """Signal receiver invalidating tags of both ends of changed many-to-many relation."""
+    tags = [item for item in (instance.__class__, model) if item in _signal_models]
+    if tags:
+        _invalidate_models(*tags)
+
+
+def connect_model_signals(model):
+    """Invalidate tag of specified model whenever its items are saved or deleted."""
+    if model not in _signal_models:
+        _signal_models.add(model)
+        post_save.connect(_model_changed, sender=model, weak=False)
+        post_delete.connect(_model_changed, sender=model, weak=False)
+
+
+m2m_changed.connect(_m2m_changed, weak=False)
+
+
+def normalize_argument(value):
+    """
+    Map method argument into stable and hashable representation for cache key generation.
+
+    Parameters
+    ----------
+    value
+       Argument value.
+
+    Returns
+    -------
+    object
+       Representation that has the same repr() across processes for equal inputs.
+    """
+    if isinstance(value, models.Model):
+        return ('model', model_tag(value), value.pk)
+
+    if isinstance(value, QuerySet):
+        try:
+            sql = str(value.query)
+        except EmptyResultSet:
+            sql = None
+        return ('queryset', model_tag(value.model), sql)
+
+    if isinstance(value, type) and issubclass(value, models.Model):
+        return ('model_cls', model_tag(value))
+
+    if hasattr(value, 'lists'):
+        # QueryDict, keep all values of the key
+        return tuple(sorted((key, tuple(items)) for key, items in value.lists()))
+
+    if isinstance(value, dict):
+        return tuple(sorted((str(key), normalize_argument(item)) for key, item in value.items()))
+
+    if isinstance(value, (list, tuple)):
+        return tuple(normalize_argument(item) for item in value)
+
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(repr(normalize_argument(item)) for item in value))
+
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+
+    return repr(value)
+
+
+def is_rebuildable(query):
+    """
+    Return True if queryset can be restored from its primary keys by freeze_result() and thaw_result().
+    Querysets with annotations, aggregations, distinct, slicing, extra, deferred fields, set operations
+    or non-model rows (values(), values_list()) cannot be restored and are therefore not cached.
+    """
+    sql = query.query
+    return (query._iterable_class is ModelIterable and not sql.annotations and not sql.distinct and
+            not sql.is_sliced and not sql.extra and not sql.extra_order_by and not sql.combinator and
+            sql.deferred_loading == (frozenset(), True))
+
+
+def freeze_result(value):
+    """
+    Prepare method result for caching. Querysets are materialized into list of primary keys together
+    with their select_related, prefetch_related and ordering setup so that evaluated rows are not stored.
+    Returns _MISSING for querysets that cannot be restored, see is_rebuildable().
+    """
+    if isinstance(value, QuerySet):
+        if not is_rebuildable(value):
+            return _MISSING
+
+        return {
+            'queryset': model_tag(value.model),
+            'ids': list(value.values_list('pk', flat=True)),
+            'select_related': value.query.select_related,
+            'prefetch_related': value._prefetch_related_lookups,
+            'order_by': value.query.order_by,
+            'default_ordering': value.query.default_ordering
+        }
+
+    return value
+
+
+def thaw_result(value):
+    """Reverse operation for freeze_result()."""
+    if isinstance(value, dict) and 'queryset' in value:
+        query = apps.get_model(value['queryset'])._base_manager.filter(pk__in=value['ids'])
+        query.query.select_related = value['select_related']
+        query = query.prefetch_related(*value['prefetch_related'])
+        if value['order_by']:
+            query = query.order_by(*value['order_by'])
+
+        # Model's default ordering was explicitly cleared
+        query.query.default_ordering = value['default_ordering']
+        return query
+
+    return value
+
+
+def owner_model(obj):
+    """Return model class for manager or factory instance, None if not available."""
+    model = getattr(obj, 'model', None)
+    if model is None:
+        model = getattr(getattr(obj, 'manager', None), 'model', None)
+
+    return model if isinstance(model, type) and issubclass(model, models.Model) else None
+
+
+class MethodCache(CacheBase):
+    """
+    Cache for results of manager or factory methods. Results are stored under key that is
+    derived from method's qualified name, owner model and normalized call arguments. Each key
+    also includes current version of each invalidation tag so that invalidating a tag makes all
+    related keys unreachable. Model of the owner is always included as tag and invalidated via
+    model signals.
+    """
+
+    def __init__(self, fn, timeout=2592000, tags=None, cache_backend=cache):
+        """
+        Parameters
+        ----------
+        fn : function
+           Method to cache.
+        timeout : integer
+           Number of seconds the data should be stored in the cache.
+        tags : list
+           Invalidation tags, either tag names or model classes. Changes to model class
+           items invalidate the tag automatically.
+        cache_backend : object
+           Cache backend implementation.
+        """
+        super(MethodCache, self).__init__(cache_backend)
+        self._base_key = fn.__qualname__
+        self._fn = fn
+        self._timeout = timeout
+        self._tags = tags or []
+
+    def get_tags(self, obj, extra_tags=None):
+        """Return tags for method call from specified owner object."""
+        tags = list(self._tags) + list(extra_tags or [])
+
+        model = owner_model(obj)
+        if model is not None:
+            tags.append(model)
+
+        for tag in tags:
+            if isinstance(tag, type) and issubclass(tag, models.Model):
+                connect_model_signals(tag)
+
+        return sorted(set(_tag_name(tag) for tag in tags))
+
+    def _tag_versions(self, tags):
+        """Return current version for each tag, missing tags get new version."""
+        keys = [TAG_KEY_PREFIX + tag for tag in tags]
+        versions = self._cache_backend.get_many(keys)
+
+        missing = [key for key in keys if key not in versions]
+        if missing:
+            version = str(time.time())
+            new_versions = {key: version for key in missing}
+            self._cache_backend.set_many(new_versions, None)
+            versions.update(new_versions)
+
+        return [versions[key] for key in keys]
+
+    def get_cache_keys(self, obj, args, kwargs, extra_tags=None):
+        """Return cache key for method call as list."""
+        model = owner_model(obj)
+        tags = self.get_tags(obj, extra_tags)
+        call = repr((normalize_argument(list(args)), normalize_argument(kwargs), tags, self._tag_versions(tags)))
+        digest = hashlib.md5(call.encode('utf-8')).hexdigest()
+        return self.create_cache_key([model_tag(model) if model else '', digest])
+
+    def lookup(self, obj, *args, extra_tags=None, **kwargs):
+        """
+        Call the method or return its cached result.
+
+        Parameters
+        ----------
+        obj
+           Manager or factory instance, that is, self for the method.
+        extra_tags : list
+           Additional invalidation tags for this call.
+
+        Returns
+        -------
+        tuple
+           Method result and True if result was served from cache, False otherwise.
+        """
+        if DataCache.cache_disable:
+            return self._fn(obj, *args, **kwargs), False
+
+        key = self.get_cache_keys(obj, args, kwargs, extra_tags)[0]
+        data = self._cache_backend.get(key, _MISSING)
+        if data is not _MISSING:
+            return thaw_result(data), True
+
+        value = self._fn(obj, *args, **kwargs)
+        data = freeze_result(value)
+        if data is not _MISSING:
+            self._cache_backend.set(key, data, self._timeout)
+
+        return value, False
+
+    def invalidate(self, obj, *args, **kwargs):
+        """Invalidate cached result of specified method call."""
+        return self.invalidate_cache(self.get_cache_keys, obj=obj, args=args, kwargs=kwargs)
+
+
+def cached(ttl=2592000, tags=None, cache_backend=cache):
+    """
+    Decorator for caching results of manager and factory methods.
+
+    Example:
+
+        class MyManager(BaseManager):
+            @cached(ttl=60, tags=[OtherModel, 'listing'])
+            def public_expensive(self, query, kwargs):
+                ...
+
+    Result is invalidated when items of the owner model (or any model class listed in tags) are saved
+    or deleted, or when invalidate_tags() is called for any of the tags. Queryset results are cached as
+    primary key lists and restored as querysets on cache hit, querysets that cannot be restored from primary
+    keys (for example annotated, distinct or sliced querysets) are not cached. Changes made using queryset.update()
+    do not send model signals and thus require explicit invalidation.
+
+    Parameters
+    ----------
+    ttl : integer
+       Number of seconds the result should be stored in the cache.
+    tags : list
+       Invalidation tags, either tag names or model classes.
+    cache_backend : object
+       Cache backend implementation.
+    """
+    def decorator(fn):
+        method_cache = MethodCache(fn, ttl, tags, cache_backend)
+
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            return method_cache.lookup(self, *args, **kwargs)[0]
+
+        # Interfaces for callers that need to know whether result came from cache
+        wrapper.cache_lookup = method_cache.lookup
+        wrapper.invalidate = method_cache.invalidate
+        return wrapper
+
+    return decorator
@@ -1,78 +1,433 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-"""Code locking using model based approach"""
+"""
+Code locking with pluggable lock backends.
+
+MutexHandler acquires named locks using the backend defined by DRAALCORE_LOCK_BACKEND setting.
+Acquisition is retried with backoff until the timeout expires. Each acquired lock carries
+a lease and a fencing token (increasing run ID of the lock) that can be passed to downstream
+systems to reject writes from a holder whose lease has already expired.
+"""
 
 # System imports
-from django.db import models
+import os
+import re
+import abc
+import time
+import uuid
+import hashlib
+import logging
+import tempfile
+import threading
+from datetime import timedelta
+from contextlib import contextmanager
+from django.conf import settings
+from django.utils import timezone
+from django.db.models import Q
+from django.core.cache import caches
+from django.db import connections, transaction, OperationalError, DEFAULT_DB_ALIAS
+from django.utils.module_loading import import_string
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+# Project imports
+from draalcore.exceptions import LockError, LockTimeoutError
+from draalcore.models.models import CodeLock
 
 __author__ = "Juha Ojanpera"
 __copyright__ = "Copyright 2013"
 __email__ = "juha.ojanpera@gmail.com"
 __status__ = "Development"
 
+logger = logging.getLogger(__name__)
 
 DEFAULT_LOCK = 'lock1'
 
+# Error codes reported by the database when row lock is not available (PostgreSQL, MySQL, Oracle)
+LOCK_NOT_AVAILABLE_CODES = ('55P03', 3572, 54)
+
+
+def is_lock_not_available(err):
+    """Return True if database error was caused by row or database lock held by another transaction."""
+    if not isinstance(err, OperationalError):
+        return False
+
+    cause = err.__cause__
+    codes = [getattr(cause, 'pgcode', None), getattr(cause, 'code', None), err.args[0] if err.args else None]
+    return any(code in LOCK_NOT_AVAILABLE_CODES for code in codes) or 'database is locked' in str(err)
+
 
 class Lock(object):
-    def __init__(self, instance, unique_id):
-        self.instance = instance
-        self.id = unique_id
-        self.next_id = self.id + 1
+    """
+    Acquired lock.
+
+    Attributes
+    ----------
+    lock_id
+       Lock name.
+    token : int
+       Fencing token, increases each time the lock is acquired.
+    handle
+       Backend specific lock handle.
+    lease : float
+       Lease duration in seconds, None if lease does not expire.
+    """
+
+    def __init__(self, lock_id, token, handle=None, lease=None):
+        self.lock_id = lock_id
+        self.token = token
+        self.handle = handle
+        self.lease = lease
+        self.acquired = time.monotonic()
+        self.released = False
 
     def __repr__(self):
-        return "%s(%s, %s)" % (self.__class__.__name__, self.instance, self.id)
+        return "%s(%s, %s)" % (self.__class__.__name__, self.lock_id, self.token)
 
     @property
     def unique_id(self):
-        return self.id
+        return self.token
+
+    @property
+    def expired(self):
+        """True if lease has expired."""
+        return self.lease is not None and time.monotonic() - self.acquired >= self.lease
+
+
+class LockBackend(abc.ABC):
+    """Base class for lock backends."""
+
+    @abc.abstractmethod
+    def try_acquire(self, lock_id, lease):
+        """Try to acquire lock without waiting, return Lock or None if lock is held by someone else."""
+
+    @abc.abstractmethod
+    def release(self, lock):
+        """Release acquired lock."""
+
+    def is_held(self, lock):
+        """Return True if lock is still held by the caller."""
+        return not lock.released and not lock.expired
+
+
+class DatabaseLockBackend(LockBackend):
+    """
+    Lease lock stored to CodeLock model. Lock row is created on first use. Acquisition locks the row
+    within short transaction, checks that the lock is free (no holder or lease expired) and stores the
+    holder, lease expiration time and incremented fencing token. No transaction is kept open while
+    the lock is held and the lock of crashed holder is freed when its lease expires. Release frees
+    the lock only if it is still held by the caller.
+
+    The lock is visible to others once the acquiring transaction commits, acquire the lock outside
+    of atomic blocks.
+    """
 
-    def save(self):
-        self.instance.run_id = self.next_id
-        self.instance.save()
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
 
+    @property
+    def objects(self):
+        return CodeLock.objects.db_manager(self.using)
+
+    def try_acquire(self, lock_id, lease):
+        holder = uuid.uuid4().hex
+        try:
+            with transaction.atomic(using=self.using):
+                self.objects.get_or_create(lock_id=lock_id)
+
+                nowait = connections[self.using].features.has_select_for_update_nowait
+                item = self.objects.select_for_update(nowait=nowait).get(lock_id=lock_id)
+
+                now = timezone.now()
+                if item.holder and (item.expires_at is None or item.expires_at > now):
+                    return None
+
+                item.run_id += 1
+                item.holder = holder
+                item.expires_at = now + timedelta(seconds=lease) if lease else None
+                item.save(update_fields=['run_id', 'holder', 'expires_at'])
+        except OperationalError as err:
+            if not is_lock_not_available(err):
+                raise
+
+            # Row is locked by another acquirer
+            return None
+
+        return Lock(lock_id, item.run_id, holder, lease)
+
+    def release(self, lock):
+        # Lock may have been acquired by someone else after the lease expired
+        self.objects.filter(lock_id=lock.lock_id, holder=lock.handle).update(holder='', expires_at=None)
+
+    def is_held(self, lock):
+        if lock.released:
+            return False
 
-class CodeLockManager(models.Manager):
-    """Model manager for code locking"""
+        query = self.objects.filter(lock_id=lock.lock_id, holder=lock.handle)
+        return query.filter(Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now())).exists()
 
-    def acquire_lock(self, lock_id=DEFAULT_LOCK):
-        item = self.select_for_update().get(lock_id=lock_id)
-        return Lock(item, item.run_id)
 
-    def release_lock(self, lock):
-        lock.save()
+class FileLockBackend(LockBackend):
+    """
+    Local lock using fcntl file locks under DRAALCORE_LOCK_DIR directory. Locks only processes
+    within single host and lock is released by the OS if the holding process exits.
+    Fencing token is stored to the lock file.
+    """
 
+    def __init__(self, lock_dir=None):
+        if fcntl is None:
+            raise LockError('File locks are not supported on this platform')
 
-class CodeLock(models.Model):
-    """Model for storing media related jobs"""
+        default_dir = os.path.join(tempfile.gettempdir(), 'draalcore-locks')
+        self.lock_dir = lock_dir or getattr(settings, 'DRAALCORE_LOCK_DIR', None) or default_dir
 
-    lock_id = models.CharField(max_length=90, blank=True, null=True)
-    run_id = models.BigIntegerField(default=0)
+    def _path(self, lock_id):
+        return os.path.join(self.lock_dir, '{}.lock'.format(re.sub(r'[^\w.-]', '_', lock_id)))
 
-    objects = CodeLockManager()
+    def try_acquire(self, lock_id, lease):
+        os.makedirs(self.lock_dir, exist_ok=True)
+        fd = os.open(self._path(lock_id), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+
+        data = os.read(fd, 32).strip()
+        token = int(data) + 1 if data.isdigit() else 1
+
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.ftruncate(fd, 0)
+        os.write(fd, str(token).encode('ascii'))
+
+        return Lock(lock_id, token, fd, lease)
+
+    def release(self, lock):
+        try:
+            fcntl.flock(lock.handle, fcntl.LOCK_UN)
+        finally:
+            os.close(lock.handle)
+
+
+class CacheLockBackend(LockBackend):
+    """
+    Lease lock using atomic add of Django cache (DRAALCORE_LOCK_CACHE setting, default cache
+    by default). Cache entry expires with the lease so that lock of crashed holder is freed
+    automatically. Fencing token is maintained in CodeLock model since cache entries may be evicted.
+    The cache must be shared by all processes using the lock.
+    """
+
+    def __init__(self, alias=None):
+        self.alias = alias or getattr(settings, 'DRAALCORE_LOCK_CACHE', 'default')
+
+    @property
+    def cache(self):
+        return caches[self.alias]
 
-    class Meta:
-        db_table = 'codelock'
+    @staticmethod
+    def _key(lock_id):
+        return 'draalcore:lock:{}'.format(lock_id)
 
-    def __unicode__(self):
-        return "%s (%s)" % (self.__class__.__name__, self.lock_id)
+    def try_acquire(self, lock_id, lease):
+        if not lease:
+            raise LockError('Cache lock requires lease')
+
+        marker = uuid.uuid4().hex
+        if not self.cache.add(self._key(lock_id), marker, timeout=lease):
+            return None
+
+        return Lock(lock_id, CodeLock.objects.next_token(lock_id), marker, lease)
+
+    def release(self, lock):
+        # Lock may have been acquired by someone else after the lease expired
+        if self.cache.get(self._key(lock.lock_id)) == lock.handle:
+            self.cache.delete(self._key(lock.lock_id))
+
+    def is_held(self, lock):
+        return not lock.released and self.cache.get(self._key(lock.lock_id)) == lock.handle
+
+
+class AdvisoryLockBackend(LockBackend):
+    """
+    PostgreSQL session level advisory lock. Lock is held by the database connection and released
+    by the database if the connection is closed. Lease is not enforced by the database.
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+
+    @staticmethod
+    def lock_key(lock_id):
+        """Return 64-bit advisory lock key for lock name."""
+        digest = hashlib.blake2b(lock_id.encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big', signed=True)
+
+    def _execute(self, sql, lock_id):
+        connection = connections[self.using]
+        if connection.vendor != 'postgresql':
+            raise LockError('Advisory locks require PostgreSQL database, got {}'.format(connection.vendor))
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [self.lock_key(lock_id)])
+            return cursor.fetchone()[0]
+
+    def try_acquire(self, lock_id, lease):
+        if not self._execute('SELECT pg_try_advisory_lock(%s)', lock_id):
+            return None
+
+        return Lock(lock_id, CodeLock.objects.db_manager(self.using).next_token(lock_id), self.using, lease)
+
+    def release(self, lock):
+        if not self._execute('SELECT pg_advisory_unlock(%s)', lock.lock_id):
+            logger.warning('Advisory lock {} was not held on release'.format(lock.lock_id))
+
+
+class LockMetrics(object):
+    """Lock contention metrics per lock name."""
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _item(self, lock_id):
+        return self._stats.setdefault(lock_id, {
+            'acquired': 0, 'contended': 0, 'timeouts': 0, 'expired': 0, 'wait_time': 0.0, 'max_wait': 0.0
+        })
+
+    def record(self, lock_id, wait, attempts, acquired):
+        """Record lock acquisition that took wait seconds and specified number of failed attempts."""
+        with self._lock:
+            item = self._item(lock_id)
+            item['acquired' if acquired else 'timeouts'] += 1
+            item['contended'] += 1 if attempts else 0
+            item['wait_time'] += wait
+            item['max_wait'] = max(item['max_wait'], wait)
+
+    def record_expired(self, lock_id):
+        """Record lock released after its lease expired."""
+        with self._lock:
+            self._item(lock_id)['expired'] += 1
+
+    def stats(self, lock_id=None):
+        """Return copy of metrics of specified lock or all locks keyed by lock name."""
+        with self._lock:
+            if lock_id is not None:
+                return dict(self._item(lock_id))
+            return {key: dict(value) for key, value in self._stats.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
 
 
 class MutexHandler(object):
-    def __init__(self, locker):
-        self._locker = locker
+    """
+    Named locks using lock backend.
+
+    Parameters
+    ----------
+    backend : LockBackend
+       Lock backend, by default as defined by DRAALCORE_LOCK_BACKEND setting (default DatabaseLockBackend).
+    """
+
+    MIN_DELAY = 0.01
+    MAX_DELAY = 0.5
+
+    def __init__(self, backend=None):
+        self._backend = backend
+        self._metrics = LockMetrics()
 
     def __repr__(self):
-        return '%s(%s)' % (self.__class__.__name__, self._locker)
+        return '%s(%s)' % (self.__class__.__name__, self._backend)
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = import_string(getattr(settings, 'DRAALCORE_LOCK_BACKEND', 'draalcore.code_lock.DatabaseLockBackend'))()
+        return self._backend
+
+    def acquire(self, lock_id=DEFAULT_LOCK, timeout=None, lease=None):
+        """
+        Acquire lock.
+
+        Parameters
+        ----------
+        lock_id
+           Lock name.
+        timeout : float
+           Maximum wait time in seconds, by default as defined by DRAALCORE_LOCK_TIMEOUT setting.
+           None waits until the lock is acquired.
+        lease : float
+           Lease duration in seconds, by default as defined by DRAALCORE_LOCK_LEASE setting.
 
-    def acquire(self, lock_id=DEFAULT_LOCK):
-        return self._locker.acquire_lock(lock_id)
+        Returns
+        -------
+        Lock
+           Acquired lock.
+
+        Raises
+        ------
+        LockTimeoutError
+           Lock was not acquired within timeout.
+        """
+        timeout = getattr(settings, 'DRAALCORE_LOCK_TIMEOUT', None) if timeout is None else timeout
+        lease = getattr(settings, 'DRAALCORE_LOCK_LEASE', 60) if lease is None else lease
+
+        start = time.monotonic()
+        delay = self.MIN_DELAY
+        attempts = 0
+        while True:
+            lock = self.backend.try_acquire(lock_id, lease)
+            wait = time.monotonic() - start
+            if lock is not None:
+                self._metrics.record(lock_id, wait, attempts, True)
+                return lock
+
+            attempts += 1
+            if timeout is not None and wait >= timeout:
+                self._metrics.record(lock_id, wait, attempts, False)
+                raise LockTimeoutError('Lock {} not acquired within {} seconds'.format(lock_id, timeout))
+
+            remaining = delay if timeout is None else min(delay, timeout - wait)
+            time.sleep(max(remaining, 0))
+            delay = min(delay * 2, self.MAX_DELAY)
 
     def release(self, lock):
-        self._locker.release_lock(lock)
+        """Release acquired lock."""
+        if lock.released:
+            return
+
+        if lock.expired:
+            self._metrics.record_expired(lock.lock_id)
+            logger.warning('Lease of lock {} (token {}) expired before release'.format(lock.lock_id, lock.token))
+
+        try:
+            self.backend.release(lock)
+        finally:
+            lock.released = True
+
+    def is_held(self, lock):
+        """Return True if lock is held and its lease has not expired."""
+        return self.backend.is_held(lock)
+
+    @contextmanager
+    def lock(self, lock_id=DEFAULT_LOCK, timeout=None, lease=None):
+        """Context manager that acquires the lock (see acquire()) and releases it on exit."""
+        lock = self.acquire(lock_id, timeout=timeout, lease=lease)
+        try:
+            yield lock
+        finally:
+            self.release(lock)
+
+    def metrics(self, lock_id=None):
+        """Return contention metrics, see LockMetrics.stats()."""
+        return self._metrics.stats(lock_id)
 
 
 #
 # Code lockers
 #
-lock_factory = MutexHandler(CodeLock.objects)
+lock_factory = MutexHandler()
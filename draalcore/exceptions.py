@@ -61,3 +61,13 @@ class ActionError(AppException):
 class ExtAuthError(AppException):
     """3rd party authentication error."""
     pass
+
+
+class LockError(AppException):
+    """Code lock error."""
+    pass
+
+
+class LockTimeoutError(LockError):
+    """Code lock not acquired within timeout."""
+    pass
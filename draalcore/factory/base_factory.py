@@ -7,7 +7,7 @@ from abc import ABCMeta
 from django.db.models.query import QuerySet
 
 # Project imports
-from draalcore.cache.cache import CacheBase
+from draalcore.cache.cache import CacheBase, MethodCache, owner_model
 
 __author__ = "Juha Ojanpera"
 __copyright__ = "Copyright 2013"
@@ -24,12 +24,12 @@ class QueryResult(object):
         self._is_object = is_object
 
     @classmethod
-    def create(cls, response):
+    def create(cls, response, cached=False):
         if isinstance(response, cls):
             return response
 
         is_object = not isinstance(response, QuerySet)
-        return cls(response, is_object=is_object)
+        return cls(response, cached=cached, is_object=is_object)
 
     @property
     def query(self):
@@ -56,10 +56,22 @@ class FactoryBase(CacheBase):
 
     manager = None
 
+    # Query methods whose results are cached, method name -> cache timeout in seconds.
+    # Model may extend the policy using CACHED_QUERIES attribute.
+    cached_queries = {}
+
+    # Method caches shared by all factory instances
+    _query_caches = {}
+
     def __init__(self, manager):
         super(FactoryBase, self).__init__()
         self.manager = manager
 
+        model = owner_model(manager)
+        model_queries = getattr(model, 'CACHED_QUERIES', None) if model else None
+        if model_queries:
+            self.cached_queries = dict(self.cached_queries, **model_queries)
+
     def __str__(self):
         return "%s(%s)" % (self.__class__.__name__, self.manager)
 
@@ -67,13 +79,46 @@ class FactoryBase(CacheBase):
         """Return the model events"""
         return QueryResult(self.manager.history(model_id=model_id))
 
+    def model_as_of(self, model_id, timestamp):
+        """Return the model state at specified point in time"""
+        return QueryResult(self.manager.as_of(model_id, timestamp), is_object=True)
+
+    def query_dependencies(self):
+        """Return models whose changes invalidate the cached query results."""
+        fn = getattr(self.manager, 'get_dependency_models', None)
+        return fn() if fn else []
+
+    def _query_cache(self, fn, timeout):
+        """Return method cache for specified query method."""
+        key = (fn.__func__.__module__, fn.__func__.__qualname__, timeout)
+        if key not in self._query_caches:
+            self._query_caches[key] = MethodCache(fn.__func__, timeout=timeout)
+
+        return self._query_caches[key]
+
     def do_query(self, req_obj):
         """
         Call either factory or manager method and return result
         as QueryResult object.
         """
         ref_obj = self.manager if not req_obj.is_factory else self
-        response = getattr(ref_obj, req_obj.method)(*req_obj.args, **req_obj.kwargs)
+        fn = getattr(ref_obj, req_obj.method)
+
+        # Method is decorated with @cached, find out whether result is from cache
+        cache_lookup = getattr(fn, 'cache_lookup', None)
+        if cache_lookup is not None:
+            response, cached = cache_lookup(ref_obj, *req_obj.args, **req_obj.kwargs)
+            return QueryResult.create(response, cached=cached)
+
+        # Caching enabled for the query by factory policy
+        timeout = self.cached_queries.get(req_obj.method)
+        if timeout is not None:
+            method_cache = self._query_cache(fn, timeout)
+            response, cached = method_cache.lookup(ref_obj, *req_obj.args, extra_tags=self.query_dependencies(),
+                                                   **req_obj.kwargs)
+            return QueryResult.create(response, cached=cached)
+
+        response = fn(*req_obj.args, **req_obj.kwargs)
         return QueryResult.create(response)
 
 
@@ -2,7 +2,11 @@
 # -*- coding: utf-8 -*-
 """Middleware for storing current user"""
 
-from threading import local
+import functools
+import contextvars
+from contextlib import contextmanager
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor
 
 # Project imports
 from draalcore.middleware.base import BaseMiddleware
@@ -12,24 +16,81 @@ __copyright__ = "Copyright 2014,2021"
 __email__ = "juha.ojanpera@gmail.com"
 __status__ = "Development"
 
-_thread_locals = local()
+# Context variables are isolated per thread and per asyncio task, so the storage
+# works for both sync (WSGI) and async (ASGI) request processing
+_current_user = ContextVar('draalcore_current_user', default=None)
+_current_request = ContextVar('draalcore_current_request', default=None)
 
 
 def get_current_user():
     """Returns the current user, if exist, otherwise None"""
-    return getattr(_thread_locals, "user", None)
+    return _current_user.get()
 
 
 def set_current_user(user):
-    _thread_locals.user = user
+    _current_user.set(user)
 
 
 def get_current_request():
     """Returns the HTTP request, if exist, otherwise None"""
-    return getattr(_thread_locals, "request", None)
+    return _current_request.get()
+
+
+def set_current_request(request):
+    _current_request.set(request)
+
+
+@contextmanager
+def acting_user(user, request=None):
+    """
+    Context manager for executing code on behalf of specified user. Previous user
+    (and request) is restored on exit.
+
+    Parameters
+    ----------
+    user
+       User object.
+    request
+       Optional HTTP request object.
+    """
+    user_token = _current_user.set(user)
+    request_token = _current_request.set(request) if request is not None else None
+    try:
+        yield user
+    finally:
+        if request_token is not None:
+            _current_request.reset(request_token)
+        _current_user.reset(user_token)
+
+
+def with_current_context(fn):
+    """
+    Return callable that executes fn within copy of the caller's context. Use this when
+    passing work to threads or other executors so that current user and request are available.
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        # Same context cannot be entered concurrently, each call runs in its own copy
+        return context.copy().run(fn, *args, **kwargs)
+
+    return wrapper
+
+
+def submit_with_context(executor, fn, *args, **kwargs):
+    """Submit callable to concurrent.futures executor so that it runs within copy of the current context."""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """Thread pool executor where submitted callables run within copy of the submitter's context."""
+
+    def submit(self, fn, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
 
 
 class CurrentUserMiddleware(BaseMiddleware):
     def process_request(self, request):
-        _thread_locals.user = request.user
-        _thread_locals.request = request
+        set_current_user(request.user)
+        set_current_request(request)
@@ -3,6 +3,7 @@
 """Login related middleware processors"""
 
 # System imports
+import time
 import logging
 from re import compile
 from django.urls import reverse
@@ -84,26 +85,44 @@ class DateTimeSerializer(object):
 
 class AutoLogout(BaseMiddleware):
     """
-    Middleware for logging out user if session has expired
+    Middleware for logging out user if session has expired.
+
+    Latest activity time is stored to session only when the stored value is older than
+    AUTO_LOGOUT_TOUCH_GRANULARITY seconds (default 60) so that each request does not
+    result in session save. Session may therefore expire up to granularity seconds early.
     """
+
+    SESSION_KEY = 'last_touch'
+
+    @staticmethod
+    def decode_touch(value):
+        """Return session touch value as epoch seconds, None if not available."""
+        if value is None:
+            return None
+
+        if isinstance(value, (int, float)):
+            return value
+
+        # Legacy format
+        return DateTimeSerializer(value).decode.timestamp()
+
     def process_request(self, request):
 
         if not request.user.is_authenticated:
             # Can't log out if not logged in
             return
 
-        try:
-            cur_time = datetime.now()
-            DELAY = settings.AUTO_LOGOUT_DELAY
-            last_touch = DateTimeSerializer(request.session['last_touch']).decode
-            if cur_time - last_touch > timedelta(0, DELAY, 0):
-                auth.logout(request)
-                del request.session['last_touch']
-                return HttpResponse('Session timeout, please login', status=401)
-        except KeyError:
-            pass
-
-        request.session['last_touch'] = DateTimeSerializer(datetime.now()).encode
+        cur_time = time.time()
+        stored_touch = request.session.get(self.SESSION_KEY)
+        last_touch = self.decode_touch(stored_touch)
+        if last_touch is not None and cur_time - last_touch > settings.AUTO_LOGOUT_DELAY:
+            auth.logout(request)
+            request.session.pop(self.SESSION_KEY, None)
+            return HttpResponse('Session timeout, please login', status=401)
+
+        granularity = getattr(settings, 'AUTO_LOGOUT_TOUCH_GRANULARITY', 60)
+        if not isinstance(stored_touch, int) or cur_time - last_touch >= granularity:
+            request.session[self.SESSION_KEY] = int(cur_time)
 
     @staticmethod
     def expires():
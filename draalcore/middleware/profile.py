@@ -1,307 +1,385 @@
-# Copyright (C) 2011 by Blade Polska s.c.
-# Full rights belong to Tomek Kopczuk (@tkopczuk).
-# www.askthepony.com
-#
-# Permission is hereby granted, free of charge, to any person obtaining a copy
-# of this software and associated documentation files (the "Software"), to deal
-# in the Software without restriction, including without limitation the rights
-# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
-# copies of the Software, and to permit persons to whom the Software is
-# furnished to do so, subject to the following conditions:
-#
-# The above copyright notice and this permission notice shall be included in
-# all copies or substantial portions of the Software.
-#
-# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
-# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
-# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
-# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
-# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
-# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
-# THE SOFTWARE.
-
-from datetime import datetime
-import cProfile
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Per-request profiling middleware.
+
+Profiling is triggered by staff users using 'X-Draalcore-Profile' header or '__profile__' query
+parameter. The value selects the profiler: 'cprofile' (deterministic, default) or 'sample'
+(low overhead statistical sampling of the request thread). Profile is stored in speedscope
+JSON format to bounded on-disk ring buffer and its ID is returned in 'X-Draalcore-Profile-Id'
+response header. Stored profiles can be listed and downloaded (speedscope JSON or collapsed
+stacks for flame graph tools) by staff users via ReST API.
+
+Enable by adding 'draalcore.middleware.profile.ProfilingMiddleware' after Django's
+AuthenticationMiddleware.
+"""
+
+# System imports
 import os
-import StringIO
+import re
+import sys
+import json
+import time
+import uuid
+import heapq
 import pstats
-import marshal
-from django.core.exceptions import MiddlewareNotUsed
-from django.conf import settings
-import subprocess
+import cProfile
+import logging
 import tempfile
+import threading
+from collections import Counter
+from django.conf import settings
+from django.utils import timezone
 
-from django.http import HttpResponse
-from django.shortcuts import redirect
-from django.test.client import Client
+# Project imports
+from draalcore.middleware.base import BaseMiddleware
 
-import hotshot
+__author__ = "Juha Ojanpera"
+__copyright__ = "Copyright 2021"
+__email__ = "juha.ojanpera@gmail.com"
+__status__ = "Development"
 
-import time
+logger = logging.getLogger(__name__)
 
+PROFILE_HEADER = 'HTTP_X_DRAALCORE_PROFILE'
+PROFILE_PARAM = '__profile__'
+PROFILE_ID_HEADER = 'X-Draalcore-Profile-Id'
 
-class InstrumentMiddleware(object):
-    def process_request(self, request):
-        try:
-            params = getattr(request, request.method)
-        except AttributeError:
-            params = getattr(request, 'POST')
-
-        if 'profile' in params:
-            request.profiler = cProfile.Profile()
-            request.profiler.enable()
-
-    def process_response(self, request, response):
-        if hasattr(request, 'profiler'):
-            request.profiler.disable()
-            stamp = (request.META['REMOTE_ADDR'], datetime.now())
-            request.profiler.dump_stats('/tmp/%s-%s.pro' % stamp)
-
-            stream = StringIO.StringIO()
-            stats = pstats.Stats('/tmp/%s-%s.pro' % stamp, stream=stream)
-            stats.strip_dirs()
-            stats.sort_stats('time')
-            stats.print_stats(12)
-            stats.print_callers(12)
-            stats.print_callees(12)
-            os.remove('/tmp/%s-%s.pro' % stamp)
-            response._container[0] += '<pre style="color: #FFF">'+stream.getvalue()+'</pre>'
-            stream.close()
-        return response
+MODE_CPROFILE = 'cprofile'
+MODE_SAMPLE = 'sample'
+MODES = (MODE_CPROFILE, MODE_SAMPLE)
 
+SPEEDSCOPE_SCHEMA = 'https://www.speedscope.app/file-format-schema.json'
+
+# Stack attribution of cProfile call graph stops at this depth and weight (seconds)
+MAX_STACK_DEPTH = 64
+MIN_STACK_WEIGHT = 1e-6
+
+# Maximum number of call graph nodes expanded when attributing stacks of single profile
+MAX_STACK_NODES = 20000
 
-class ProfileMiddleware(object):
-    def __init__(self):
-        if not settings.DEBUG:
-            raise MiddlewareNotUsed()
-        self.profiler = None
-
-    def process_view(self, request, callback, callback_args, callback_kwargs):
-        if settings.DEBUG and ('profiler' in request.GET or 'profilerbin' in request.GET):
-            self.profiler = cProfile.Profile()
-            args = (request,) + callback_args
-            return self.profiler.runcall(callback, *args, **callback_kwargs)
-
-    def process_response(self, request, response):
-        if settings.DEBUG:
-            if 'profiler' in request.GET:
-                self.profiler.create_stats()
-                out = StringIO.StringIO()
-                stats = pstats.Stats(self.profiler, stream=out)
-                # Values for stats.sort_stats():
-                # - calls           call count
-                # - cumulative      cumulative time
-                # - file            file name
-                # - module          file name
-                # - pcalls          primitive call count
-                # - line            line number
-                # - name            function name
-                # - nfl                     name/file/line
-                # - stdname         standard name
-                # - time            internal time
-                stats.sort_stats('time').print_stats(.2)
-                response.content = out.getvalue()
-                response['Content-type'] = 'text/plain'
-                return response
-            if 'profilerbin' in request.GET:
-                self.profiler.create_stats()
-                response.content = marshal.dumps(self.profiler.stats)
-                filename = request.path.strip('/').replace('/', '_') + '.pstat'
-                response['Content-Disposition'] = \
-                    'attachment; filename=%s' % (filename,)
-                response['Content-type'] = 'application/octet-stream'
-                return response
-        return response
 
+def _frame(name, filename, line):
+    return (name, filename, line)
 
-"""A Django middleware for interactive profiling"""
 
-OUT_FORMAT = 'png'
-GPROF2PY_PATH = '/home/jojanper/work/python_snippets/profiling'
+class SamplingProfiler(object):
+    """
+    Statistical profiler sampling the call stack of the profiled thread from background thread.
+
+    Parameters
+    ----------
+    interval : float
+       Sampling interval in seconds, as defined by DRAALCORE_PROFILE_SAMPLE_INTERVAL setting by default.
+    """
+
+    def __init__(self, interval=None):
+        self.interval = interval or getattr(settings, 'DRAALCORE_PROFILE_SAMPLE_INTERVAL', 0.005)
+        self._samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+        self._thread_id = None
+
+    def enable(self):
+        self._thread_id = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name='draalcore-profiler', daemon=True)
+        self._thread.start()
 
-__all__ = ['VisorMiddleware']
+    def disable(self):
+        self._stop.set()
+        self._thread.join()
 
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(_frame(code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
 
-class HolodeckException(Exception):
-    """Captain, the holodeck's malfunctioning again!"""
+            if stack:
+                self._samples[tuple(reversed(stack))] += 1
 
+    def stacks(self):
+        """Return sampled time in seconds keyed by call stack (root frame first)."""
+        return {stack: count * self.interval for stack, count in self._samples.items()}
 
-class HoloRequest(object):
-    """A simulated, test client request that Celery can pickle.
 
-    This tries to copy everything off of a real request object in order to
-    replay it with the Django test client.
+class DeterministicProfiler(object):
     """
+    cProfile based profiler. Call stacks are reconstructed from the caller-callee graph by
+    distributing self time of each function to its callers in proportion to the time spent
+    through each caller, as done by flame graph converters of cProfile data.
+    """
+
+    def __init__(self):
+        self._profiler = cProfile.Profile()
+
+    def enable(self):
+        self._profiler.enable()
 
-    def __init__(self, request):
-        """Initialize a HoloRequest.
-
-        request should be a Django request object.
-        """
-        self._method = request.method
-        self._headers = dict([(k, v) for (k, v) in request.META.iteritems()
-                              if k.startswith('HTTP_')])
-        # XXX: Handle raw POST bodies
-        self._data = dict((k, request.POST[k]) for k in request.POST)
-
-        path = request.path
-        query = request.GET.copy()
-        query.pop('__geordi__', None)
-        query = query.urlencode()
-        if query:
-            path += '?' + query
-        self._path = path
-
-    def profile(self, options=''):
-        """Profile the request and return a PDF/PNG/JPG/etc of the call graph"""
-        client = Client()
-        callback = {'GET': client.get,
-                    'POST': client.post,
-                    'HEAD': client.head,
-                    'OPTIONS': client.options,
-                    'PUT': client.put,
-                    'DELETE': client.delete}[self._method]
-
-        profiler = cProfile.Profile()
-        profiler.runcall(callback, self._path, self._data, **self._headers)
-        profiler.create_stats()
-
-        with tempfile.NamedTemporaryFile() as stats:
-            stats.write(marshal.dumps(profiler.stats))
-            stats.flush()
-            # XXX: Formatting a shell string like this isn't ideal.
-            cmd = ('%s/gprof2dot.py %s -f pstats %s | dot -T%s'
-                   % (GPROF2PY_PATH, options, stats.name, OUT_FORMAT))
-            proc = subprocess.Popen(cmd, shell=True, stdin=subprocess.PIPE,
-                                    stdout=subprocess.PIPE)
-            output = proc.communicate()[0]
-            retcode = proc.poll()
-            if retcode:
-                raise HolodeckException('gprof2dot/dot exited with %d'
-                                        % retcode)
-        return output
-
-
-if getattr(settings, 'GEORDI_CELERY', False):
-    from celery.task import task
-
-    @task
-    def profiletask(srequest, options):
-        """Profile a request in a background Celery task"""
-        outputdir = getattr(settings, 'GEORDI_OUTPUT_DIR', None)
-        with tempfile.NamedTemporaryFile(prefix='geordi-', suffix='.' + OUT_FORMAT,
-                                         dir=outputdir,
-                                         delete=False) as outfile:
-            outfile.write(srequest.profile(options))
-            return outfile.name
-else:
-    profiletask = None
-
-
-class VisorMiddleware(object):
-    """Interactive profiling middleware.
-
-    When a request comes in that has a __geordi__ GET parameter, this bypasses
-    the view function, profiles the request, and returns the profiler output.
-
-    Note that this only runs if settings.DEBUG is True or if the current user
-    is a super user.
+    def disable(self):
+        self._profiler.disable()
+
+    def stacks(self):
+        """Return self time in seconds keyed by call stack (root frame first)."""
+        return call_stacks(pstats.Stats(self._profiler).stats)
+
+
+def call_stacks(stats, max_nodes=MAX_STACK_NODES):
+    """
+    Return self time in seconds keyed by call stack (root frame first) from cProfile call graph.
+
+    Number of acyclic caller paths grows exponentially with the call graph size, so paths are
+    expanded heaviest first and at most max_nodes caller nodes are expanded in total. Partial
+    stacks that are not expanded further keep their weight, total time is always preserved.
+
+    Parameters
+    ----------
+    stats : dict
+       Call graph as in pstats.Stats.stats.
+    max_nodes : int
+       Maximum number of expanded caller nodes.
+
+    Returns
+    -------
+    Counter
+       Time keyed by call stack, stack is tuple of (name, file, line) frames.
     """
+    stacks = Counter()
 
-    _refresh = """<!DOCTYPE html>
-<head>
-<title>Profiling...</title>
-<meta http-equiv=refresh content=3>
-</head>
-<body>
-<p>Profiling...</p>
-"""
+    # Heap items are (-weight, sequence number, path), path is ordered from leaf to root
+    heap = [(-value[2], index, (func,)) for index, (func, value) in enumerate(stats.items()) if value[2] > 0]
+    heapq.heapify(heap)
+    sequence = len(heap)
+    expanded = 0
 
-    def _allowed(self, request):
-        """Return whether or not the middleware should run"""
-        if settings.DEBUG:
-            return True
-        user = getattr(request, 'user', None)
-        if user is not None:
-            return user.is_superuser
-        else:
-            return False
-
-    def _profile(self, task_id, request):
-        """Profile the request asynchronously"""
-        if task_id == '':
-            options = getattr(settings, 'GEORDI_GPROF2DOT_OPTIONS', '')
-            srequest = HoloRequest(request)
-            result = profiletask.delay(srequest, options)
-
-            query = request.GET.copy()
-            query['__geordi__'] = result.task_id
-            return redirect(request.path + '?' + query.urlencode())
-        else:
-            result = profiletask.AsyncResult(task_id)
-            if not result.ready():
-                return HttpResponse(self._refresh)
-            else:
-                with open(result.get(), 'rb') as outfile:
-                    output = outfile.read()
-                return HttpResponse(output, content_type='application/' + OUT_FORMAT)
-
-    def _profilenow(self, request):
-        """Profile the request in-process"""
-        options = getattr(settings, 'GEORDI_GPROF2DOT_OPTIONS', '')
-        srequest = HoloRequest(request)
-        return HttpResponse(srequest.profile(options),
-                            content_type='application/' + OUT_FORMAT)
-
-    def process_view(self, request, *args, **kwargs):
-        """Handle view bypassing/profiling"""
-        if not self._allowed(request):
-            return
-
-        task_id = request.GET.get('__geordi__', None)
-        if task_id is None:
-            return
-
-        if profiletask:
-            return self._profile(task_id, request)
-        else:
-            return self._profilenow(request)
-
-
-PROFILE_LOG_BASE = os.path.dirname(os.path.abspath(__file__))
-
-
-def profile(log_file):
-    """Profile some callable.
-
-    This decorator uses the hotshot profiler to profile some callable (like
-    a view function or method) and dumps the profile data somewhere sensible
-    for later processing and examination.
-
-    It takes one argument, the profile log name. If it's a relative path, it
-    places it under the PROFILE_LOG_BASE. It also inserts a time stamp into the
-    file name, such that 'my_view.prof' become 'my_view-20100211T170321.prof',
-    where the time stamp is in UTC. This makes it easy to run and compare
-    multiple trials.
+    while heap:
+        weight, _, path = heapq.heappop(heap)
+        weight = -weight
+
+        callers = []
+        if expanded < max_nodes and len(path) < MAX_STACK_DEPTH and weight >= MIN_STACK_WEIGHT:
+            # Self time is distributed by caller specific self time, upper levels by cumulative time
+            index = 2 if len(path) == 1 else 3
+            callers = [(caller, value[index]) for caller, value in stats[path[-1]][4].items()
+                       if caller in stats and caller not in path]
+
+        total = sum(value for _, value in callers)
+        if not callers or total <= 0:
+            stacks[tuple(_frame(item[2], item[0], item[1]) for item in reversed(path))] += weight
+            continue
+
+        expanded += len(callers)
+        for caller, value in callers:
+            heapq.heappush(heap, (-weight * value / total, sequence, path + (caller,)))
+            sequence += 1
+
+    return stacks
+
+
+PROFILERS = {
+    MODE_CPROFILE: DeterministicProfiler,
+    MODE_SAMPLE: SamplingProfiler
+}
+
+
+def speedscope_profile(stacks, name):
+    """
+    Return call stacks as speedscope sampled profile.
+
+    Parameters
+    ----------
+    stacks : dict
+       Time in seconds keyed by call stack, stack is tuple of (name, file, line) frames, root frame first.
+    name
+       Profile name.
+
+    Returns
+    -------
+    dict
+       Speedscope file content, weights are in milliseconds.
+    """
+    frames = []
+    frame_index = {}
+    samples = []
+    weights = []
+    for stack, weight in sorted(stacks.items(), key=lambda item: item[1], reverse=True):
+        sample = []
+        for frame in stack:
+            if frame not in frame_index:
+                frame_index[frame] = len(frames)
+                frames.append({'name': frame[0], 'file': frame[1], 'line': frame[2]})
+            sample.append(frame_index[frame])
+
+        samples.append(sample)
+        weights.append(round(weight * 1000, 6))
+
+    return {
+        '$schema': SPEEDSCOPE_SCHEMA,
+        'name': name,
+        'exporter': 'draalcore',
+        'activeProfileIndex': 0,
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled',
+            'name': name,
+            'unit': 'milliseconds',
+            'startValue': 0,
+            'endValue': round(sum(weights), 6),
+            'samples': samples,
+            'weights': weights
+        }]
+    }
+
+
+def collapsed_stacks(data):
+    """Return speedscope profile as collapsed stacks ('frame;frame;frame weight' lines, weight in microseconds)."""
+    frames = ['{} ({}:{})'.format(item['name'], item.get('file', ''), item.get('line', '')).replace(';', ',')
+              for item in data['shared']['frames']]
+
+    lines = []
+    for profile in data['profiles']:
+        for sample, weight in zip(profile['samples'], profile['weights']):
+            lines.append('{} {}'.format(';'.join(frames[index] for index in sample), int(round(weight * 1000))))
+
+    return '\n'.join(lines) + '\n'
+
+
+class ProfileStore(object):
+    """
+    Bounded on-disk ring buffer of profiles. Each profile is stored as speedscope JSON file
+    with separate metadata file, oldest profiles are removed when the limit is exceeded.
+
+    Parameters
+    ----------
+    root
+       Profile directory, as defined by DRAALCORE_PROFILE_DIR setting by default.
+    max_files : int
+       Maximum number of stored profiles, as defined by DRAALCORE_PROFILE_MAX_FILES setting by default.
     """
 
-    if not os.path.isabs(log_file):
-        log_file = os.path.join(PROFILE_LOG_BASE, log_file)
+    ID_RE = re.compile(r'^\d{8}T\d{6}\d{6}-[0-9a-f]{8}$')
 
-    def _outer(f):
-        def _inner(*args, **kwargs):
-            # Add a timestamp to the profile output when the callable
-            # is actually called.
-            (base, ext) = os.path.splitext(log_file)
-            base = base + "-" + time.strftime("%Y%m%dT%H%M%S", time.gmtime())
-            final_log_file = base + ext
+    def __init__(self, root=None, max_files=None):
+        default_root = os.path.join(tempfile.gettempdir(), 'draalcore-profiles')
+        self.root = root or getattr(settings, 'DRAALCORE_PROFILE_DIR', None) or default_root
+        self.max_files = max_files or getattr(settings, 'DRAALCORE_PROFILE_MAX_FILES', 50)
 
-            prof = hotshot.Profile(final_log_file)
+    def _path(self, profile_id, suffix):
+        return os.path.join(self.root, profile_id + suffix)
+
+    def _write(self, path, data):
+        tmp_path = '{}.{}.tmp'.format(path, uuid.uuid4().hex[:8])
+        with open(tmp_path, 'w') as fobj:
+            json.dump(data, fobj, separators=(',', ':'))
+        os.rename(tmp_path, path)
+
+    def save(self, data, meta):
+        """Store profile and its metadata, return profile ID."""
+        os.makedirs(self.root, exist_ok=True)
+
+        profile_id = '{}-{}'.format(timezone.now().strftime('%Y%m%dT%H%M%S%f'), uuid.uuid4().hex[:8])
+        self._write(self._path(profile_id, '.json'), data)
+        self._write(self._path(profile_id, '.meta'), dict(meta, id=profile_id))
+
+        self._trim()
+        return profile_id
+
+    def _ids(self):
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return []
+
+        # IDs start with timestamp so name order is the creation order
+        return sorted(name[:-5] for name in names if name.endswith('.meta') and self.ID_RE.match(name[:-5]))
+
+    def _trim(self):
+        for profile_id in self._ids()[:-self.max_files]:
+            for suffix in ('.meta', '.json'):
+                try:
+                    os.remove(self._path(profile_id, suffix))
+                except FileNotFoundError:
+                    pass
+
+    def list(self):
+        """Return metadata of stored profiles, latest profile first."""
+        items = []
+        for profile_id in reversed(self._ids()):
             try:
-                ret = prof.runcall(f, *args, **kwargs)
-            finally:
-                prof.close()
-            return ret
+                with open(self._path(profile_id, '.meta')) as fobj:
+                    items.append(json.load(fobj))
+            except (FileNotFoundError, ValueError):
+                continue
+
+        return items
+
+    def load(self, profile_id):
+        """Return speedscope data of profile, None if not available."""
+        if not self.ID_RE.match(profile_id):
+            return None
 
-        return _inner
-    return _outer
+        try:
+            with open(self._path(profile_id, '.json')) as fobj:
+                return json.load(fobj)
+        except (FileNotFoundError, ValueError):
+            return None
+
+
+class ProfilingMiddleware(BaseMiddleware):
+    """Profile requests of staff users on demand, see module description."""
+
+    def __init__(self, get_response):
+        super(ProfilingMiddleware, self).__init__(get_response)
+        self.store = ProfileStore()
+
+    @staticmethod
+    def profile_mode(request):
+        """Return requested profiling mode, None if request is not to be profiled."""
+        value = request.META.get(PROFILE_HEADER)
+        if value is None:
+            value = request.GET.get(PROFILE_PARAM)
+        if value is None:
+            return None
+
+        user = getattr(request, 'user', None)
+        if not (user and user.is_active and user.is_staff):
+            return None
+
+        value = value.strip().lower() or MODE_CPROFILE
+        return value if value in MODES else None
+
+    def __call__(self, request):
+        mode = self.profile_mode(request)
+        if mode is None:
+            return self.get_response(request)
+
+        profiler = PROFILERS[mode]()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+
+        duration = time.perf_counter() - start
+
+        try:
+            name = '{} {} ({})'.format(request.method, request.get_full_path(), mode)
+            meta = {
+                'created': timezone.now().isoformat(),
+                'method': request.method,
+                'path': request.get_full_path(),
+                'mode': mode,
+                'duration': round(duration * 1000, 3),
+                'status': response.status_code,
+                'user': request.user.username
+            }
+            response[PROFILE_ID_HEADER] = self.store.save(speedscope_profile(profiler.stacks(), name), meta)
+        except Exception:
+            # Profiling must never break the request
+            logger.exception('Unable to store profile of {}'.format(request.path))
+
+        return response
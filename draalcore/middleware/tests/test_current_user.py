@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Current user storage tests"""
+
+# System imports
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Project imports
+from draalcore.test_utils.basetest import BaseTest, create_user
+from draalcore.test_apps.test_models.models import TestModel
+from draalcore.middleware.current_user import (get_current_user, get_current_request, set_current_user, set_current_request,
+                                               acting_user, with_current_context, submit_with_context, ContextThreadPoolExecutor)
+
+
+class CurrentUserTestCase(BaseTest):
+    """Current user and request propagation."""
+
+    def basetest_initialize(self):
+        set_current_user(None)
+        set_current_request(None)
+
+    def test_acting_user(self):
+        """Acting user is restored on exit"""
+
+        # GIVEN current user
+        set_current_user('user1')
+
+        # WHEN code is executed on behalf of other user
+        with acting_user('user2', request='request'):
+            # THEN user and request are available
+            self.assertEqual(get_current_user(), 'user2')
+            self.assertEqual(get_current_request(), 'request')
+
+        # AND previous values are restored on exit
+        self.assertEqual(get_current_user(), 'user1')
+        self.assertIsNone(get_current_request())
+
+    def test_thread_isolation(self):
+        """Current user is not visible in new thread unless context is copied"""
+
+        result = {}
+
+        def target(key):
+            result[key] = get_current_user()
+
+        with acting_user('user'):
+            t1 = threading.Thread(target=target, args=('plain',))
+            t2 = threading.Thread(target=with_current_context(target), args=('context',))
+            for thread in [t1, t2]:
+                thread.start()
+                thread.join()
+
+        self.assertEqual(result, {'plain': None, 'context': 'user'})
+
+    def test_executors(self):
+        """Current user is propagated to executors"""
+
+        # GIVEN acting user
+        with acting_user('user'):
+            # WHEN callables are executed in thread pools
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                plain = executor.submit(get_current_user).result()
+                copied = submit_with_context(executor, get_current_user).result()
+
+            with ContextThreadPoolExecutor(max_workers=2) as executor:
+                mapped = list(executor.map(lambda _: get_current_user(), range(4)))
+
+        # THEN user is available only when context is copied
+        self.assertIsNone(plain)
+        self.assertEqual(copied, 'user')
+        self.assertEqual(mapped, ['user'] * 4)
+
+    def test_model_modified_by(self):
+        """Model instantiated in worker thread records acting user"""
+
+        user = create_user('thread-user', 'password', 'thread@gmail.com')
+        with acting_user(user):
+            with ContextThreadPoolExecutor(max_workers=1) as executor:
+                obj = executor.submit(TestModel, name='test').result()
+
+        self.assertEqual(obj.modified_by, user)
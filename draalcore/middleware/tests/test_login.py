@@ -10,6 +10,7 @@ from django.http import HttpRequest
 from django.conf import settings
 from django.contrib import auth
 from django.urls import reverse
+from django.contrib.sessions.backends.db import SessionStore
 
 # Project imports
 from draalcore.test_utils.basetest import BaseTestMiddleware
@@ -125,3 +126,65 @@ class AutoLogoutTestCase(BaseTestMiddleware):
         # THEN unauthorized response is returned
         self.assertIsNotNone(response)
         self.assertEqual(response.status_code, 401)
+
+    def test_session_touch_throttled(self):
+        """Session is not modified on rapid successive requests."""
+
+        obj = AutoLogout(self.get_response)
+
+        # GIVEN authenticated user with fresh session
+        request = HttpRequest()
+        request.user = MagicMock()
+        request.user.is_authenticated = True
+        request.session = SessionStore()
+
+        # WHEN first request is processed
+        obj(request)
+
+        # THEN latest activity time is stored in epoch format
+        self.assertTrue(request.session.modified)
+        self.assertTrue(isinstance(request.session['last_touch'], int))
+
+        # ----------
+
+        # WHEN subsequent requests are processed rapidly
+        request.session.modified = False
+        for _ in range(3):
+            response = obj(request)
+
+            # THEN session is not modified
+            self.assertTrue(response)
+            self.assertFalse(request.session.modified)
+
+        # ----------
+
+        # GIVEN stored activity time is older than the touch granularity
+        request.session['last_touch'] -= settings.AUTO_LOGOUT_TOUCH_GRANULARITY + 1
+        request.session.modified = False
+
+        # WHEN request is processed
+        obj(request)
+
+        # THEN activity time is updated
+        self.assertTrue(request.session.modified)
+
+    def test_legacy_session_touch(self):
+        """Legacy activity time format is accepted."""
+
+        obj = AutoLogout(self.get_response)
+
+        # GIVEN session with activity time in legacy format
+        request = HttpRequest()
+        request.user = MagicMock()
+        request.user.is_authenticated = True
+        request.session = SessionStore()
+        request.session['last_touch'] = DateTimeSerializer(datetime.now()).encode
+
+        # WHEN request is processed
+        response = obj(request)
+
+        # THEN it succeeds
+        self.assertTrue(response)
+
+        # AND activity time is stored in new format
+        self.assertTrue(isinstance(request.session['last_touch'], int))
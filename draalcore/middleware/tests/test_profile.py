@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""ProfilingMiddleware tests"""
+
+# System imports
+import json
+import time
+import shutil
+import tempfile
+from django.conf import settings
+from django.urls import reverse
+from django.test.utils import override_settings
+
+# Project imports
+from draalcore.test_utils.basetest import BaseTestUser
+from ..profile import PROFILE_ID_HEADER, DeterministicProfiler, call_stacks, speedscope_profile, collapsed_stacks
+
+
+class ProfilingMiddlewareTestCase(BaseTestUser):
+    """Requests of staff users are profiled on demand"""
+
+    def initialize(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+
+        middleware = list(settings.MIDDLEWARE) + ['draalcore.middleware.profile.ProfilingMiddleware']
+        test_settings = override_settings(MIDDLEWARE=middleware, DRAALCORE_PROFILE_DIR=root, DRAALCORE_PROFILE_MAX_FILES=2,
+                                          DRAALCORE_PROFILE_SAMPLE_INTERVAL=0.0005)
+        test_settings.enable()
+        self.addCleanup(test_settings.disable)
+
+    def _profiles(self, **params):
+        return self.api.get_call(reverse('rest-api-profiles'), params)
+
+    def test_profiling(self):
+        """Profile is stored and available for download"""
+
+        # GIVEN staff user
+        self.enable_superuser()
+
+        # WHEN requesting profile using URL parameter
+        response = self.client.get(reverse('rest-api') + '?__profile__=cprofile')
+
+        # THEN request succeeds and profile ID is returned
+        self.assertEqual(response.status_code, 200)
+        profile_id = response[PROFILE_ID_HEADER]
+
+        # AND profile is listed
+        response = self._profiles()
+        self.assertTrue(response.success)
+        self.assertEqual(response.data[0]['id'], profile_id)
+        self.assertEqual(response.data[0]['mode'], 'cprofile')
+        self.assertEqual(response.data[0]['user'], self.username)
+
+        # AND profile can be downloaded in speedscope format
+        response = self.client.get(response.data[0]['url'])
+        data = json.loads(response.content)
+        self.assertEqual(data['profiles'][0]['type'], 'sampled')
+        self.assertTrue(data['profiles'][0]['samples'])
+        names = [frame['name'] for frame in data['shared']['frames']]
+        self.assertTrue('get' in names)
+
+        # AND as collapsed stacks
+        response = self.client.get(reverse('rest-api-profile', kwargs={'profile_id': profile_id}) + '?profile_format=collapsed')
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertTrue(len(response.content.decode('utf-8').splitlines()) > 0)
+
+        # ----------
+
+        # WHEN requesting profiles using header and sampling mode
+        for _ in range(2):
+            response = self.client.get(reverse('rest-api'), HTTP_X_DRAALCORE_PROFILE='sample')
+            self.assertTrue(PROFILE_ID_HEADER in response)
+
+        # THEN only the latest profiles are kept
+        response = self._profiles()
+        self.assertEqual([item['mode'] for item in response.data], ['sample', 'sample'])
+        self.assertTrue(self.api.get_call(reverse('rest-api-profile', kwargs={'profile_id': profile_id})).error)
+
+    def test_not_allowed(self):
+        """Requests of other than staff users are not profiled"""
+
+        # WHEN requesting profile as normal user
+        response = self.client.get(reverse('rest-api') + '?__profile__')
+
+        # THEN request is not profiled
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(PROFILE_ID_HEADER in response)
+
+        # AND profiles are not available
+        self.assertTrue(self._profiles().forbidden)
+
+    def test_cprofile_stacks(self):
+        """Call stacks are rebuilt from cProfile data"""
+
+        def leaf():
+            return sum(range(20000))
+
+        def branch1():
+            return leaf()
+
+        def branch2():
+            return leaf() + leaf()
+
+        # GIVEN profiled function called via two paths
+        profiler = DeterministicProfiler()
+        profiler.enable()
+        branch1()
+        branch2()
+        profiler.disable()
+
+        # WHEN converting the profile to call stacks
+        data = speedscope_profile(profiler.stacks(), 'test')
+        lines = collapsed_stacks(data).splitlines()
+
+        # THEN both call paths of the function are present
+        stacks = [line.rsplit(' ', 1)[0].split(';') for line in lines]
+        paths = [[frame.split(' ')[0] for frame in stack] for stack in stacks]
+        self.assertTrue(any(path[-2:] == ['branch1', 'leaf'] for path in paths))
+        self.assertTrue(any(path[-2:] == ['branch2', 'leaf'] for path in paths))
+
+    def test_stacks_bounded(self):
+        """Stack attribution of large call graph is bounded"""
+
+        # GIVEN call graph where each function is called by all functions of the upper layer
+        width, depth = 3, 40
+        layers = [[('module.py', layer * width + index, 'func{}_{}'.format(layer, index)) for index in range(width)]
+                  for layer in range(depth)]
+        stats = {}
+        for layer, funcs in enumerate(layers):
+            callers = layers[layer + 1] if layer + 1 < depth else []
+            for func in funcs:
+                stats[func] = (1, 1, 1.0, depth - layer, {caller: (1, 1, 0.1, 1.0) for caller in callers})
+
+        # AND one function that dominates the profile
+        heavy = layers[0][0]
+        stats[heavy] = (1, 1, 1000.0, 1000.0, stats[heavy][4])
+
+        # WHEN converting the call graph to stacks
+        start = time.perf_counter()
+        stacks = call_stacks(stats, max_nodes=5000)
+        duration = time.perf_counter() - start
+
+        # THEN conversion completes quickly despite the number of possible paths
+        self.assertTrue(duration < 5, duration)
+        self.assertTrue(len(stacks) <= 5000 + width * depth)
+
+        # AND total self time is preserved
+        self.assertAlmostEqual(sum(stacks.values()), 1000.0 + width * depth - 1)
+
+        # AND heaviest function is expanded furthest
+        max_depth = max(len(stack) for stack in stacks if stack[-1][0] == heavy[2])
+        self.assertTrue(max_depth > max(len(stack) for stack in stacks if stack[-1][0] != heavy[2]))
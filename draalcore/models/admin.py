@@ -7,7 +7,12 @@ from django.contrib import admin
 from django.contrib.admin.models import LogEntry
 
 # Project imports
-from draalcore.models.admin_log import LogEntryAdmin
+from draalcore.models.models import HistoryEvent, HISTORY_EVENTS, history_store
+from draalcore.models.admin_log import LogEntryAdmin, HistoryEventAdmin
 
 
 admin.site.register(LogEntry, LogEntryAdmin)
+
+# History events are viewable in admin when used as history storage
+if history_store() == HISTORY_EVENTS:
+    admin.site.register(HistoryEvent, HistoryEventAdmin)
@@ -65,3 +65,22 @@ class LogEntryAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request):
         return super(LogEntryAdmin, self).get_queryset(request).prefetch_related('content_type')
+
+
+class HistoryEventAdmin(LogEntryAdmin):
+    """View model history events in the admin."""
+
+    readonly_fields = ['user', 'content_type', 'object_id', 'changes', 'object_repr', 'action_flag']
+
+    search_fields = [
+        'user__username',
+        'object_repr'
+    ]
+
+    list_display = [
+        'action_time',
+        'user',
+        'content_type',
+        'object_link',
+        'changes',
+    ]
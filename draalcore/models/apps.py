@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class ModelsConfig(AppConfig):
+    default = True
+    name = 'draalcore.models'
+    label = 'draalcore_models'
@@ -0,0 +1,364 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Archival of model history events to compressed segment files.
+
+Events older than the retention window are moved out of the history table into
+append-only segment files. Each archival run writes a new segment where the events
+of each model item are stored as separate gzip member (JSON lines, latest event first).
+Location of the members is stored to HistoryArchiveIndex so that events of single
+model item can be read without decompressing the whole segment.
+"""
+
+# System imports
+import os
+import json
+import gzip
+import uuid
+import logging
+from collections.abc import Sequence
+from datetime import timedelta
+from itertools import groupby
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+
+# Project imports
+from draalcore.models.models import HistoryArchiveIndex, HistoryEvent, history_changes, history_model, exclude_empty_events
+
+__author__ = "Juha Ojanpera"
+__copyright__ = "Copyright 2021"
+__email__ = "juha.ojanpera@gmail.com"
+__status__ = "Development"
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = '.jsonl.gz'
+
+
+def archive_root():
+    """Return segment file directory as defined by DRAALCORE_HISTORY_ARCHIVE_ROOT setting."""
+    root = getattr(settings, 'DRAALCORE_HISTORY_ARCHIVE_ROOT', None)
+    return root or os.path.join(settings.MEDIA_ROOT, 'history_archive')
+
+
+def retention_days():
+    """Return number of days events are kept in history table as defined by DRAALCORE_HISTORY_RETENTION_DAYS setting."""
+    return getattr(settings, 'DRAALCORE_HISTORY_RETENTION_DAYS', 365)
+
+
+def event_record(entry):
+    """Return history event (LogEntry or HistoryEvent) as archive record."""
+    return {
+        'id': entry.id,
+        'user': entry.user_id,
+        'time': entry.action_time.isoformat(),
+        'flag': entry.action_flag,
+        'repr': entry.object_repr,
+        'changes': history_changes(entry)
+    }
+
+
+class ArchivedEvent(object):
+    """History event read from segment file, provides the attributes needed for history serialization."""
+
+    def __init__(self, content_type_id, object_id, record):
+        self.id = record['id']
+        self.content_type_id = content_type_id
+        self.object_id = object_id
+        self.user_id = record['user']
+        self.user = None
+        self.action_time = parse_datetime(record['time'])
+        self.action_flag = record['flag']
+        self.object_repr = record['repr']
+        self.changes = record['changes']
+
+    @property
+    def change_message(self):
+        return json.dumps(self.changes)
+
+    def __str__(self):
+        return '{}({},{},{})'.format(self.__class__.__name__, self.content_type_id, self.object_id, self.action_time)
+
+
+def read_events(index):
+    """
+    Read archived events of model item.
+
+    Parameters
+    ----------
+    index : HistoryArchiveIndex
+       Location of the events.
+
+    Returns
+    -------
+    list
+       ArchivedEvent objects, latest event first.
+    """
+    with open(os.path.join(archive_root(), index.segment), 'rb') as fobj:
+        fobj.seek(index.offset)
+        data = gzip.decompress(fobj.read(index.length))
+
+    return [ArchivedEvent(index.content_type_id, index.object_id, json.loads(line))
+            for line in data.decode('utf-8').splitlines()]
+
+
+def _set_users(items):
+    users = User.objects.in_bulk(set(item.user_id for item in items if item.user_id))
+    for item in items:
+        item.user = users.get(item.user_id)
+
+
+class MergedHistory(Sequence):
+    """
+    Lazy history of model item where hot events from history table are followed by archived events.
+    Supports counting and slicing so that it can be used with paginator, segment files are read
+    only when slice extends past the hot events.
+    """
+
+    def __init__(self, query, indexes):
+        self._query = query
+        self._indexes = indexes
+        self._hot_count = None
+
+    def _get_hot_count(self):
+        if self._hot_count is None:
+            self._hot_count = self._query.count()
+        return self._hot_count
+
+    def count(self):
+        """Return total number of events."""
+        return self._get_hot_count() + sum(index.count for index in self._indexes)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            items = self[key:key + 1] if key >= 0 else self[len(self) + key:len(self) + key + 1]
+            if not items:
+                raise IndexError('History index out of range')
+            return items[0]
+
+        if key.step is not None:
+            raise ValueError('Slice step is not supported')
+
+        start = key.start or 0
+        stop = len(self) if key.stop is None else key.stop
+
+        hot_count = self._get_hot_count()
+        items = list(self._query[start:min(stop, hot_count)]) if start < hot_count else []
+        items.extend(self._archived(max(start - hot_count, 0), stop - hot_count))
+        return items
+
+    def _archived(self, start, stop):
+        """Return archived events from specified range, only the needed members are decompressed."""
+        items = []
+        position = 0
+        for index in self._indexes:
+            if position >= stop:
+                break
+
+            if position + index.count > start:
+                events = read_events(index)
+                items.extend(events[max(start - position, 0):stop - position])
+
+            position += index.count
+
+        _set_users(items)
+        return items
+
+
+def archived_events_batch(content_type_id, counts, before=None):
+    """
+    Return latest archived events of several model items.
+
+    Parameters
+    ----------
+    content_type_id
+       Content type ID of the model.
+    counts : dict
+       Maximum number of events keyed by model item ID.
+    before : dict
+       Cursors keyed by model item ID, only events with ID less than the cursor are returned for the model item.
+
+    Returns
+    -------
+    dict
+       ArchivedEvent objects keyed by model item ID, latest event first.
+    """
+    events = {}
+    if not counts:
+        return events
+
+    before = before or {}
+    indexes = HistoryArchiveIndex.objects.filter(content_type_id=content_type_id, object_id__in=list(counts))
+    for index in indexes.order_by('-id'):
+        items = events.setdefault(index.object_id, [])
+        cursor = before.get(index.object_id)
+        for item in read_events(index):
+            if len(items) >= counts[index.object_id]:
+                break
+            if cursor is None or item.id < cursor:
+                items.append(item)
+
+    _set_users([item for items in events.values() for item in items])
+    return events
+
+
+def merged_history(query, content_type_id, object_id):
+    """
+    Return history of model item including archived events.
+
+    Parameters
+    ----------
+    query : QuerySet
+       Hot history events, latest event first.
+    content_type_id
+       Content type ID of the model.
+    object_id
+       Model item ID.
+
+    Returns
+    -------
+    QuerySet | MergedHistory
+       Input queryset if model item has no archived events, merged history otherwise.
+    """
+    indexes = list(HistoryArchiveIndex.objects.filter(content_type_id=content_type_id, object_id=object_id).order_by('-id'))
+    return MergedHistory(query, indexes) if indexes else query
+
+
+class HistoryArchiver(object):
+    """
+    Move history events older than specified time from history table to segment files.
+
+    Parameters
+    ----------
+    before : datetime
+       Events older than this are archived, by default as defined by the retention window.
+    batch_size : int
+       Number of model items archived per segment file.
+    """
+
+    def __init__(self, before=None, batch_size=1000):
+        self.before = before or timezone.now() - timedelta(days=retention_days())
+        self.batch_size = batch_size
+        self.model = history_model()
+        self.stats = {'events': 0, 'objects': 0, 'segments': [], 'snapshots': 0}
+
+    @staticmethod
+    def content_types():
+        """Content types of models logging events."""
+        # Import here to avoid circular imports
+        from draalcore.models.base_model import EventHandlingMixin
+
+        models = [model for model in apps.get_models() if issubclass(model, EventHandlingMixin)]
+        return [item.id for item in ContentType.objects.get_for_models(*models).values()]
+
+    def _query(self, content_type_id):
+        # Same condition as when reading model history
+        query = self.model.objects.filter(content_type_id=content_type_id, action_time__lt=self.before)
+        return exclude_empty_events(query)
+
+    def _object_ids(self, content_type_id):
+        query = self._query(content_type_id).filter(object_id__isnull=False)
+        ids = set(query.values_list('object_id', flat=True).distinct())
+
+        # Events for non-numeric object IDs cannot be referenced from the index
+        return sorted(int(item) for item in ids if str(item).isdigit())
+
+    def _events(self, content_type_id, object_ids):
+        if self.model is HistoryEvent:
+            lookup_ids = object_ids
+        else:
+            lookup_ids = [str(item) for item in object_ids]
+
+        return self._query(content_type_id).filter(object_id__in=lookup_ids)
+
+    def _write_segment(self, content_type_id, events):
+        """Write events to new segment file, return file name and index rows of the written model items."""
+        root = archive_root()
+        os.makedirs(root, exist_ok=True)
+
+        name = '{}-{}{}'.format(timezone.now().strftime('%Y%m%d%H%M%S'), uuid.uuid4().hex[:8], SEGMENT_SUFFIX)
+        path = os.path.join(root, name)
+        tmp_path = path + '.tmp'
+
+        indexes = []
+        with open(tmp_path, 'wb') as fobj:
+            for object_id, items in groupby(events, key=lambda item: int(item.object_id)):
+                lines = [json.dumps(event_record(item), separators=(',', ':')) for item in items]
+                data = gzip.compress('\n'.join(lines).encode('utf-8'))
+
+                indexes.append(HistoryArchiveIndex(content_type_id=content_type_id, object_id=object_id, segment=name,
+                                                   offset=fobj.tell(), length=len(data), count=len(lines)))
+                fobj.write(data)
+
+            fobj.flush()
+            os.fsync(fobj.fileno())
+
+        # Segment becomes visible only when fully written
+        os.rename(tmp_path, path)
+        return name, indexes
+
+    def _archive_batch(self, content_type_id, object_ids):
+        query = self._events(content_type_id, object_ids)
+        events = list(query.order_by('object_id', '-id'))
+        if not events:
+            return
+
+        name, indexes = self._write_segment(content_type_id, events)
+        try:
+            with transaction.atomic():
+                HistoryArchiveIndex.objects.bulk_create(indexes)
+                query.filter(id__lte=max(item.id for item in events)).delete()
+        except Exception:
+            os.remove(os.path.join(archive_root(), name))
+            raise
+
+        self.stats['events'] += len(events)
+        self.stats['objects'] += len(indexes)
+        self.stats['segments'].append(name)
+        logger.info('Archived {} history events of {} items to {}'.format(len(events), len(indexes), name))
+
+    def archive(self):
+        """
+        Execute archival, return number of archived events and model items, names of created segment files
+        and number of history snapshots written before the archival.
+        """
+        # Import here to avoid circular imports
+        from draalcore.models.snapshots import snapshot_history
+
+        # Snapshots keep point-in-time state queries from reading the archived events
+        self.stats['snapshots'] = snapshot_history(self.batch_size)
+
+        for content_type_id in self.content_types():
+            object_ids = self._object_ids(content_type_id)
+            for index in range(0, len(object_ids), self.batch_size):
+                self._archive_batch(content_type_id, object_ids[index:index + self.batch_size])
+
+        return self.stats
+
+
+def archive_history(before=None, batch_size=1000):
+    """
+    Move history events older than specified time to compressed segment files.
+
+    Parameters
+    ----------
+    before : datetime
+       Events older than this are archived, by default as defined by DRAALCORE_HISTORY_RETENTION_DAYS setting.
+    batch_size : int
+       Number of model items archived per segment file.
+
+    Returns
+    -------
+    dict
+       Number of archived events ('events') and model items ('objects'), names of created segment files ('segments')
+       and number of written history snapshots ('snapshots').
+    """
+    return HistoryArchiver(before, batch_size).archive()
@@ -5,6 +5,12 @@
 # System imports
 import logging
 from django.contrib import admin
+from django.contrib.admin.models import ADDITION, CHANGE, DELETION
+from django.contrib.admin.options import get_content_type_for_model
+
+# Project imports
+from draalcore.models.base_model import EventHandlingMixin
+from draalcore.models.models import HISTORY_EVENTS, history_store, history_entry
 
 
 logger = logging.getLogger(__name__)
@@ -37,3 +43,24 @@ class BaseAdmin(admin.ModelAdmin):
             qs = qs.order_by(*ordering)
 
         return qs
+
+    def _log_history(self, request, obj, message, action):
+        """Log admin change to model's history if history is not stored to LogEntry, returns True on success."""
+        if history_store() != HISTORY_EVENTS or not isinstance(obj, EventHandlingMixin):
+            return False
+
+        events = message if isinstance(message, list) else [message]
+        history_entry(request.user, get_content_type_for_model(obj).pk, obj.pk, str(obj), events, action).save()
+        return True
+
+    def log_addition(self, request, object, message):
+        if not self._log_history(request, object, message, ADDITION):
+            return super(BaseAdmin, self).log_addition(request, object, message)
+
+    def log_change(self, request, object, message):
+        if not self._log_history(request, object, message, CHANGE):
+            return super(BaseAdmin, self).log_change(request, object, message)
+
+    def log_deletion(self, request, object, object_repr):
+        if not self._log_history(request, object, [], DELETION):
+            return super(BaseAdmin, self).log_deletion(request, object, object_repr)
@@ -5,11 +5,22 @@
 # System imports
 import logging
 import inspect
-from django.db import models
+import datetime
+from django.db import models, connections, transaction
+from django.conf import settings
+from django.utils import timezone
 from django.db.models import Q
+from django.core.exceptions import FieldDoesNotExist, ValidationError
 from django.db.models.query import QuerySet
+from django.contrib.contenttypes.models import ContentType
 
 # Project imports
+from draalcore.cache.cache import invalidate_tags
+from draalcore.models.event_buffer import event_buffer
+from draalcore.models.changes import publish_bulk_change, CHANGE_CREATE, CHANGE_EDIT
+from draalcore.models.models import history_events_batch
+from draalcore.models.archive import archived_events_batch
+from draalcore.models.snapshots import create_snapshot, state_as_of
 from draalcore.models.fields import AppModelFieldParserIterator, get_related_model
 from draalcore.middleware.current_user import get_current_user
 from draalcore.exceptions import DataParsingError, ModelManagerError
@@ -22,6 +33,50 @@ __status__ = "Development"
 logger = logging.getLogger(__name__)
 
 
+# Reference time for delta sync cursors
+SYNC_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def _sync_epoch(aware):
+    return SYNC_EPOCH if aware else SYNC_EPOCH.replace(tzinfo=None)
+
+
+def encode_sync_cursor(timestamp, obj_id):
+    """Encode (last modified timestamp, model ID) as delta sync cursor."""
+    delta = timestamp - _sync_epoch(timezone.is_aware(timestamp))
+    microseconds = (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+    return '{}.{}'.format(microseconds, obj_id)
+
+
+def decode_sync_cursor(cursor):
+    """
+    Decode delta sync cursor.
+
+    Parameters
+    ----------
+    cursor
+       Cursor string, empty value or '0' refers to the beginning of the data.
+
+    Returns
+    -------
+    tuple
+       (last modified timestamp, model ID), (None, None) for the beginning of the data.
+
+    Raises
+    ------
+    DataParsingError
+       Cursor is not valid.
+    """
+    if not cursor or cursor == '0':
+        return None, None
+
+    try:
+        microseconds, obj_id = [int(item) for item in cursor.split('.')]
+        return _sync_epoch(settings.USE_TZ) + datetime.timedelta(microseconds=microseconds), obj_id
+    except (ValueError, OverflowError):
+        raise DataParsingError('Invalid sync cursor {}'.format(cursor))
+
+
 class SearchMixin(object):
     """
     This will be subclassed by both the Object Manager and the QuerySet. By doing it this way,
@@ -201,6 +256,28 @@ class BaseManager(models.Manager, SearchMixin):
 
         return select, prefetch, iteration
 
+    def get_dependency_models(self):
+        """
+        Determine models that the manager's queries depend on. This includes the manager's model and
+        all models reachable via the select_related and prefetch_related plan of the model.
+
+        Returns
+        -------
+        list
+           Model classes.
+        """
+        select, prefetch, iteration = self.get_sql_select_fields(self.model, 0)
+
+        dependencies = [self.model]
+        for path in select + prefetch:
+            model = self.model
+            for name in path.split('__'):
+                model = get_related_model(model._meta.get_field(name))
+                if model not in dependencies:
+                    dependencies.append(model)
+
+        return dependencies
+
     def get_data_listing(self, kwargs):
         """Return queryset containing all model items."""
         iteration = 0
@@ -217,6 +294,80 @@ class BaseManager(models.Manager, SearchMixin):
 
         return query.order_by('id')
 
+    def get_data_changes(self, cursor, limit=500, lag=None):
+        """
+        Return model items changed after the specified delta sync cursor. Items are ordered by
+        (last_modified, id) and the returned cursor points to the last reported change so the
+        cursor only moves forward. Items that are no longer active (e.g. deleted via deactivate())
+        are reported as tombstones.
+
+        The last modified time is assigned when item is saved, not when the transaction commits,
+        so changes committed later may appear behind the position of already reported changes.
+        The cursor is therefore never advanced past the sync lag window (now - lag) and changes
+        within the window are reported again on the next call until they are older than the
+        window. Clients must thus apply the changes idempotently. The lag must exceed the duration
+        of the longest write transaction and the clock difference between application servers.
+
+        Parameters
+        ----------
+        cursor
+           Delta sync cursor from previous call, empty value for all items.
+        limit
+           Maximum number of changes to return.
+        lag
+           Sync lag window in seconds, as defined by DRAALCORE_SYNC_LAG setting by default.
+
+        Returns
+        -------
+        dict
+           'items' (queryset of changed active items), 'deleted' (IDs of removed items),
+           'cursor' (cursor for the next call) and 'more' (True if more changes are available).
+
+        Raises
+        ------
+        ModelManagerError
+           Model does not support delta sync.
+        """
+        if not hasattr(self.model, 'last_modified') or not hasattr(self.model, 'STATUS_ACTIVE'):
+            raise ModelManagerError('Delta sync not supported for {}'.format(self.model._meta.db_table))
+
+        timestamp, obj_id = decode_sync_cursor(cursor)
+
+        # Changes older than this are assumed to be committed
+        lag = getattr(settings, 'DRAALCORE_SYNC_LAG', 60) if lag is None else lag
+        horizon = timezone.now() - datetime.timedelta(seconds=lag)
+
+        # Base manager includes also non-active items
+        query = self.model._base_manager.db_manager(self.db).all()
+        if timestamp is not None:
+            query = query.filter(Q(last_modified__gt=timestamp) | Q(last_modified=timestamp, id__gt=obj_id))
+
+        fields = ['id', 'last_modified', 'status']
+        changes = list(query.order_by('last_modified', 'id').values_list(*fields)[:limit + 1])
+        more = len(changes) > limit
+        changes = changes[:limit]
+
+        next_cursor = cursor or '0'
+        if changes and changes[-1][1] <= horizon:
+            next_cursor = encode_sync_cursor(changes[-1][1], changes[-1][0])
+        elif changes:
+            # Changes within the lag window are reported again, remaining changes become
+            # available once they are older than the window
+            more = False
+            if timestamp is None or horizon > timestamp:
+                next_cursor = encode_sync_cursor(horizon, 0)
+
+        active_ids = [item[0] for item in changes if item[2] == self.model.STATUS_ACTIVE]
+        select, prefetch, iteration = self.get_sql_select_fields(self.model, 0)
+        items = self.select_related(*select).prefetch_related(*prefetch).filter(id__in=active_ids)
+
+        return {
+            'items': items.order_by('last_modified', 'id'),
+            'deleted': [item[0] for item in changes if item[2] != self.model.STATUS_ACTIVE],
+            'cursor': next_cursor,
+            'more': more
+        }
+
     def get_model(self, model_kwargs, model=None, only_fields=[]):
         """
         Get model object for specified data.
@@ -386,6 +537,517 @@ class BaseManager(models.Manager, SearchMixin):
 
         return model_obj
 
+    def import_data(self, rows, chunk_size=1000, max_errors=1000):
+        """
+        Bulk create model items. Rows are validated against the model field rules (as in create_model)
+        and inserted chunk by chunk using bulk_create. Model save() is not called for the created items,
+        instead single history event summarizing the created items is recorded per chunk.
+
+        Parameters
+        ----------
+        rows
+           Iterable of (row number, field values) tuples. Field values may also be DataParsingError
+           instance when the row could not be parsed.
+        chunk_size
+           Number of rows to validate and insert at a time.
+        max_errors
+           Maximum number of row errors to report.
+
+        Returns
+        -------
+        dict
+           'created' (number of created items), 'failed' (number of rejected rows) and
+           'errors' (list of row errors, each containing 'row' and 'errors' items).
+        """
+        fields = [field for field in AppModelFieldParserIterator.create(self.model._meta) if field.ui_field]
+
+        result = {'created': 0, 'failed': 0, 'errors': []}
+
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                self._import_chunk(fields, chunk, result, max_errors)
+                chunk = []
+
+        if chunk:
+            self._import_chunk(fields, chunk, result, max_errors)
+
+        return result
+
+    def _validate_bulk_row(self, fields, values):
+        """Validate row data, returns (field values, related field values, errors)."""
+        if isinstance(values, DataParsingError):
+            return None, None, [str(values)]
+
+        if not isinstance(values, dict):
+            return None, None, ['Row data must be an object']
+
+        params = {}
+        related = {}
+        errors = []
+        for field in fields:
+            if field.name not in values:
+                if field.mandatory:
+                    errors.append('Data field {} is required'.format(field.name))
+                continue
+
+            value = values[field.name]
+            try:
+                field.validate_type(field.name, value)
+            except DataParsingError as e:
+                errors.append(str(e))
+                continue
+
+            if field.related:
+                related[field.name] = list(set(value or []))
+            else:
+                params[field.name] = value
+
+        return params, related, errors
+
+    def _existing_ids(self, model, ids, batch_size=500):
+        """Return those IDs from the input that exist for specified model."""
+        ids = list(ids)
+        existing = set()
+        for index in range(0, len(ids), batch_size):
+            query = model.objects.using(self.db).filter(id__in=ids[index:index + batch_size])
+            existing.update(query.values_list('id', flat=True))
+
+        return existing
+
+    def _import_chunk(self, fields, chunk, result, max_errors):
+        """Validate and insert chunk of import rows."""
+
+        def add_error(row, errors):
+            result['failed'] += 1
+            if len(result['errors']) < max_errors:
+                result['errors'].append({'row': row, 'errors': errors})
+
+        valid = []
+        for row, values in chunk:
+            params, related, errors = self._validate_bulk_row(fields, values)
+            if errors:
+                add_error(row, errors)
+            else:
+                valid.append((row, params, related))
+
+        # Referenced model items are validated using single query per field
+        ref_fields = [field for field in fields if field.fk or field.related]
+        existing = {}
+        for field in ref_fields:
+            ids = set()
+            for row, params, related in valid:
+                value = related.get(field.name) if field.related else params.get(field.name)
+                if value is not None:
+                    ids.update(value if field.related else [value])
+
+            existing[field.name] = self._existing_ids(field.related_model, ids)
+
+        objs = []
+        links = []
+        for row, params, related in valid:
+            errors = []
+            for field in ref_fields:
+                value = related.get(field.name) if field.related else params.get(field.name)
+                if value is None:
+                    continue
+
+                for item in (value if field.related else [value]):
+                    if item not in existing[field.name]:
+                        errors.append('ID {} does not exist for field {}'.format(item, field.name))
+
+                if field.fk:
+                    params[field.attname] = params.pop(field.name)
+
+            if errors:
+                add_error(row, errors)
+            else:
+                objs.append(self.model(**params))
+                links.append(related)
+
+        if not objs:
+            return
+
+        user = get_current_user()
+        log_event = hasattr(self.model, 'create_model_event') and user is not None and user.pk
+
+        with transaction.atomic(using=self.db):
+            self._bulk_insert(objs, any(links) or log_event)
+
+            related_models = set()
+            for field in fields:
+                if field.related:
+                    if self._bulk_link(field.name, objs, [item.get(field.name) for item in links]):
+                        related_models.add(field.related_model)
+
+            if log_event:
+                event = {
+                    'import': {
+                        'title': 'Imported items',
+                        'data': [str(obj.pk) for obj in objs]
+                    }
+                }
+                self.model.create_model_event(user, event, 'Import of {} items'.format(len(objs)))
+
+            publish_bulk_change(self.model, objs, CHANGE_CREATE, self.db)
+
+        # Cached results are invalidated explicitly as bulk operations do not send model signals
+        transaction.on_commit(lambda: invalidate_tags(self.model, *related_models), using=self.db)
+
+        result['created'] += len(objs)
+
+    def _bulk_insert(self, objs, need_pks):
+        """
+        Insert model objects in bulk, primary keys are assigned to objects if requested. Model signals
+        are not sent. Must be called within transaction.
+
+        Backends that cannot return the primary keys of bulk inserted rows: SQLite assigns increasing
+        keys to inserted rows and keeps the database locked for other writers until the transaction
+        commits, so the keys are read back after the insert. Other backends (e.g. MySQL) insert row by row.
+        """
+        manager = self.model._base_manager.db_manager(self.db)
+        connection = connections[self.db]
+        auto_field = self.model._meta.auto_field
+        missing = [obj for obj in objs if obj.pk is None] if need_pks and auto_field else []
+
+        if not missing or connection.features.can_return_rows_from_bulk_insert:
+            manager.bulk_create(objs)
+            return
+
+        manager.bulk_create([obj for obj in objs if obj.pk is not None])
+
+        if connection.vendor == 'sqlite':
+            manager.bulk_create(missing)
+            ids = manager.order_by('-pk').values_list('pk', flat=True)[:len(missing)]
+            for obj, pk in zip(missing, reversed(ids)):
+                obj.pk = pk
+            return
+
+        fields = [field for field in self.model._meta.concrete_fields if field is not auto_field]
+        for obj in missing:
+            obj.pk = manager._insert([obj], fields=fields, returning_fields=[auto_field], using=self.db)[0][0]
+            obj._state.adding = False
+            obj._state.db = self.db
+
+    def _through_fields(self, field_name):
+        """Return (through model, source ID field name, target ID field name) for many-to-many field."""
+        field = self.model._meta.get_field(field_name)
+        through = field.remote_field.through
+        source = through._meta.get_field(field.m2m_field_name()).attname
+        target = through._meta.get_field(field.m2m_reverse_field_name()).attname
+        return through, source, target
+
+    def _bulk_link(self, field_name, objs, values):
+        """Create many-to-many through model rows for inserted objects, returns True if any rows were created."""
+        through, source, target = self._through_fields(field_name)
+
+        rows = []
+        for obj, ids in zip(objs, values):
+            for item in ids or []:
+                rows.append(through(**{source: obj.pk, target: item}))
+
+        through.objects.using(self.db).bulk_create(rows)
+        return len(rows) > 0
+
+    def upsert_many(self, records, key_fields, chunk_size=1000):
+        """
+        Create or update model items identified by natural key fields. Existing items (including
+        non-active items) are fetched using single query per chunk, new items are inserted using bulk_create and changed items are updated
+        using bulk_update. Model save() is not called, instead the history events of created and changed
+        items are created in bulk (for models logging events). Either all records are stored or none.
+
+        Parameters
+        ----------
+        records
+           Iterable of model field values (as in create_model). Many-to-many field values replace
+           the current values. Later record overrides earlier record with the same key.
+        key_fields
+           Names of the fields that identify the model item.
+        chunk_size
+           Number of records to process at a time.
+
+        Returns
+        -------
+        dict
+           Number of 'created', 'updated' and 'unchanged' items.
+
+        Raises
+        ------
+        ModelManagerError
+           Key fields are not valid for the model.
+        DataParsingError
+           Record validation failed.
+        """
+        key_fields = [self._key_field(name) for name in key_fields]
+        if not key_fields:
+            raise ModelManagerError('Key fields missing for {}'.format(self.model._meta.db_table))
+
+        model_fields = list(AppModelFieldParserIterator.create(self.model._meta))
+        fields = [field for field in model_fields if field.ui_field]
+
+        # Key fields that are not UI fields are validated separately
+        key_names = set([field.name for field in key_fields])
+        key_items = [field for field in model_fields if field.name in key_names and not field.ui_field]
+
+        counts = {'created': 0, 'updated': 0, 'unchanged': 0}
+        with transaction.atomic(using=self.db):
+            chunk = []
+            for index, record in enumerate(records):
+                chunk.append((index, record))
+                if len(chunk) >= chunk_size:
+                    self._upsert_chunk(fields, key_fields, key_items, chunk, counts)
+                    chunk = []
+
+            if chunk:
+                self._upsert_chunk(fields, key_fields, key_items, chunk, counts)
+
+        return counts
+
+    def _key_field(self, name):
+        try:
+            field = self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            field = None
+
+        if field is None or field.many_to_many or not field.concrete:
+            raise ModelManagerError('Invalid key field {} for {}'.format(name, self.model._meta.db_table))
+
+        return field
+
+    @staticmethod
+    def _validate_key_value(field, value):
+        """Validate value of key field that is not UI field, returns the value to be stored."""
+        if field.type is not None:
+            field.validate_type(field.name, value)
+            return value
+
+        try:
+            return field.to_python(value)
+        except ValidationError as e:
+            raise DataParsingError("Data field '{}' is not valid: {}".format(field.name, ' '.join(e.messages)))
+
+    @staticmethod
+    def _record_key(key_fields, params):
+        key = []
+        for field in key_fields:
+            value = params[field.name] if field.name in params else params[field.attname]
+            key.append(value.pk if isinstance(value, models.Model) else value)
+
+        return tuple(key)
+
+    def _fetch_in_bulk(self, model, ids, batch_size=500):
+        """Return model objects for specified IDs as dict."""
+        ids = list(ids)
+        objs = {}
+        for index in range(0, len(ids), batch_size):
+            objs.update(model.objects.using(self.db).in_bulk(ids[index:index + batch_size]))
+
+        return objs
+
+    def _upsert_records(self, fields, key_fields, key_items, chunk):
+        """Validate records and map references to model objects, returns records keyed by natural key."""
+        rows = []
+        errors = []
+        for index, record in chunk:
+            params, related, row_errors = self._validate_bulk_row(fields, record)
+            if not row_errors:
+                for field in key_fields:
+                    if field.name not in record:
+                        row_errors.append('Key field {} is required'.format(field.name))
+
+                for field in key_items:
+                    if field.name in record:
+                        try:
+                            params[field.attname] = self._validate_key_value(field, record[field.name])
+                        except DataParsingError as e:
+                            row_errors.append(str(e))
+
+            if row_errors:
+                errors.append('Record {}: {}'.format(index, ', '.join(row_errors)))
+            else:
+                rows.append((index, params, related))
+
+        # Referenced model items are fetched using single query per referenced model
+        ref_fields = [field for field in fields if field.fk or field.related]
+        ref_ids = {}
+        for field in ref_fields:
+            ids = ref_ids.setdefault(field.related_model, set())
+            for index, params, related in rows:
+                value = related.get(field.name) if field.related else params.get(field.name)
+                if value is not None:
+                    ids.update(value if field.related else [value])
+
+        ref_objs = {model: self._fetch_in_bulk(model, ids) if ids else {} for model, ids in ref_ids.items()}
+        refs = {field.name: ref_objs[field.related_model] for field in ref_fields}
+
+        items = {}
+        for index, params, related in rows:
+            row_errors = []
+            for field in ref_fields:
+                target = related if field.related else params
+                if target.get(field.name) is None:
+                    continue
+
+                objs = []
+                for item in (target[field.name] if field.related else [target[field.name]]):
+                    if item in refs[field.name]:
+                        objs.append(refs[field.name][item])
+                    else:
+                        row_errors.append('ID {} does not exist for field {}'.format(item, field.name))
+
+                target[field.name] = objs if field.related else objs[0] if objs else None
+
+            if row_errors:
+                errors.append('Record {}: {}'.format(index, ', '.join(row_errors)))
+                continue
+
+            key = self._record_key(key_fields, params)
+            if key in items:
+                items[key][0].update(params)
+                items[key][1].update(related)
+            else:
+                items[key] = (params, related)
+
+        if errors:
+            raise DataParsingError('; '.join(errors))
+
+        return items
+
+    def _upsert_chunk(self, fields, key_fields, key_items, chunk, counts):
+        """Create and update model items for chunk of records."""
+        items = self._upsert_records(fields, key_fields, key_items, chunk)
+
+        # Existing items, single query
+        fk_names = [field.name for field in fields if field.fk]
+        query = self.model._base_manager.db_manager(self.db).select_related(*fk_names)
+        if len(key_fields) == 1:
+            query = query.filter(**{key_fields[0].attname + '__in': [key[0] for key in items]})
+        else:
+            q = Q()
+            for key in items:
+                q |= Q(**{field.attname: value for field, value in zip(key_fields, key)})
+            query = query.filter(q)
+
+        existing = {tuple(getattr(obj, field.attname) for field in key_fields): obj for obj in query}
+
+        # Current many-to-many values of the existing items
+        related_names = set()
+        for params, related in items.values():
+            related_names.update(related.keys())
+
+        links = {}
+        for name in related_names:
+            through, source, target = self._through_fields(name)
+            links[name] = {}
+            obj_ids = [obj.pk for obj in existing.values()]
+            for index in range(0, len(obj_ids), 500):
+                query = through.objects.using(self.db).filter(**{source + '__in': obj_ids[index:index + 500]})
+                for row_id, obj_id, target_id in query.values_list('pk', source, target):
+                    links[name].setdefault(obj_id, {})[target_id] = row_id
+
+        created = []
+        updated = []
+        update_fields = set()
+        link_rows = []
+        unlink_rows = []
+        for key, (params, related) in items.items():
+            obj = existing.get(key)
+            if obj is None:
+                created.append((self.model(**params), related))
+                continue
+
+            changed = {}
+            for name, value in params.items():
+                old_value = getattr(obj, name)
+                if old_value != value:
+                    changed[name] = old_value
+                    setattr(obj, name, value)
+
+            related_changed = {}
+            for name, value in related.items():
+                current = links[name].get(obj.pk, {})
+                new_ids = set([item.pk for item in value or []])
+                if new_ids != set(current.keys()):
+                    related_changed[name] = value or []
+                    unlink_rows.extend([(name, row_id) for target_id, row_id in current.items() if target_id not in new_ids])
+                    link_rows.extend([(name, obj, target_id) for target_id in new_ids if target_id not in current])
+
+            if changed or related_changed:
+                update_fields.update(changed.keys())
+                updated.append((obj, changed, related_changed))
+            else:
+                counts['unchanged'] += 1
+
+        if hasattr(self.model, 'last_modified') and updated:
+            now = timezone.now()
+            for obj, changed, related_changed in updated:
+                obj.last_modified = now
+                if hasattr(obj, 'editing_user'):
+                    obj.modified_by = obj.editing_user
+            update_fields.add('last_modified')
+
+            if hasattr(self.model, 'modified_by'):
+                update_fields.add('modified_by')
+
+        # Store the data
+        objs = [obj for obj, related in created]
+        if objs:
+            self._bulk_insert(objs, True)
+            for name in related_names:
+                values = [[item.pk for item in related.get(name) or []] for obj, related in created]
+                self._bulk_link(name, objs, values)
+
+        if update_fields:
+            self.model._base_manager.db_manager(self.db).bulk_update([item[0] for item in updated], sorted(update_fields))
+
+        for name in related_names:
+            through, source, target = self._through_fields(name)
+            row_ids = [row_id for field_name, row_id in unlink_rows if field_name == name]
+            if row_ids:
+                through.objects.using(self.db).filter(pk__in=row_ids).delete()
+
+            rows = [through(**{source: obj.pk, target: target_id}) for field_name, obj, target_id in link_rows if field_name == name]
+            through.objects.using(self.db).bulk_create(rows)
+
+        self._upsert_events(created, updated)
+        publish_bulk_change(self.model, objs, CHANGE_CREATE, self.db)
+        publish_bulk_change(self.model, [item[0] for item in updated], CHANGE_EDIT, self.db)
+
+        models_cls = [self.model] + [self.model._meta.get_field(name).related_model for name in related_names]
+        transaction.on_commit(lambda: invalidate_tags(*models_cls), using=self.db)
+
+        counts['created'] += len(created)
+        counts['updated'] += len(updated)
+
+    def _upsert_events(self, created, updated):
+        """Create history events of created and updated model items in bulk."""
+        user = get_current_user()
+        if not hasattr(self.model, 'model_changes') or user is None or not user.pk:
+            return
+
+        entries = []
+        for obj, related in created:
+            changes = obj.model_changes({field.name: getattr(obj, field.name) for field in obj._meta.fields}, True)
+            if changes:
+                entries.append(obj.event_entry(user, changes))
+
+            for name, value in related.items():
+                if value:
+                    entries.append(obj.event_entry(user, obj.related_event(name, value)))
+
+        for obj, changed, related_changed in updated:
+            changes = obj.model_changes(changed)
+            if changes:
+                entries.append(obj.event_entry(user, changes))
+
+            for name, value in related_changed.items():
+                entries.append(obj.event_entry(user, 'Clear data from field {}'.format(name)))
+                if value:
+                    entries.append(obj.event_entry(user, obj.related_event(name, value)))
+
+        event_buffer.add(*entries)
+
     def history(self, model_id):
         """
         Return history for specified model ID.
@@ -397,12 +1059,100 @@ class BaseManager(models.Manager, SearchMixin):
 
         Returns
         -------
-        QuerySet | list
-           History as queryset or empty list if no history items found.
+        QuerySet | MergedHistory | list
+           History as queryset (or merged history if model item has archived events) or empty list
+           if no history items found.
+        """
+        obj = self.filter(id=model_id).first()
+        return obj.get_history() if obj and hasattr(obj, 'get_history') else []
+
+    def history_batch(self, model_ids, limit, before=None):
+        """
+        Return latest history events of several model items. Events are fetched using single
+        query for all model items, archived events are included for model items whose hot
+        events do not fill the limit.
+
+        Parameters
+        ----------
+        model_ids : list
+           Model IDs.
+        limit : int
+           Maximum number of events per model item.
+        before : dict
+           Cursors keyed by model ID, only events with ID less than the cursor are returned for the model item.
+           Use value of 'next' as cursor to get the next events of the model item.
+
+        Returns
+        -------
+        dict
+           Keyed by model ID (only existing model items are included) with 'events' (latest event first)
+           and 'next' (cursor for the next events, None if no more events available) keys.
+        """
+        if not hasattr(self.model, 'get_history'):
+            raise ModelManagerError('No history available for {}'.format(self.model._meta.db_table))
+
+        if limit < 1:
+            raise ModelManagerError('Invalid history limit {}'.format(limit))
+
+        ids = list(self.filter(id__in=model_ids).values_list('id', flat=True))
+        if not ids:
+            return {}
+
+        # One extra event per model item tells whether there are more events available
+        content_type = ContentType.objects.get_for_model(self.model)
+        events = {model_id: [] for model_id in ids}
+        for item in history_events_batch(content_type.id, ids, limit + 1, before):
+            events[int(item.object_id)].append(item)
+
+        counts = {model_id: limit + 1 - len(items) for model_id, items in events.items() if len(items) <= limit}
+        for model_id, items in archived_events_batch(content_type.id, counts, before).items():
+            events[model_id].extend(items)
+
+        return {
+            model_id: {
+                'events': items[:limit],
+                'next': items[limit - 1].id if len(items) > limit else None
+            } for model_id, items in events.items()
+        }
+
+    def _history_item(self, model_id):
+        obj = self.filter(id=model_id).first()
+        if obj is None or not hasattr(obj, 'get_events'):
+            raise ModelManagerError('No history available for ID {} of {}'.format(model_id, self.model._meta.db_table))
+        return obj
+
+    def as_of(self, model_id, timestamp):
         """
-        data = []
-        obj = self.filter(id=model_id)
-        if obj and hasattr(obj[0], 'get_events'):
-            data = obj[0].get_events()
+        Return state of model item at specified point in time. The state is rebuilt from the
+        nearest preceding history snapshot and the history events after it.
 
-        return data
+        Parameters
+        ----------
+        model_id
+           Model ID.
+        timestamp : datetime
+           Point in time.
+
+        Returns
+        -------
+        dict
+           Field values (as recorded by history events) keyed by field name or None if model item
+           did not exist at specified time.
+        """
+        return state_as_of(self._history_item(model_id), timestamp)
+
+    def history_snapshot(self, model_id):
+        """
+        Write history snapshot of model item's current state, e.g., before archiving its history.
+
+        Parameters
+        ----------
+        model_id
+           Model ID.
+
+        Returns
+        -------
+        dict
+           Current field values keyed by field name.
+        """
+        return create_snapshot(self._history_item(model_id))
@@ -3,19 +3,23 @@
 """Base model(s)"""
 
 # System imports
-import json
 import logging
-from copy import copy
+from copy import deepcopy
 from django.utils import timezone
 from django.db import models, connection
+from django.db.models import DEFERRED
 from django.contrib.auth.models import User, AnonymousUser
 from django.utils.encoding import force_text
 from django.urls import reverse
 from django.contrib.contenttypes.models import ContentType
-from django.contrib.admin.models import ADDITION, LogEntry
+from django.contrib.admin.models import ADDITION
 
 # Project imports
 from draalcore.models.base_manager import BaseManager
+from draalcore.models.event_buffer import event_buffer
+from draalcore.models.archive import merged_history
+from draalcore.models.models import history_entry, history_events
+from draalcore.models.changes import publish_change, CHANGE_CREATE, CHANGE_EDIT, CHANGE_DELETE
 from draalcore.middleware.current_user import get_current_user
 from draalcore.models.fields import AppModelFieldParser, AppModelCharField
 
@@ -279,6 +283,10 @@ class BaseDetails(BaseModel):
     class Meta:
         abstract = True
 
+        # Delta sync (changes since cursor) queries are ordered by these fields. Concrete
+        # models defining their own Meta should inherit from this Meta to get the index.
+        indexes = [models.Index(fields=['last_modified', 'id'])]
+
     def save(self, *args, **kwargs):
 
         # Who is making the changes
@@ -306,40 +314,65 @@ class BaseDetails(BaseModel):
 
 
 class EventHandlingMixin(object):
-    """Write and read model events using Django's LogEntry."""
+    """
+    Write and read model events. Events are stored to Django's LogEntry or to HistoryEvent
+    as defined by DRAALCORE_HISTORY_STORE setting.
+    """
 
     def create_related_event(self, field, event_item):
         """Create related event to model history."""
 
         if isinstance(event_item, list):
-            event = {
-                field: {
-                    'title': 'New values',
-                    'data': [str(item) for item in event_item]
-                }
+            self.create_event(get_current_user(), self.related_event(field, event_item))
+
+    @staticmethod
+    def related_event(field, event_item):
+        """Return event message for new values of related field."""
+        return {
+            field: {
+                'title': 'New values',
+                'data': [str(item) for item in event_item]
             }
-            self.create_event(get_current_user(), event)
+        }
 
     def create_event(self, user, events, action=ADDITION):
         """Create change or event message related to model."""
+        event_buffer.add(self.event_entry(user, events, action))
+
+    def event_entry(self, user, events, action=ADDITION):
+        """Return unsaved change or event message related to model, e.g., for bulk creation of events."""
         if not isinstance(events, list):
             events = [events]
 
-        change_history = json.dumps(events)
-        content_type = self.content_type
-        LogEntry.objects.log_action(user_id=user.id,
-                                    content_type_id=content_type.id,
-                                    object_id=self.pk,
-                                    object_repr=force_text(self),
-                                    action_flag=action,
-                                    change_message=change_history)
+        return history_entry(user, self.content_type.id, self.pk, force_text(self), events, action)
+
+    @classmethod
+    def create_model_event(cls, user, events, object_repr, action=ADDITION):
+        """Create event related to model class instead of single model item, e.g., bulk operations."""
+        if not isinstance(events, list):
+            events = [events]
+
+        content_type = ContentType.objects.get_for_model(cls)
+        event_buffer.add(history_entry(user, content_type.id, None, object_repr, events, action))
 
     def get_events(self):
         """Return the model changes/events as queryset."""
-        content_type = self.content_type
-        query = LogEntry.objects.filter(object_id=self.pk, content_type_id=content_type.id, change_message__gt=0)
-        query = query.select_related('user')
-        return query.order_by('id').reverse()
+        return history_events(self.content_type.id, self.pk)
+
+    def get_history(self):
+        """Return the model changes/events including archived events, latest event first."""
+        return merged_history(self.get_events(), self.content_type.id, self.pk)
+
+
+# Value types that can be modified in place, such values are copied for dirty tracking
+MUTABLE_VALUE_TYPES = (dict, list, set, bytearray)
+
+
+def _reference_values(values):
+    """Return field values for dirty tracking, mutable values are copied."""
+    if any(isinstance(value, MUTABLE_VALUE_TYPES) for value in values):
+        return tuple(deepcopy(value) if isinstance(value, MUTABLE_VALUE_TYPES) else value for value in values)
+    return values
 
 
 class ModelLogger(EventHandlingMixin, BaseDetails):
@@ -354,30 +387,109 @@ class ModelLogger(EventHandlingMixin, BaseDetails):
     # Anonymous user is allowed to access model data
     ANONYMOUS_ALLOWED = False
 
-    class Meta:
+    # Model changes are published to change notification broker
+    CHANGE_NOTIFICATIONS = True
+
+    class Meta(BaseDetails.Meta):
         abstract = True
 
     def __init__(self, *args, **kwargs):
 
-        editing_user = None
-        if 'editing_user' in kwargs:
-            editing_user = kwargs['editing_user']
-            del kwargs['editing_user']
+        editing_user = kwargs.pop('editing_user', None)
+
+        # Model item loaded from DB (field values as positional arguments only) skips the
+        # change tracking setup, it is needed only if the item is modified
+        loaded = args and not kwargs and editing_user is None
 
         super(ModelLogger, self).__init__(*args, **kwargs)
 
-        user = editing_user if editing_user else get_current_user()
+        if not loaded:
+            self.editing_user = editing_user if editing_user else self._current_editor()
+
+    @classmethod
+    def field_names(cls):
+        """Return names of model fields, determined once per model class."""
+        names = cls.__dict__.get('_field_names')
+        if names is None:
+            names = tuple(field.name for field in cls._meta.fields)
+            cls._field_names = names
+        return names
+
+    @classmethod
+    def _pre_save_fields(cls):
+        """
+        Return names of the fields whose value is populated on save (e.g. auto_now timestamps), determined
+        once per model class. These are always saved together with the changed fields.
+        """
+        names = cls.__dict__.get('_pre_save_field_names')
+        if names is None:
+            names = []
+            for field in cls._meta.concrete_fields:
+                if isinstance(field, models.DateField):
+                    populated = field.auto_now
+                else:
+                    populated = type(field).pre_save is not models.Field.pre_save
+
+                if populated and not field.primary_key:
+                    names.append(field.name)
+
+            names = cls._pre_save_field_names = tuple(names)
+        return names
+
+    @classmethod
+    def _save_fields(cls, names):
+        """Return names of the fields to be saved, fields populated on save are included."""
+        names = list(names)
+        return names + [name for name in cls._pre_save_fields() if name not in names]
+
+    @classmethod
+    def _attname_fields(cls):
+        """Return concrete model fields keyed by attribute name, determined once per model class."""
+        fields = cls.__dict__.get('_fields_by_attname')
+        if fields is None:
+            fields = {field.attname: field for field in cls._meta.concrete_fields}
+            cls._fields_by_attname = fields
+        return fields
+
+    def _current_editor(self):
+        user = get_current_user()
         if self.ANONYMOUS_ALLOWED:
             user = user if not isinstance(user, AnonymousUser) else None
+        return user
+
+    @property
+    def editing_user(self):
+        """User responsible for the changes, recorded as modifier of the model item."""
+        # Model item loaded from DB resolves the user on first access, modifier assigned
+        # after loading is kept as the editing user
+        if '_editing_user' not in self.__dict__:
+            if self._modifier_assigned():
+                self._editing_user = self.modified_by
+            else:
+                self.editing_user = self._current_editor()
+        return self._editing_user
+
+    @editing_user.setter
+    def editing_user(self, user):
+        self._editing_user = user
         self.modified_by = user
 
-        self._changed_fields = {}
+    def _modifier_assigned(self):
+        """Return True if modifier of model item loaded from DB has been assigned after loading."""
+        db_values = self.__dict__.get('_db_values')
+        if db_values is None or 'modified_by_id' not in self.__dict__:
+            return False
 
-        self._fields = [field.name for field in self._meta.fields]
+        index = list(self._attname_fields()).index('modified_by_id')
+        return self.__dict__['modified_by_id'] != db_values[index]
 
     @property
     def changed_fields(self):
-        return self._changed_fields
+        """Previous values of the changed fields, keyed by field name."""
+        changed = self.__dict__.get('_changed_fields')
+        if changed is None:
+            changed = self._changed_fields = {}
+        return changed
 
     def is_tracked_field(self, field):
         """Return True if specified field should be event tracked, False otherwise."""
@@ -387,64 +499,166 @@ class ModelLogger(EventHandlingMixin, BaseDetails):
 
         return is_tracked
 
+    def model_changes(self, changed_fields, created=False):
+        """
+        Determine change message for each tracked field that has changed.
+
+        Parameters
+        ----------
+        changed_fields : dict
+           Previous values of the changed fields, keyed by field name.
+        created
+           True if model was created.
+
+        Returns
+        -------
+        dict
+           Change messages keyed by field name.
+        """
+        changes = {}
+        for key, value in changed_fields.items():
+            if self.is_tracked_field(key):
+                if value is not ModelFieldDoesNotExist:
+                    if created:
+                        changes[key] = ['Created value ' + force_text(value)]
+                    else:
+                        changes[key] = [force_text(value), force_text(getattr(self, key))]
+
+        return changes
+
     def _save_model_changes(self, changed_fields, created=False):
         """Save changes made to model data as separate DB entry."""
 
         if isinstance(changed_fields, dict):
-            # Determine change message for each field that has changed
-            changes = {}
-            for key, value in changed_fields.items():
-                if self.is_tracked_field(key):
-                    if value is not ModelFieldDoesNotExist:
-                        if created:
-                            changes[key] = ['Created value ' + force_text(value)]
-                        else:
-                            changes[key] = [force_text(value), force_text(getattr(self, key))]
-
-            # Save the model changes and reset change object
+            changes = self.model_changes(changed_fields, created)
+
+            # Save the model changes
             if changes:
                 self.create_event(self.modified_by, changes)
-                self._changed_fields = {}
+
+        # Reset change object
+        self.__dict__.pop('_changed_fields', None)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        obj = super(ModelLogger, cls).from_db(db, field_names, values)
+
+        # Loaded values are the reference for dirty tracking, only mutable values are copied so that
+        # in place modifications are detected. Values are aligned with the concrete fields, deferred
+        # fields are marked as such.
+        if len(values) != len(cls._meta.concrete_fields):
+            values_iter = iter(values)
+            values = [next(values_iter) if field.attname in field_names else DEFERRED for field in cls._meta.concrete_fields]
+
+        obj._db_values = _reference_values(values)
+        return obj
+
+    def _take_snapshot(self):
+        """Use current field values as reference for dirty tracking."""
+        state = self.__dict__
+        self._db_values = _reference_values(tuple(state.get(name, DEFERRED) for name in self._attname_fields()))
+
+    def refresh_from_db(self, *args, **kwargs):
+        super(ModelLogger, self).refresh_from_db(*args, **kwargs)
+        self._take_snapshot()
+
+    def dirty_fields(self):
+        """
+        Return fields whose values differ from the values loaded from (or last saved to) DB.
+
+        Returns
+        -------
+        dict | None
+           Previous values keyed by field attribute name or None if model item has no DB reference values.
+        """
+        db_values = self.__dict__.get('_db_values')
+        if db_values is None:
+            return None
+
+        state = self.__dict__
+        dirty = {}
+        for name, value in zip(self._attname_fields(), db_values):
+            if name in state:
+                if value is DEFERRED:
+                    # Deferred field that has been assigned after loading
+                    dirty[name] = ModelFieldDoesNotExist
+                elif state[name] != value:
+                    dirty[name] = value
+
+        return dirty
+
+    def _track_dirty_fields(self, dirty):
+        """Add dirty fields to changed fields, return names of the fields to be saved."""
+        changed_fields = self.changed_fields
+        fields = self._attname_fields()
+        for attname, value in dirty.items():
+            field = fields[attname]
+            if field.name not in changed_fields:
+                # Previous value of foreign key is recorded as object as when set via set_values()
+                if field.is_relation and value is not None and value is not ModelFieldDoesNotExist:
+                    value = field.related_model._base_manager.using(self._state.db).filter(pk=value).first()
+                changed_fields[field.name] = value
+
+        return list(changed_fields.keys())
 
     def set_values(self, **kwargs):
         """Update model data and save to DB."""
 
-        # Update data
-        updated_fields = []
-        for field in self._meta.fields:
-            if not field.primary_key and field.name in kwargs:
-                old_value = getattr(self, field.name, ModelFieldDoesNotExist)
-                if old_value != kwargs[field.name]:
-                    updated_fields.append(field.name)
-                    self._changed_fields[field.name] = copy(old_value)
-                    setattr(self, field.name, kwargs[field.name])
-
-        changed_fields = self._changed_fields
+        changed_fields = self.changed_fields
+        for name in self.field_names():
+            if name in kwargs and name != self._meta.pk.name:
+                old_value = getattr(self, name, ModelFieldDoesNotExist)
+                if old_value != kwargs[name]:
+                    changed_fields[name] = old_value
+                    setattr(self, name, kwargs[name])
 
         # Save data, if any updates
-        if updated_fields:
-            save_kwargs = {
-                'update_fields': updated_fields,
-                'modified_by': self.modified_by
-            }
-            self.save(**save_kwargs)
+        if changed_fields:
+            self.save(update_fields=self._save_fields(changed_fields.keys()), modified_by=self.editing_user)
 
         return changed_fields
 
     def save(self, *args, **kwargs):
-        """Save model and associated changes."""
+        """
+        Save model and associated changes. Only changed fields and fields populated on save (modifier
+        and timestamps) are saved when model item has been loaded from DB and no update fields are specified.
+        """
 
         # Need to know if model is being created or updated
         create_model = False
         if not self.pk:
             create_model = True
 
+        if not create_model and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            dirty = self.dirty_fields()
+            if dirty is not None:
+                kwargs['update_fields'] = self._save_fields(self._track_dirty_fields(dirty))
+
+        # Model item loaded from DB is saved using the current editing user
+        if 'modified_by' not in kwargs and '_editing_user' not in self.__dict__:
+            kwargs['modified_by'] = self.editing_user
+
         super(ModelLogger, self).save(*args, **kwargs)
+        self._take_snapshot()
 
         # If object is created for the first time, get the initial change values
         if create_model:
-            for field in self._meta.fields:
-                self._changed_fields[field.name] = getattr(self, field.name)
+            changed_fields = self.changed_fields
+            for name in self.field_names():
+                changed_fields[name] = getattr(self, name)
+
+        if self.CHANGE_NOTIFICATIONS:
+            publish_change(self, self._change_action(create_model))
 
         # Finally, save the model changes
         self._save_model_changes(self.changed_fields, create_model)
+
+    def _change_action(self, created):
+        """Return change notification type for saved model."""
+        if created:
+            return CHANGE_CREATE
+
+        if 'status' in self.changed_fields and self.status == self.STATUS_DELETED:
+            return CHANGE_DELETE
+
+        return CHANGE_EDIT
@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Model change notifications and brokers for distributing them"""
+
+# System imports
+import abc
+import time
+import logging
+import threading
+from collections import deque
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.base import BaseCache
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+# Project imports
+from draalcore.exceptions import AppException
+
+__author__ = "Juha Ojanpera"
+__copyright__ = "Copyright 2021"
+__email__ = "juha.ojanpera@gmail.com"
+__status__ = "Development"
+
+logger = logging.getLogger(__name__)
+
+CHANGE_CREATE = 'create'
+CHANGE_EDIT = 'edit'
+CHANGE_DELETE = 'delete'
+
+
+class BaseBroker(abc.ABC):
+    """
+    Base class for change notification brokers. Broker assigns increasing integer ID
+    to each event within a channel so that listeners can resume from the last received event.
+
+    Attributes
+    ----------
+    backlog
+       Number of events that are retained per channel for resuming.
+    """
+
+    def __init__(self, backlog=None):
+        self.backlog = backlog or getattr(settings, 'DRAALCORE_CHANGE_BACKLOG', 1000)
+
+    @abc.abstractmethod
+    def publish(self, channel, event):
+        """Publish event to channel, returns the event ID."""
+
+    @abc.abstractmethod
+    def last_id(self, channel):
+        """Return ID of the latest event in channel, 0 if no events published."""
+
+    @abc.abstractmethod
+    def read(self, channel, after_id):
+        """Return list of (event ID, event) tuples published after the specified ID."""
+
+    def wait(self, channel, after_id, timeout):
+        """Return events published after specified ID, waiting at most timeout seconds for new events."""
+        poll_interval = getattr(settings, 'DRAALCORE_CHANGE_POLL_INTERVAL', 0.5)
+        deadline = time.time() + timeout
+        while True:
+            events = self.read(channel, after_id)
+            remaining = deadline - time.time()
+            if events or remaining <= 0:
+                return events
+
+            time.sleep(min(poll_interval, remaining))
+
+
+class LocalBroker(BaseBroker):
+    """In-process broker, suitable for single worker process setups."""
+
+    def __init__(self, backlog=None):
+        super(LocalBroker, self).__init__(backlog)
+        self._channels = {}
+        self._counters = {}
+        self._condition = threading.Condition()
+
+    def publish(self, channel, event):
+        with self._condition:
+            event_id = self._counters.get(channel, 0) + 1
+            self._counters[channel] = event_id
+            self._channels.setdefault(channel, deque(maxlen=self.backlog)).append((event_id, event))
+            self._condition.notify_all()
+
+        return event_id
+
+    def last_id(self, channel):
+        return self._counters.get(channel, 0)
+
+    def read(self, channel, after_id):
+        with self._condition:
+            return [item for item in self._channels.get(channel, []) if item[0] > after_id]
+
+    def wait(self, channel, after_id, timeout):
+        deadline = time.time() + timeout
+        with self._condition:
+            while True:
+                events = self.read(channel, after_id)
+                remaining = deadline - time.time()
+                if events or remaining <= 0:
+                    return events
+
+                self._condition.wait(remaining)
+
+
+class CacheBroker(BaseBroker):
+    """
+    Broker that stores events to Django cache, suitable for multi-worker setups when
+    shared cache backend with atomic incr() (e.g. memcached or Redis) is used. Backends
+    that implement incr() as separate get and set (e.g. file based and database cache)
+    are not supported as concurrent publishers could get the same event ID. Listeners
+    poll the cache for new events.
+    """
+
+    KEY_PREFIX = 'draalcore_changes_'
+
+    def __init__(self, backlog=None, cache_backend=cache, timeout=3600):
+        super(CacheBroker, self).__init__(backlog)
+        # Default implementation of incr() is not atomic
+        if getattr(cache_backend.incr, '__func__', None) is BaseCache.incr:
+            raise AppException('Cache backend {} does not support atomic incr()'.format(cache_backend.__class__.__name__))
+
+        self._cache = cache_backend
+        self._timeout = timeout
+
+    def _counter_key(self, channel):
+        return '{}{}_counter'.format(self.KEY_PREFIX, channel)
+
+    def _event_key(self, channel, event_id):
+        return '{}{}_{}'.format(self.KEY_PREFIX, channel, event_id)
+
+    def publish(self, channel, event):
+        key = self._counter_key(channel)
+        self._cache.add(key, 0, None)
+        event_id = self._cache.incr(key)
+        self._cache.set(self._event_key(channel, event_id), event, self._timeout)
+        return event_id
+
+    def last_id(self, channel):
+        return self._cache.get(self._counter_key(channel), 0)
+
+    def read(self, channel, after_id):
+        last_id = self.last_id(channel)
+        first_id = max(after_id + 1, last_id - self.backlog + 1)
+        if first_id > last_id:
+            return []
+
+        ids = list(range(first_id, last_id + 1))
+        data = self._cache.get_many([self._event_key(channel, event_id) for event_id in ids])
+        events = []
+        for event_id in ids:
+            event = data.get(self._event_key(channel, event_id))
+            if event is not None:
+                events.append((event_id, event))
+
+        return events
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return broker instance as defined by DRAALCORE_CHANGE_BROKER setting (default LocalBroker)."""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(getattr(settings, 'DRAALCORE_CHANGE_BROKER', 'draalcore.models.changes.LocalBroker'))()
+
+    return _broker
+
+
+def change_channel(model):
+    """Return change notification channel name for model."""
+    return model._meta.label_lower
+
+
+def _publish_on_commit(channel, event, using=None):
+    def publish():
+        try:
+            get_broker().publish(channel, event)
+        except Exception:
+            logger.exception('Change notification for {} failed'.format(channel))
+
+    transaction.on_commit(publish, using=using)
+
+
+def publish_change(obj, action):
+    """
+    Publish change notification for model object. Notification is sent once the
+    current transaction is committed.
+
+    Parameters
+    ----------
+    obj
+       Model object.
+    action
+       Change type, one of CHANGE_CREATE, CHANGE_EDIT, CHANGE_DELETE.
+    """
+    last_modified = getattr(obj, 'last_modified', None)
+    event = {
+        'action': action,
+        'id': obj.pk,
+        'model': obj._meta.db_table,
+        'last_modified': last_modified.isoformat() if last_modified else None
+    }
+    _publish_on_commit(change_channel(obj.__class__), event, obj._state.db)
+
+
+def publish_bulk_change(model, objs, action, using=None):
+    """
+    Publish single change notification for model objects that were created or changed in bulk.
+    Event contains the IDs of the objects ('ids') instead of single ID. Notification is sent once
+    the current transaction is committed.
+
+    Parameters
+    ----------
+    model
+       Model class.
+    objs
+       Model objects.
+    action
+       Change type, one of CHANGE_CREATE, CHANGE_EDIT, CHANGE_DELETE.
+    using
+       Database alias of the transaction.
+    """
+    if not objs:
+        return
+
+    timestamps = [obj.last_modified for obj in objs if getattr(obj, 'last_modified', None)]
+    event = {
+        'action': action,
+        'ids': [obj.pk for obj in objs],
+        'model': model._meta.db_table,
+        'last_modified': max(timestamps).isoformat() if timestamps else None
+    }
+    _publish_on_commit(change_channel(model), event, using)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Buffered writing of model history events"""
+
+# System imports
+import logging
+import weakref
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connections, router, transaction, close_old_connections
+
+__author__ = "Juha Ojanpera"
+__copyright__ = "Copyright 2021"
+__email__ = "juha.ojanpera@gmail.com"
+__status__ = "Development"
+
+logger = logging.getLogger(__name__)
+
+# Events are written immediately
+EVENTS_SYNC = 'sync'
+
+# Events are collected per transaction and written in bulk on commit
+EVENTS_DEFERRED = 'deferred'
+
+# As deferred but the bulk write is executed in background thread
+EVENTS_ASYNC = 'async'
+
+
+def event_write_mode():
+    """Return history event write mode as defined by DRAALCORE_EVENT_WRITE_MODE setting (default sync)."""
+    return getattr(settings, 'DRAALCORE_EVENT_WRITE_MODE', EVENTS_SYNC)
+
+
+class _CommitCallback(object):
+    """Transaction commit callback writing the events collected within single save point."""
+
+    def __init__(self, buffer, using, entries):
+        self.buffer = buffer
+        self.using = using
+        self.entries = entries
+        self.flushed = False
+
+    def __call__(self):
+        self.flushed = True
+        self.buffer._flush(self.using, self.entries)
+
+
+class EventBuffer(object):
+    """
+    Collects history events (LogEntry or HistoryEvent objects) of a transaction and writes them using bulk
+    insert once the transaction is committed. Events of rolled back transactions and save
+    points are discarded together with the changes they describe.
+
+    Single commit callback is registered per save point level. The pending callbacks are tracked
+    per thread using weak references keyed by database alias and save point IDs; transaction
+    management holds the only strong reference to a callback, so callbacks of rolled back
+    transactions and save points drop out of the tracking once discarded.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._futures = []
+        self._local = threading.local()
+
+    def _pending(self):
+        if not hasattr(self._local, 'callbacks'):
+            self._local.callbacks = weakref.WeakValueDictionary()
+        return self._local.callbacks
+
+    def add(self, *entries):
+        """Add events for writing."""
+        if not entries:
+            return
+
+        using = router.db_for_write(entries[0].__class__)
+        connection = connections[using]
+        if event_write_mode() == EVENTS_SYNC or not connection.in_atomic_block:
+            self._flush(using, list(entries))
+            return
+
+        # Events are appended to the commit callback of the current save point level, new callback
+        # is needed for each level so that transaction management can discard the events if the
+        # save point is rolled back.
+        key = (using, tuple(connection.savepoint_ids))
+        pending = self._pending()
+        callback = pending.get(key)
+        if callback is not None and not callback.flushed:
+            callback.entries.extend(entries)
+            return
+
+        callback = _CommitCallback(self, using, list(entries))
+        transaction.on_commit(callback, using=using)
+        pending[key] = callback
+
+    def _flush(self, using, entries):
+        if event_write_mode() == EVENTS_ASYNC:
+            self._submit(using, entries)
+        else:
+            self._write(using, entries)
+
+    def _write(self, using, entries):
+        try:
+            if len(entries) == 1:
+                entries[0].save(using=using)
+            else:
+                entries[0].__class__.objects.using(using).bulk_create(entries)
+        except Exception:
+            if event_write_mode() == EVENTS_SYNC:
+                raise
+            logger.exception('Writing of {} history events failed'.format(len(entries)))
+
+    def _write_async(self, using, entries):
+        try:
+            self._write(using, entries)
+        finally:
+            close_old_connections()
+
+    def _submit(self, using, entries):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='draalcore-events')
+
+            self._futures = [future for future in self._futures if not future.done()]
+            self._futures.append(self._executor.submit(self._write_async, using, entries))
+
+    def wait(self, timeout=None):
+        """Wait until events handed to background thread have been written."""
+        with self._executor_lock:
+            futures = list(self._futures)
+
+        for future in futures:
+            future.result(timeout)
+
+
+event_buffer = EventBuffer()
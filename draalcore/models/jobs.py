@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Periodic maintenance jobs of model data"""
+
+# System imports
+import logging
+from datetime import timedelta
+from django.apps import apps
+from django.conf import settings
+from django.utils import timezone
+from django.db import router, transaction
+from django.db.models.deletion import Collector
+
+# Project imports
+from draalcore.models.base_model import BaseDetails
+from draalcore.models.models import ActionJob
+from draalcore.models.snapshots import snapshot_history
+from draalcore.scheduler import periodic_job
+
+__author__ = "Juha Ojanpera"
+__copyright__ = "Copyright 2021"
+__email__ = "juha.ojanpera@gmail.com"
+__status__ = "Development"
+
+logger = logging.getLogger(__name__)
+
+
+def _cascades_to_active(collector):
+    """Return True if collected deletion includes model items that are not soft-deleted."""
+    for model, objs in collector.data.items():
+        if issubclass(model, BaseDetails):
+            ids = [obj.pk for obj in objs]
+            if model._base_manager.filter(pk__in=ids).exclude(status=BaseDetails.STATUS_DELETED).exists():
+                return True
+
+    for query in collector.fast_deletes:
+        if issubclass(query.model, BaseDetails) and query.exclude(status=BaseDetails.STATUS_DELETED).exists():
+            return True
+
+    return False
+
+
+def _purge(model, objs, cascade):
+    """
+    Remove model items, return number of removed items. Unless cascading is allowed, model items
+    whose removal would cascade into active model items are kept. Such items are located by
+    splitting the items into halves.
+    """
+    if not objs:
+        return 0
+
+    using = router.db_for_write(model)
+    with transaction.atomic(using=using):
+        collector = Collector(using=using)
+        collector.collect(objs)
+        if cascade or not _cascades_to_active(collector):
+            _, counts = collector.delete()
+            return counts.get(model._meta.label, 0)
+
+    if len(objs) == 1:
+        logger.info('{} not removed, removal would cascade into active model items'.format(objs[0]))
+        return 0
+
+    middle = len(objs) // 2
+    return _purge(model, objs[:middle], cascade) + _purge(model, objs[middle:], cascade)
+
+
+@periodic_job(interval=getattr(settings, 'DRAALCORE_PURGE_INTERVAL', 86400), jitter=60)
+def purge_deleted():
+    """
+    Permanently remove soft-deleted model items that have not been modified within number of days
+    defined by DRAALCORE_PURGE_DELETED_DAYS setting. Nothing is removed if the setting is not defined.
+    Items whose removal would cascade into active (not soft-deleted) model items are kept unless
+    DRAALCORE_PURGE_CASCADE setting is True.
+
+    Returns
+    -------
+    dict
+       Number of removed items keyed by model label.
+    """
+    days = getattr(settings, 'DRAALCORE_PURGE_DELETED_DAYS', None)
+    if days is None:
+        return {}
+
+    before = timezone.now() - timedelta(days=days)
+    cascade = getattr(settings, 'DRAALCORE_PURGE_CASCADE', False)
+
+    stats = {}
+    for model in apps.get_models():
+        if issubclass(model, BaseDetails):
+            query = model._base_manager.filter(status=BaseDetails.STATUS_DELETED, last_modified__lt=before)
+            count = _purge(model, list(query), cascade)
+            if count:
+                stats[model._meta.label] = count
+
+    return stats
+
+
+@periodic_job(interval=3600, jitter=60)
+def purge_action_jobs():
+    """Remove background action jobs whose result TTL has expired, return number of removed jobs."""
+    count, _ = ActionJob.objects.filter(expires__lt=timezone.now()).delete()
+    return count
+
+
+@periodic_job(interval=3600, jitter=60)
+def create_history_snapshots():
+    """Write history snapshots of model items whose history has grown, return number of written snapshots."""
+    return snapshot_history()
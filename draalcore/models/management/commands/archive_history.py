@@ -0,0 +1,29 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Move old model history events to compressed segment files"""
+
+# System imports
+from datetime import timedelta
+from django.utils import timezone
+from django.core.management.base import BaseCommand
+
+# Project imports
+from draalcore.models.archive import archive_history, retention_days
+
+
+class Command(BaseCommand):
+    help = 'Move model history events older than retention window from history table to compressed segment files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Retention window in days, default is DRAALCORE_HISTORY_RETENTION_DAYS setting')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of model items archived per segment file')
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else retention_days()
+        stats = archive_history(timezone.now() - timedelta(days=days), options['batch_size'])
+
+        for segment in stats['segments']:
+            self.stdout.write('Created segment {}'.format(segment))
+
+        self.stdout.write('Done, {} events of {} items archived'.format(stats['events'], stats['objects']))
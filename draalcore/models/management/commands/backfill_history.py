@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Copy model history events from LogEntry to HistoryEvent"""
+
+# System imports
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Max
+from django.core.management.base import BaseCommand
+from django.contrib.admin.models import LogEntry
+from django.contrib.contenttypes.models import ContentType
+
+# Project imports
+from draalcore.models.base_model import EventHandlingMixin
+from draalcore.models.models import HistoryEvent, history_changes
+
+
+class Command(BaseCommand):
+    help = 'Copy model history events of application models from LogEntry to HistoryEvent'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--after-id', type=int, default=None,
+                            help='Copy only log entries with ID greater than this, by default the copying resumes '
+                                 'after the latest copied log entry')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of events copied at a time')
+
+    def content_types(self):
+        """Content types of models logging events."""
+        models = [model for model in apps.get_models() if issubclass(model, EventHandlingMixin)]
+        return [item.id for item in ContentType.objects.get_for_models(*models).values()]
+
+    @staticmethod
+    def history_event(entry):
+        return HistoryEvent(user_id=entry.user_id, content_type_id=entry.content_type_id,
+                            object_id=int(entry.object_id) if entry.object_id else None,
+                            object_repr=entry.object_repr, action_time=entry.action_time,
+                            action_flag=entry.action_flag, changes=history_changes(entry), source_id=entry.id)
+
+    @staticmethod
+    def copy_entry(entry):
+        # Events for non-numeric object IDs cannot be referenced from integer field, events
+        # without changes are not shown in model history
+        valid_id = not entry.object_id or entry.object_id.isdigit()
+        return valid_id and bool(history_changes(entry))
+
+    def handle(self, *args, **options):
+        last_id = options['after_id']
+        if last_id is None:
+            last_id = HistoryEvent.objects.aggregate(last_id=Max('source_id'))['last_id'] or 0
+
+        batch_size = options['batch_size']
+
+        query = LogEntry.objects.filter(content_type_id__in=self.content_types()).order_by('id')
+
+        copied = 0
+        while True:
+            entries = list(query.filter(id__gt=last_id)[:batch_size])
+            if not entries:
+                break
+
+            # Already copied entries are skipped, copying can be safely repeated
+            events = [self.history_event(entry) for entry in entries if self.copy_entry(entry)]
+            with transaction.atomic():
+                HistoryEvent.objects.bulk_create(events, ignore_conflicts=True)
+
+            copied += len(events)
+            last_id = entries[-1].id
+            self.stdout.write('Copied {} events, last log entry ID {}'.format(copied, last_id))
+
+        self.stdout.write('Done, {} events copied'.format(copied))
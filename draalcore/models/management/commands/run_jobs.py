@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Run periodic maintenance jobs"""
+
+# System imports
+from django.core.management.base import BaseCommand, CommandError
+
+# Project imports
+from draalcore.models.models import PeriodicJobState
+from draalcore.scheduler import JobScheduler, autodiscover, registry
+
+
+class Command(BaseCommand):
+    help = 'Run registered periodic jobs, only one worker executes each job run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run due jobs once and exit')
+        parser.add_argument('--job', action='append', default=[], help='Run only specified job(s), can be repeated')
+        parser.add_argument('--force', action='store_true', help='Run specified jobs even if not due, requires --job')
+        parser.add_argument('--list', action='store_true', help='List registered jobs and their run details')
+
+    def handle(self, *args, **options):
+        autodiscover()
+
+        jobs = list(registry)
+        if options['job']:
+            jobs = [registry.get(name) for name in options['job']]
+            if None in jobs:
+                unknown = [name for name, job in zip(options['job'], jobs) if job is None]
+                raise CommandError('Unknown job(s): {}'.format(', '.join(unknown)))
+        elif options['force']:
+            raise CommandError('--force requires --job')
+
+        if options['list']:
+            return self._list(jobs)
+
+        scheduler = JobScheduler(jobs)
+        if options['once'] or options['force']:
+            for job in jobs:
+                ran, _ = scheduler.run_job(job, force=options['force'])
+                self.stdout.write('{}: {}'.format(job.name, 'executed' if ran else 'skipped'))
+            return
+
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            pass
+
+    def _list(self, jobs):
+        states = PeriodicJobState.objects.in_bulk([job.name for job in jobs], field_name='name')
+        for job in jobs:
+            state = states.get(job.name)
+            details = 'never run'
+            if state and state.last_run:
+                details = 'last run {} ({:.3f}s), {} runs, {} failures'.format(
+                    state.last_run.isoformat(), state.last_duration or 0, state.runs, state.failures)
+            self.stdout.write('{} every {}s: {}'.format(job.name, job.interval, details))
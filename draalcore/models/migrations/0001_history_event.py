@@ -0,0 +1,40 @@
+# Generated by Django 3.2.4 on 2026-10-19 15:58
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import draalcore.models.models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoryEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField(blank=True, help_text='Model item ID.', null=True)),
+                ('object_repr', models.CharField(help_text='Model item description at the time of event.', max_length=200)),
+                ('action_time', models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Event timestamp.')),
+                ('action_flag', models.PositiveSmallIntegerField(default=1, help_text='Event type.')),
+                ('changes', models.JSONField(encoder=draalcore.models.models.CompactJSONEncoder, help_text='List of changes or event messages.')),
+                ('content_type', models.ForeignKey(help_text='Model type.', on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+                ('user', models.ForeignKey(blank=True, help_text='User responsible for the event.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'draalcore_history_event',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='historyevent',
+            index=models.Index(fields=['content_type', 'object_id', 'id'], name='draalcore_h_content_70c025_idx'),
+        ),
+    ]
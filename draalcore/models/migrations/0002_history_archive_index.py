@@ -0,0 +1,36 @@
+# Generated by Django 3.2.4 on 2026-10-19 16:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('draalcore_models', '0001_history_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoryArchiveIndex',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField(help_text='Model item ID.')),
+                ('segment', models.CharField(help_text='Segment file name relative to archive root.', max_length=255)),
+                ('offset', models.BigIntegerField(help_text='Byte offset of the compressed events within segment file.')),
+                ('length', models.PositiveIntegerField(help_text='Byte length of the compressed events.')),
+                ('count', models.PositiveIntegerField(help_text='Number of archived events.')),
+                ('created', models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Archival timestamp.')),
+                ('content_type', models.ForeignKey(help_text='Model type.', on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'db_table': 'draalcore_history_archive_index',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='historyarchiveindex',
+            index=models.Index(fields=['content_type', 'object_id', 'id'], name='draalcore_h_content_1346bc_idx'),
+        ),
+    ]
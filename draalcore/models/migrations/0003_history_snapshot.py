@@ -0,0 +1,36 @@
+# Generated by Django 3.2.4 on 2026-10-19 16:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import draalcore.models.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('draalcore_models', '0002_history_archive_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistorySnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField(help_text='Model item ID.')),
+                ('event_id', models.PositiveIntegerField(help_text='ID of the latest history event included in the state.')),
+                ('action_time', models.DateTimeField(help_text='Timestamp of the latest history event included in the state.')),
+                ('state', models.JSONField(encoder=draalcore.models.models.CompactJSONEncoder, help_text='Field values keyed by field name.')),
+                ('created', models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Snapshot creation timestamp.')),
+                ('content_type', models.ForeignKey(help_text='Model type.', on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'db_table': 'draalcore_history_snapshot',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='historysnapshot',
+            index=models.Index(fields=['content_type', 'object_id', 'action_time'], name='draalcore_h_content_bb90cf_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.4 on 2026-10-19 16:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('draalcore_models', '0003_history_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CodeLock',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lock_id', models.CharField(help_text='Lock name.', max_length=90, unique=True)),
+                ('run_id', models.BigIntegerField(default=0, help_text='Latest fencing token.')),
+            ],
+            options={
+                'db_table': 'codelock',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.4 on 2026-10-19 16:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('draalcore_models', '0004_codelock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodicJobState',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Job name.', max_length=190, unique=True)),
+                ('last_run', models.DateTimeField(blank=True, help_text='Start time of latest run.', null=True)),
+                ('last_duration', models.FloatField(blank=True, help_text='Duration of latest run in seconds.', null=True)),
+                ('runs', models.PositiveIntegerField(default=0, help_text='Number of runs.')),
+                ('failures', models.PositiveIntegerField(default=0, help_text='Number of failed runs.')),
+                ('last_error', models.TextField(blank=True, default='', help_text='Error of latest failed run.')),
+            ],
+            options={
+                'db_table': 'draalcore_periodic_job',
+            },
+        ),
+    ]
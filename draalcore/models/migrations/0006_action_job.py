@@ -0,0 +1,40 @@
+# Generated by Django 3.2.4 on 2026-10-19 16:22
+
+from django.conf import settings
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('draalcore_models', '0005_periodic_job_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActionJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Public job ID.', unique=True)),
+                ('action', models.CharField(help_text='Action name.', max_length=90)),
+                ('request', models.JSONField(help_text='Request details (scope, method, URL keyword arguments, data and URL parameters).')),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('running', 'running'), ('succeeded', 'succeeded'), ('failed', 'failed')], default='pending', help_text='Job status.', max_length=16)),
+                ('progress', models.FloatField(default=0, help_text='Progress percentage.')),
+                ('message', models.CharField(blank=True, default='', help_text='Progress message.', max_length=256)),
+                ('result', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Action result.', null=True)),
+                ('errors', models.JSONField(blank=True, help_text='Action errors.', null=True)),
+                ('created', models.DateTimeField(auto_now_add=True, help_text='Submission time.')),
+                ('started', models.DateTimeField(blank=True, help_text='Execution start time.', null=True)),
+                ('finished', models.DateTimeField(blank=True, help_text='Execution end time.', null=True)),
+                ('expires', models.DateTimeField(blank=True, db_index=True, help_text='Time after which job is removed.', null=True)),
+                ('user', models.ForeignKey(blank=True, help_text='User who submitted the job.', null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'draalcore_action_job',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.4 on 2026-10-19 17:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('draalcore_models', '0006_action_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historyevent',
+            name='source_id',
+            field=models.PositiveIntegerField(blank=True, help_text='Source LogEntry ID.', null=True, unique=True),
+        ),
+    ]
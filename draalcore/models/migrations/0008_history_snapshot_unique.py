@@ -0,0 +1,29 @@
+# Generated by Django 3.2.4 on 2026-10-19 17:07
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def remove_duplicate_snapshots(apps, schema_editor):
+    """Keep only the earliest snapshot per history event."""
+    HistorySnapshot = apps.get_model('draalcore_models', 'HistorySnapshot')
+    query = HistorySnapshot.objects.values('content_type', 'object_id', 'event_id')
+    for item in query.annotate(count=Count('id'), first_id=Min('id')).filter(count__gt=1):
+        HistorySnapshot.objects.filter(content_type=item['content_type'], object_id=item['object_id'],
+                                       event_id=item['event_id']).exclude(id=item['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('draalcore_models', '0007_history_event_source'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_snapshots, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='historysnapshot',
+            unique_together={('content_type', 'object_id', 'event_id')},
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.4 on 2026-10-19 17:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('draalcore_models', '0008_history_snapshot_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='codelock',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, help_text='Lease expiration time, empty if lease does not expire.', null=True),
+        ),
+        migrations.AddField(
+            model_name='codelock',
+            name='holder',
+            field=models.CharField(blank=True, default='', help_text='Current lock holder.', max_length=32),
+        ),
+    ]
@@ -1,2 +1,358 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+"""Model history storage"""
+
+# System imports
+import json
+import uuid
+import logging
+from datetime import timedelta
+from django.db import models, connections, transaction
+from django.db.models import F, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
+from django.conf import settings
+from django.utils import timezone
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.admin.models import ADDITION, LogEntry
+
+__author__ = "Juha Ojanpera"
+__copyright__ = "Copyright 2021"
+__email__ = "juha.ojanpera@gmail.com"
+__status__ = "Development"
+
+logger = logging.getLogger(__name__)
+
+# History events are stored to Django's admin LogEntry
+HISTORY_LOGENTRY = 'logentry'
+
+# History events are stored to HistoryEvent
+HISTORY_EVENTS = 'history'
+
+
+def history_store():
+    """Return history storage as defined by DRAALCORE_HISTORY_STORE setting (default HISTORY_LOGENTRY)."""
+    return getattr(settings, 'DRAALCORE_HISTORY_STORE', HISTORY_LOGENTRY)
+
+
+class CompactJSONEncoder(json.JSONEncoder):
+    """JSON encoder without whitespace."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs['separators'] = (',', ':')
+        super(CompactJSONEncoder, self).__init__(*args, **kwargs)
+
+
+class HistoryEvent(models.Model):
+    """Change and event history of application models."""
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, help_text='Model type.')
+
+    # Empty for events that are related to model class instead of single model item
+    object_id = models.PositiveIntegerField(blank=True, null=True, help_text='Model item ID.')
+
+    object_repr = models.CharField(max_length=200, help_text='Model item description at the time of event.')
+
+    user = models.ForeignKey(User, blank=True, null=True, on_delete=models.SET_NULL, related_name='+',
+                             help_text='User responsible for the event.')
+
+    action_time = models.DateTimeField(default=timezone.now, editable=False, help_text='Event timestamp.')
+
+    action_flag = models.PositiveSmallIntegerField(default=ADDITION, help_text='Event type.')
+
+    changes = models.JSONField(encoder=CompactJSONEncoder, help_text='List of changes or event messages.')
+
+    # Set for events copied from LogEntry, prevents copying the same entry twice
+    source_id = models.PositiveIntegerField(blank=True, null=True, unique=True, help_text='Source LogEntry ID.')
+
+    class Meta:
+        db_table = 'draalcore_history_event'
+        indexes = [models.Index(fields=['content_type', 'object_id', 'id'])]
+
+    def __str__(self):
+        return '{}({},{},{})'.format(self.__class__.__name__, self.content_type_id, self.object_id, self.action_time)
+
+
+class HistoryArchiveIndex(models.Model):
+    """Location of model item's archived history events within compressed segment file."""
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, help_text='Model type.')
+
+    object_id = models.PositiveIntegerField(help_text='Model item ID.')
+
+    segment = models.CharField(max_length=255, help_text='Segment file name relative to archive root.')
+
+    offset = models.BigIntegerField(help_text='Byte offset of the compressed events within segment file.')
+
+    length = models.PositiveIntegerField(help_text='Byte length of the compressed events.')
+
+    count = models.PositiveIntegerField(help_text='Number of archived events.')
+
+    created = models.DateTimeField(default=timezone.now, editable=False, help_text='Archival timestamp.')
+
+    class Meta:
+        db_table = 'draalcore_history_archive_index'
+        indexes = [models.Index(fields=['content_type', 'object_id', 'id'])]
+
+    def __str__(self):
+        return '{}({},{},{})'.format(self.__class__.__name__, self.content_type_id, self.object_id, self.segment)
+
+
+class HistorySnapshot(models.Model):
+    """Model item's state reconstructed from its history events, speeds up point-in-time state queries."""
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, help_text='Model type.')
+
+    object_id = models.PositiveIntegerField(help_text='Model item ID.')
+
+    event_id = models.PositiveIntegerField(help_text='ID of the latest history event included in the state.')
+
+    action_time = models.DateTimeField(help_text='Timestamp of the latest history event included in the state.')
+
+    state = models.JSONField(encoder=CompactJSONEncoder, help_text='Field values keyed by field name.')
+
+    created = models.DateTimeField(default=timezone.now, editable=False, help_text='Snapshot creation timestamp.')
+
+    class Meta:
+        db_table = 'draalcore_history_snapshot'
+        indexes = [models.Index(fields=['content_type', 'object_id', 'action_time'])]
+        unique_together = [('content_type', 'object_id', 'event_id')]
+
+    def __str__(self):
+        return '{}({},{},{})'.format(self.__class__.__name__, self.content_type_id, self.object_id, self.action_time)
+
+
+class CodeLockManager(models.Manager):
+    """Model manager for code locking"""
+
+    def next_token(self, lock_id):
+        """Increment and return fencing token of specified lock."""
+        with transaction.atomic(using=self.db):
+            self.get_or_create(lock_id=lock_id)
+            self.filter(lock_id=lock_id).update(run_id=F('run_id') + 1)
+            return self.filter(lock_id=lock_id).values_list('run_id', flat=True).get()
+
+
+class CodeLock(models.Model):
+    """Code lock details, run ID is incremented each time the lock is acquired and used as fencing token."""
+
+    lock_id = models.CharField(max_length=90, unique=True, help_text='Lock name.')
+    run_id = models.BigIntegerField(default=0, help_text='Latest fencing token.')
+
+    # Lease of database lock, lock is free when it has no holder or its lease has expired
+    holder = models.CharField(max_length=32, blank=True, default='', help_text='Current lock holder.')
+    expires_at = models.DateTimeField(null=True, blank=True, help_text='Lease expiration time, empty if lease does not expire.')
+
+    objects = CodeLockManager()
+
+    class Meta:
+        db_table = 'codelock'
+
+    def __str__(self):
+        return "%s(%s,%s)" % (self.__class__.__name__, self.lock_id, self.run_id)
+
+
+class PeriodicJobState(models.Model):
+    """Run details of periodic job, shared by all workers running the job scheduler."""
+
+    name = models.CharField(max_length=190, unique=True, help_text='Job name.')
+    last_run = models.DateTimeField(null=True, blank=True, help_text='Start time of latest run.')
+    last_duration = models.FloatField(null=True, blank=True, help_text='Duration of latest run in seconds.')
+    runs = models.PositiveIntegerField(default=0, help_text='Number of runs.')
+    failures = models.PositiveIntegerField(default=0, help_text='Number of failed runs.')
+    last_error = models.TextField(blank=True, default='', help_text='Error of latest failed run.')
+
+    class Meta:
+        db_table = 'draalcore_periodic_job'
+
+    def __str__(self):
+        return "%s(%s,%s)" % (self.__class__.__name__, self.name, self.last_run)
+
+
+class ActionJob(models.Model):
+    """Background action execution, holds the request details needed to execute the action and its status and result."""
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, STATUS_PENDING),
+        (STATUS_RUNNING, STATUS_RUNNING),
+        (STATUS_SUCCEEDED, STATUS_SUCCEEDED),
+        (STATUS_FAILED, STATUS_FAILED),
+    )
+
+    job_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False, help_text='Public job ID.')
+    user = models.ForeignKey(User, blank=True, null=True, on_delete=models.CASCADE, help_text='User who submitted the job.')
+    action = models.CharField(max_length=90, help_text='Action name.')
+    request = models.JSONField(help_text='Request details (scope, method, URL keyword arguments, data and URL parameters).')
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING, help_text='Job status.')
+    progress = models.FloatField(default=0, help_text='Progress percentage.')
+    message = models.CharField(max_length=256, blank=True, default='', help_text='Progress message.')
+    result = models.JSONField(encoder=DjangoJSONEncoder, null=True, blank=True, help_text='Action result.')
+    errors = models.JSONField(null=True, blank=True, help_text='Action errors.')
+    created = models.DateTimeField(auto_now_add=True, help_text='Submission time.')
+    started = models.DateTimeField(null=True, blank=True, help_text='Execution start time.')
+    finished = models.DateTimeField(null=True, blank=True, help_text='Execution end time.')
+    expires = models.DateTimeField(null=True, blank=True, db_index=True, help_text='Time after which job is removed.')
+
+    class Meta:
+        db_table = 'draalcore_action_job'
+
+    def __str__(self):
+        return "%s(%s,%s,%s)" % (self.__class__.__name__, self.job_id, self.action, self.status)
+
+    @staticmethod
+    def result_ttl():
+        """Return number of seconds job details are kept as defined by DRAALCORE_BACKGROUND_RESULT_TTL setting."""
+        return getattr(settings, 'DRAALCORE_BACKGROUND_RESULT_TTL', 86400)
+
+    @property
+    def done(self):
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
+
+    def set_progress(self, progress, message=''):
+        """Store execution progress."""
+        self.progress = min(max(progress, 0), 100)
+        self.message = message[:256]
+        ActionJob.objects.filter(pk=self.pk).update(progress=self.progress, message=self.message)
+
+    def finish(self, result=None, errors=None):
+        """Store execution result or errors, job details expire after the result TTL."""
+        self.status = self.STATUS_FAILED if errors else self.STATUS_SUCCEEDED
+        self.result = result
+        self.errors = errors
+        self.finished = timezone.now()
+        self.expires = self.finished + timedelta(seconds=self.result_ttl())
+        if not errors:
+            self.progress = 100
+        self.save(update_fields=['status', 'result', 'errors', 'finished', 'expires', 'progress'])
+
+    def serialize(self):
+        return {
+            'id': str(self.job_id),
+            'action': self.action,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.message,
+            'result': self.result,
+            'errors': self.errors,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'expires': self.expires
+        }
+
+
+def history_entry(user, content_type_id, object_id, object_repr, events, action=ADDITION):
+    """
+    Return unsaved history event using the storage defined by settings.
+
+    Parameters
+    ----------
+    user
+       User responsible for the event.
+    content_type_id
+       Content type ID of the model.
+    object_id
+       Model item ID, None for events related to model class.
+    object_repr
+       Description of the model item.
+    events : list
+       Changes or event messages.
+    action
+       Event type.
+
+    Returns
+    -------
+    Object
+       LogEntry or HistoryEvent instance.
+    """
+    object_repr = object_repr[:200]
+    if history_store() == HISTORY_EVENTS:
+        return HistoryEvent(user_id=user.id, content_type_id=content_type_id, object_id=object_id,
+                            object_repr=object_repr, action_flag=action, changes=events)
+
+    return LogEntry(user_id=user.id, content_type_id=content_type_id,
+                    object_id=str(object_id) if object_id is not None else None,
+                    object_repr=object_repr, action_flag=action, change_message=json.dumps(events))
+
+
+def exclude_empty_events(query):
+    """Exclude history events that have no changes or event messages from LogEntry or HistoryEvent queryset."""
+    if query.model is HistoryEvent:
+        return query.exclude(changes=[]).exclude(changes='')
+
+    return query.filter(change_message__gt=0)
+
+
+def history_events(content_type_id, object_id):
+    """Return history events of model item as queryset, latest event first."""
+    if history_store() == HISTORY_EVENTS:
+        query = HistoryEvent.objects.filter(content_type_id=content_type_id, object_id=object_id)
+    else:
+        query = LogEntry.objects.filter(object_id=object_id, content_type_id=content_type_id)
+
+    return exclude_empty_events(query).select_related('user').order_by('-id')
+
+
+def history_events_batch(content_type_id, object_ids, limit, before=None):
+    """
+    Return latest history events of several model items using single query.
+
+    Parameters
+    ----------
+    content_type_id
+       Content type ID of the model.
+    object_ids : list
+       Model item IDs.
+    limit : int
+       Maximum number of events per model item.
+    before : dict
+       Keyset pagination cursors keyed by model item ID, only events with ID less than the cursor
+       are returned for the model item.
+
+    Returns
+    -------
+    QuerySet
+       History events ordered by model item, latest event first.
+    """
+    if history_store() == HISTORY_EVENTS:
+        query = HistoryEvent.objects.filter(content_type_id=content_type_id, object_id__in=object_ids)
+        object_key = int
+    else:
+        query = LogEntry.objects.filter(content_type_id=content_type_id, object_id__in=[str(item) for item in object_ids])
+        object_key = str
+
+    query = exclude_empty_events(query)
+    for object_id, cursor in (before or {}).items():
+        query = query.exclude(object_id=object_key(object_id), id__gte=cursor)
+
+    # Rank the events per model item and select the IDs of the first ranked events within subquery
+    ranked = query.annotate(history_rank=Window(RowNumber(), partition_by=[F('object_id')], order_by=F('id').desc()))
+    sql, params = ranked.values('id', 'history_rank').query.sql_with_params()
+
+    qn = connections[query.db].ops.quote_name
+    ids = RawSQL('SELECT {0} FROM ({1}) {2} WHERE {2}.{3} <= %s'.format(qn('id'), sql, qn('ranked'), qn('history_rank')),
+                 params + (limit,))
+
+    return query.model.objects.filter(id__in=ids).select_related('user').order_by('object_id', '-id')
+
+
+def history_changes(entry):
+    """Return list of changes or event messages of history event."""
+    if isinstance(entry, LogEntry):
+        try:
+            return json.loads(entry.change_message)
+        except ValueError:
+            return entry.change_message
+
+    return entry.changes
+
+
+def history_model():
+    """Return model class of the history storage."""
+    return HistoryEvent if history_store() == HISTORY_EVENTS else LogEntry
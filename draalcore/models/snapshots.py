@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Point-in-time state reconstruction of model items.
+
+The state is rebuilt by replaying the field level history events of model item. Replay
+starts from the nearest preceding HistorySnapshot so that only the events after it need
+to be processed. State queries are read-only, snapshots are written every
+DRAALCORE_HISTORY_SNAPSHOT_INTERVAL events by snapshot_history() (periodic job and history
+archival) and on demand, at most one snapshot is stored per history event.
+"""
+
+# System imports
+import logging
+from copy import deepcopy
+from django.apps import apps
+from django.conf import settings
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from django.contrib.contenttypes.models import ContentType
+
+# Project imports
+from draalcore.models.archive import read_events
+from draalcore.models.models import (HistoryArchiveIndex, HistorySnapshot, exclude_empty_events, history_changes,
+                                     history_model)
+
+__author__ = "Juha Ojanpera"
+__copyright__ = "Copyright 2021"
+__email__ = "juha.ojanpera@gmail.com"
+__status__ = "Development"
+
+logger = logging.getLogger(__name__)
+
+# Prefix of field values in model creation event
+CREATED_PREFIX = 'Created value '
+
+# Prefix of event message for cleared related field
+CLEARED_PREFIX = 'Clear data from field '
+
+
+def snapshot_interval():
+    """Return number of events between state snapshots as defined by DRAALCORE_HISTORY_SNAPSHOT_INTERVAL setting."""
+    return getattr(settings, 'DRAALCORE_HISTORY_SNAPSHOT_INTERVAL', 100)
+
+
+def apply_changes(state, changes):
+    """
+    Apply changes of single history event to model item state.
+
+    Parameters
+    ----------
+    state : dict
+       Field values keyed by field name, updated in place.
+    changes : list
+       Changes or event messages of history event. Messages that do not describe field values are ignored.
+    """
+    if not isinstance(changes, list):
+        changes = [changes]
+
+    for item in changes:
+        if isinstance(item, str) and item.startswith(CLEARED_PREFIX):
+            state[item[len(CLEARED_PREFIX):]] = []
+            continue
+
+        if not isinstance(item, dict):
+            continue
+
+        for field, value in item.items():
+            if isinstance(value, dict):
+                # New values of related field
+                if 'data' in value:
+                    state[field] = value['data']
+            elif isinstance(value, list):
+                if len(value) == 2:
+                    state[field] = value[1]
+                elif len(value) == 1 and isinstance(value[0], str) and value[0].startswith(CREATED_PREFIX):
+                    state[field] = value[0][len(CREATED_PREFIX):]
+
+
+class StateBuilder(object):
+    """
+    Rebuild state of model item from history events.
+
+    Parameters
+    ----------
+    obj
+       Model item, must support history events.
+    """
+
+    def __init__(self, obj):
+        self.obj = obj
+        self.content_type_id = obj.content_type.id
+
+    def _snapshot(self, timestamp):
+        """Return latest snapshot at or before specified time."""
+        query = HistorySnapshot.objects.filter(content_type_id=self.content_type_id, object_id=self.obj.pk,
+                                               action_time__lte=timestamp)
+        return query.order_by('-action_time', '-event_id').first()
+
+    def _events(self, snapshot, timestamp):
+        """Return events after the snapshot up to specified time, oldest event first."""
+        query = self.obj.get_events().select_related(None).filter(action_time__lte=timestamp)
+        if snapshot:
+            query = query.filter(Q(action_time__gt=snapshot.action_time) |
+                                 Q(action_time=snapshot.action_time, id__gt=snapshot.event_id))
+
+        events = list(query.order_by('action_time', 'id'))
+
+        indexes = HistoryArchiveIndex.objects.filter(content_type_id=self.content_type_id, object_id=self.obj.pk)
+        if indexes.exists():
+            key = (snapshot.action_time, snapshot.event_id) if snapshot else None
+            for index in indexes:
+                for item in read_events(index):
+                    if item.action_time <= timestamp and (key is None or (item.action_time, item.id) > key):
+                        events.append(item)
+
+            events.sort(key=lambda item: (item.action_time, item.id))
+
+        return events
+
+    def _replay(self, timestamp, interval=0, snapshot_last=False):
+        """Return (state, snapshots to write) at specified time, snapshots are created every interval replayed events."""
+        snapshot = self._snapshot(timestamp)
+        events = self._events(snapshot, timestamp)
+        if not snapshot and not events:
+            return None, []
+
+        state = deepcopy(snapshot.state) if snapshot else {}
+
+        snapshots = []
+        for index, event in enumerate(events, 1):
+            apply_changes(state, history_changes(event))
+            if (interval and index % interval == 0) or (snapshot_last and index == len(events)):
+                snapshots.append(HistorySnapshot(content_type_id=self.content_type_id, object_id=self.obj.pk,
+                                                 event_id=event.id, action_time=event.action_time, state=deepcopy(state)))
+
+        return state, snapshots
+
+    def build(self, timestamp):
+        """
+        Return state at specified time. No snapshots are written.
+
+        Parameters
+        ----------
+        timestamp : datetime
+           Point in time.
+
+        Returns
+        -------
+        dict
+           Field values keyed by field name or None if model item has no events at or before specified time.
+        """
+        return self._replay(timestamp)[0]
+
+    def write_snapshots(self, snapshot_last=False):
+        """
+        Replay events after the latest snapshot and write new snapshot every snapshot interval events.
+
+        Parameters
+        ----------
+        snapshot_last
+           If True, snapshot is written also for the latest replayed event.
+
+        Returns
+        -------
+        tuple
+           Current state (None if model item has no events) and number of written snapshots.
+        """
+        state, snapshots = self._replay(timezone.now(), snapshot_interval(), snapshot_last)
+        if snapshots:
+            # Snapshots may already exist for the replayed events
+            HistorySnapshot.objects.bulk_create(snapshots, ignore_conflicts=True)
+            logger.debug('Created {} history snapshots for {}'.format(len(snapshots), self.obj))
+
+        return state, len(snapshots)
+
+
+def state_as_of(obj, timestamp):
+    """Return state of model item at specified time, see StateBuilder.build()."""
+    return StateBuilder(obj).build(timestamp)
+
+
+def create_snapshot(obj):
+    """Write snapshot of model item's current state, return the state."""
+    return StateBuilder(obj).write_snapshots(snapshot_last=True)[0]
+
+
+def _snapshot_candidates(content_type_id, interval):
+    """Return IDs of model items that have at least interval events and events after their latest snapshot."""
+    query = exclude_empty_events(history_model().objects.filter(content_type_id=content_type_id, object_id__isnull=False))
+    counts = query.values('object_id').annotate(count=Count('id'), last_id=Max('id')).filter(count__gte=interval)
+
+    snapshots = HistorySnapshot.objects.filter(content_type_id=content_type_id).values('object_id')
+    latest = dict(snapshots.annotate(event_id=Max('event_id')).values_list('object_id', 'event_id').order_by())
+
+    ids = []
+    for item in counts.order_by():
+        object_id = str(item['object_id'])
+        # Events of non-numeric object IDs cannot have snapshots
+        if object_id.isdigit() and item['last_id'] > latest.get(int(object_id), 0):
+            ids.append(int(object_id))
+
+    return sorted(ids)
+
+
+def snapshot_history(batch_size=1000):
+    """
+    Write history snapshots every snapshot interval events for model items whose history has grown
+    since their latest snapshot. This keeps the point-in-time state queries fast without writing
+    snapshots on read.
+
+    Parameters
+    ----------
+    batch_size : int
+       Number of model items loaded at a time.
+
+    Returns
+    -------
+    int
+       Number of written snapshots.
+    """
+    # Import here to avoid circular imports
+    from draalcore.models.base_model import EventHandlingMixin
+
+    interval = snapshot_interval()
+    if not interval:
+        return 0
+
+    count = 0
+    models = [model for model in apps.get_models() if issubclass(model, EventHandlingMixin)]
+    for model, content_type in ContentType.objects.get_for_models(*models).items():
+        ids = _snapshot_candidates(content_type.id, interval)
+        for index in range(0, len(ids), batch_size):
+            for obj in model._base_manager.filter(pk__in=ids[index:index + batch_size]):
+                count += StateBuilder(obj).write_snapshots()[1]
+
+    return count
@@ -5,23 +5,30 @@
 # System imports
 import sys
 import abc
+import asyncio
 import logging
-import datetime
 import importlib
 from django.db import models
 from django.conf import settings
-from django.utils.timezone import utc
 from django.db.models.query import QuerySet
 from django.urls import reverse
-from rest_framework.authtoken.models import Token
+from django.http import StreamingHttpResponse
+from asgiref.sync import async_to_sync, sync_to_async
 
 # Project imports
 from .handlers import PostMixin, GetMixin, RestAPIBasicAuthView, RestAPINoAuthView
+from .handlers import AsyncGetMixin, AsyncPostMixin, AsyncRestAPIBasicAuthView, AsyncRestAPINoAuthView
 from .request_data import RequestData
 from .response_data import ResponseData
-from .serializer_object import SerializerModelDataObject
+from .serializer_object import SerializerModelDataObject, SerializerDataObject
+from .export import EXPORT_WRITERS, ExportStream
+from .importer import IMPORT_READERS
+from .file_upload import FileLoader
+from .background import SCOPE_APP, SCOPE_MODEL, is_background, submit
+from draalcore.rest.auth import refresh_user_token
 from draalcore.rest.model import ModelContainer, locate_base_module, ModelsCollection, AppsCollection
 from draalcore.exceptions import DataParsingError
+from draalcore.models.fields import AppModelFieldParserIterator
 from draalcore.middleware.current_user import get_current_request
 from draalcore.rest.base_serializers import UserModelSerializer
 from draalcore.middleware.login import AutoLogout
@@ -35,6 +42,22 @@ def get_module(module):
     return getattr(sys.modules, module, importlib.import_module(module))
 
 
+def execute_action(action_obj):
+    """Execute action, action implementation may be synchronous or coroutine."""
+    if asyncio.iscoroutinefunction(action_obj.execute):
+        return async_to_sync(action_obj.execute)()
+
+    return action_obj.execute()
+
+
+async def execute_action_async(action_obj):
+    """Execute action from async context, synchronous action implementation is executed in worker thread."""
+    if asyncio.iscoroutinefunction(action_obj.execute):
+        return await action_obj.execute()
+
+    return await sync_to_async(action_obj.execute)()
+
+
 class BaseAction(abc.ABC):
     """
     Base class for action execution.
@@ -52,12 +75,17 @@ class BaseAction(abc.ABC):
        Allowed HTTP methods under which action can be called.
     LINK_ACTION
        True if action URL can be directly called. Useful, for example, for downloading media files.
+    BACKGROUND
+       True if action is executed as background job. The call returns HTTP 202 with the job ID and
+       the action result is available from the job status endpoint. Action can report its progress
+       using report_progress().
     """
 
     ACTION = None
     MODEL = None
     ALLOWED_METHODS = []
     LINK_ACTION = False
+    BACKGROUND = False
 
     def __init__(self, request_obj, model_cls):
         """
@@ -96,13 +124,12 @@ class BaseAction(abc.ABC):
         return data
 
     def _get_token(self, user):
-        token, created = Token.objects.get_or_create(user=user)
-        if not created:
-            # Update the created time of the token to keep it valid
-            token.created = datetime.datetime.utcnow().replace(tzinfo=utc)
-            token.save()
+        return {'token': refresh_user_token(user).key}
 
-        return {'token': token.key}
+    def report_progress(self, progress, message=''):
+        """Report execution progress (percentage) of background action, ignored when executed within HTTP request."""
+        if self.request_obj.job is not None:
+            self.request_obj.job.set_progress(progress, message)
 
 
 class CreateAction(BaseAction):
@@ -120,6 +147,31 @@ class CreateAction(BaseAction):
         return self._execute(*args, **kwargs)
 
 
+class ImportAction(CreateAction):
+    """
+    Bulk create model items from uploaded CSV or NDJSON file, applicable to all models. File is
+    attached as 'file', format is determined by 'import_format' parameter (csv or ndjson) or by
+    the file extension. Response contains the number of created items and per-row errors.
+    """
+
+    ACTION = 'import'
+    DISPLAY_NAME = 'Import'
+
+    def _execute(self):
+        fileobj = FileLoader(self.request_obj.request, 'file').get_file()
+
+        default_format = fileobj.name.rsplit('.', 1)[-1].lower() if '.' in fileobj.name else 'csv'
+        import_format = self.request_obj.data_params.get('import_format', default_format)
+        if import_format not in IMPORT_READERS:
+            raise DataParsingError('Unsupported import format {}'.format(import_format))
+
+        fields = {field.name: field for field in AppModelFieldParserIterator.create(self.model_cls._meta)}
+        reader = IMPORT_READERS[import_format](fileobj, fields)
+
+        return self.model_cls.objects.import_data(reader, chunk_size=getattr(settings, 'DRAALCORE_IMPORT_CHUNK_SIZE', 1000),
+                                                  max_errors=getattr(settings, 'DRAALCORE_IMPORT_MAX_ERRORS', 1000))
+
+
 class CreateActionWithParameters(CreateAction):
     """Create action where required input parameters are explicitly defined."""
 
@@ -197,6 +249,97 @@ class AbstractModelItemGetAction(EditAction):
         """Must be defined in the implementing class"""
 
 
+class ExportAction(AbstractModelGetAction):
+    """
+    Stream model listing as CSV or NDJSON download, applicable to all models. URL parameters:
+    'export_format' (csv or ndjson, default csv), 'compress' (gzip) and the 'fields' and search
+    parameters supported by the model listing.
+    """
+
+    ACTION = 'export'
+    DISPLAY_NAME = 'Export'
+    LINK_ACTION = True
+    CHUNK_SIZE = 500
+
+    def execute(self):
+        params = self.request_obj.url_params
+        export_format = params.get('export_format', 'csv')
+        if export_format not in EXPORT_WRITERS:
+            raise DataParsingError('Unsupported export format {}'.format(export_format))
+
+        compress = params.get('compress')
+        if compress not in [None, 'gzip']:
+            raise DataParsingError('Unsupported compression {}'.format(compress))
+
+        ser_obj = SerializerDataObject.create(self.request_obj, self.model_cls)
+        writer = EXPORT_WRITERS[export_format](ser_obj.get_fields)
+        stream = ExportStream(ser_obj.get_queryset(), ser_obj.serializer, writer, compress=bool(compress),
+                              chunk_size=self.CHUNK_SIZE)
+
+        filename = '{}.{}'.format(self.model_cls._meta.db_table, writer.extension)
+        content_type = writer.content_type
+        if compress:
+            filename += '.gz'
+            content_type = 'application/gzip'
+
+        response = StreamingHttpResponse(stream, content_type=content_type)
+        response['Content-Disposition'] = 'attachment; filename="{}"'.format(filename)
+        return response
+
+
+class HistoryAction(AbstractModelGetAction):
+    """
+    Return history of several model items at once, applicable to models with history support. URL
+    parameters: 'ids' (comma separated model IDs), 'limit' (maximum number of events per model item)
+    and 'before' (comma separated keyset pagination cursors as <model ID>:<cursor>, where cursor is the
+    'next' value of the model item in the previous response).
+    """
+
+    ACTION = 'history'
+    DISPLAY_NAME = 'History'
+
+    def _int_param(self, params, name, default=None):
+        try:
+            return int(params[name]) if params.get(name) else default
+        except ValueError:
+            raise DataParsingError('Invalid value for {}: {}'.format(name, params[name]))
+
+    def _cursors(self, params):
+        try:
+            items = [item.split(':') for item in params.get('before', '').split(',') if item]
+            return {int(model_id): int(cursor) for model_id, cursor in items}
+        except ValueError:
+            raise DataParsingError('Invalid value for before: {}'.format(params['before']))
+
+    def execute(self):
+        params = self.request_obj.url_params
+
+        try:
+            ids = list(dict.fromkeys(int(item) for item in params.get('ids', '').split(',') if item))
+        except ValueError:
+            raise DataParsingError('Invalid model IDs {}'.format(params['ids']))
+
+        max_ids = getattr(settings, 'DRAALCORE_HISTORY_BATCH_MAX_IDS', 500)
+        if not ids or len(ids) > max_ids:
+            raise DataParsingError('Between 1 and {} model IDs required'.format(max_ids))
+
+        limit = self._int_param(params, 'limit', getattr(settings, 'DRAALCORE_HISTORY_BATCH_LIMIT', 20))
+        if limit < 1:
+            raise DataParsingError('Invalid value for limit: {}'.format(limit))
+
+        history = self.model_cls.objects.history_batch(ids, limit, self._cursors(params))
+
+        # Import here to avoid circular imports
+        from .model_serializers import history_serializer
+
+        serializer = history_serializer()
+        return [{
+            'id': model_id,
+            'events': serializer(history[model_id]['events'], many=True).data,
+            'next': history[model_id]['next']
+        } for model_id in ids if model_id in history]
+
+
 def get_action_response_data(obj, url_name, resolve_kwargs, method=None):
     """Return serialized action URL data"""
     return {
@@ -306,6 +449,21 @@ class ActionMapper(object):
             if DeleteAction.ACTION not in getattr(model_cls, 'DISALLOWED_ACTIONS', []):
                 classes.append(DeleteAction)
 
+        # Include import action as special action for model creation
+        if 'id' not in request_obj.kwargs and method in ImportAction.ALLOWED_METHODS:
+            if ImportAction.ACTION not in getattr(model_cls, 'DISALLOWED_ACTIONS', []):
+                classes.append(ImportAction)
+
+        # Include history action as special action for models with history support
+        if 'id' not in request_obj.kwargs and method in HistoryAction.ALLOWED_METHODS and hasattr(model_cls, 'get_history'):
+            if HistoryAction.ACTION not in getattr(model_cls, 'DISALLOWED_ACTIONS', []):
+                classes.append(HistoryAction)
+
+        # Include export action as special action for model listing
+        if 'id' not in request_obj.kwargs and method in ExportAction.ALLOWED_METHODS:
+            if ExportAction.ACTION not in getattr(model_cls, 'DISALLOWED_ACTIONS', []):
+                classes.append(ExportAction)
+
         return classes
 
     @classmethod
@@ -350,37 +508,58 @@ class ActionMapper(object):
 class ModelActionMixin(GetMixin, PostMixin):
     """Actions mixin handling HTTP GET and HTTP POST queries for model related actions."""
 
+    @staticmethod
+    def action_bases(method):
+        """Return action base classes for model and model item actions of specified HTTP method."""
+        if method == 'GET':
+            return [AbstractModelGetAction, AbstractModelItemGetAction]
+
+        return [CreateAction, EditAction]
+
     def _get(self, request_obj):
         """Apply HTTP GET action to application model."""
-        return self._execute_action(request_obj, [AbstractModelGetAction, AbstractModelItemGetAction], 'GET')
+        return self._execute_action(request_obj, self.action_bases('GET'), 'GET')
 
     def _post(self, request_obj):
         """Apply HTTP POST action to application model."""
-        return self._execute_action(request_obj, [CreateAction, EditAction], 'POST')
+        return self._execute_action(request_obj, self.action_bases('POST'), 'POST')
 
     def _execute_action(self, request_obj, action_cls, method):
         """Execute model action."""
+        action_data = self._model_action(request_obj, action_cls, method)
+        if action_data is None:
+            return self._unsupported_action(request_obj)
+
+        action_obj, ser_obj = action_data
+        if is_background(action_obj, request_obj):
+            return submit(request_obj, SCOPE_MODEL, method)
 
-        action = request_obj.kwargs['action']
+        return self._action_response(request_obj, ser_obj, execute_action(action_obj))
+
+    def _model_action(self, request_obj, action_cls, method):
+        """Return (action, serializer) objects for the request, None if model does not support actions."""
         model_cls = ModelContainer(request_obj.kwargs['app'], request_obj.kwargs['model']).model_cls
 
         # Model definition must be valid
         if hasattr(model_cls, 'serializer_fields'):
-
             ser_obj = SerializerModelDataObject.create(request_obj, model_cls)
 
-            # Locate action class and execute
-            action_obj = ActionMapper.create(request_obj, model_cls, action, action_cls, method)
-            obj = action_obj.execute()
+            # Locate action class
+            action = request_obj.kwargs['action']
+            return ActionMapper.create(request_obj, model_cls, action, action_cls, method), ser_obj
 
-            # Serialize data as response
-            if obj and isinstance(obj, (models.Model, QuerySet)):
-                request_obj.set_queryset(obj)
-                obj = ser_obj.serialize().data
+        return None
+
+    def _action_response(self, request_obj, ser_obj, obj):
+        """Serialize action result as response."""
+        if obj and isinstance(obj, (models.Model, QuerySet)):
+            request_obj.set_queryset(obj)
+            obj = ser_obj.serialize().data
 
-            return ResponseData(obj)
+        return ResponseData(obj)
 
-        msg = "{} action for '{}' is not supported via the API".format(action, request_obj.kwargs['model'])
+    def _unsupported_action(self, request_obj):
+        msg = "{} action for '{}' is not supported via the API".format(request_obj.kwargs['action'], request_obj.kwargs['model'])
         return ResponseData(message=msg)
 
 
@@ -397,15 +576,23 @@ class AppActionMixin(GetMixin, PostMixin):
 
     def _execute_action(self, request_obj, method):
         """Execute application level action."""
+        action_obj = self._app_action(request_obj, method)
+        if is_background(action_obj, request_obj):
+            return submit(request_obj, SCOPE_APP, method)
+
+        return self._action_response(request_obj, execute_action(action_obj))
+
+    def _app_action(self, request_obj, method):
+        """Return action object for the request."""
 
         # Find application config object
         app = AppsCollection().get_app(request_obj.kwargs['app'])
 
         # Find the actual action object
-        action_obj = app.get_action_obj(request_obj, method)
+        return app.get_action_obj(request_obj, method)
 
-        # Execute
-        obj = action_obj.execute()
+    def _action_response(self, request_obj, obj):
+        """Serialize action result as response."""
 
         # Serialize returned data if its queryset or model item
         if obj and isinstance(obj, (models.Model, QuerySet)):
@@ -423,6 +610,49 @@ class AppActionMixin(GetMixin, PostMixin):
         return ResponseData(obj)
 
 
+class AsyncModelActionMixin(AsyncGetMixin, AsyncPostMixin, ModelActionMixin):
+    """
+    Async variant of ModelActionMixin. Action may declare execute method as coroutine in which
+    case no worker thread is reserved during the action execution.
+    """
+
+    async def _get(self, request_obj):
+        return await super()._get(request_obj)
+
+    async def _post(self, request_obj):
+        return await super()._post(request_obj)
+
+    async def _execute_action(self, request_obj, action_cls, method):
+        action_data = await sync_to_async(self._model_action)(request_obj, action_cls, method)
+        if action_data is None:
+            return self._unsupported_action(request_obj)
+
+        action_obj, ser_obj = action_data
+        if is_background(action_obj, request_obj):
+            return await sync_to_async(submit)(request_obj, SCOPE_MODEL, method)
+
+        obj = await execute_action_async(action_obj)
+        return await sync_to_async(self._action_response)(request_obj, ser_obj, obj)
+
+
+class AsyncAppActionMixin(AsyncGetMixin, AsyncPostMixin, AppActionMixin):
+    """Async variant of AppActionMixin."""
+
+    async def _get(self, request_obj):
+        return await super()._get(request_obj)
+
+    async def _post(self, request_obj):
+        return await super()._post(request_obj)
+
+    async def _execute_action(self, request_obj, method):
+        action_obj = await sync_to_async(self._app_action)(request_obj, method)
+        if is_background(action_obj, request_obj):
+            return await sync_to_async(submit)(request_obj, SCOPE_APP, method)
+
+        obj = await execute_action_async(action_obj)
+        return await sync_to_async(self._action_response)(request_obj, obj)
+
+
 class ActionsSerializer(object):
     """
     Actions serializer interface. Lists available actions for (app_label, model) tuple. If URL contains
@@ -574,6 +804,21 @@ class AppPublicActionHandler(AppActionMixin, RestAPINoAuthView):
     pass
 
 
+class AsyncModelActionHandler(AsyncModelActionMixin, AsyncRestAPIBasicAuthView):
+    """Async ReST API entry point for executing model action"""
+    pass
+
+
+class AsyncAppActionHandler(AsyncAppActionMixin, AsyncRestAPIBasicAuthView):
+    """Async ReST API entry point for executing application level action."""
+    pass
+
+
+class AsyncAppPublicActionHandler(AsyncAppActionMixin, AsyncRestAPINoAuthView):
+    """Async ReST API entry point for executing public application action."""
+    pass
+
+
 class ActionsListingHandler(ActionsListingMixin, RestAPIBasicAuthView):
     """
     ReST API entry point for listing actions for application. All actions require
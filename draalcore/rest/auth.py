@@ -3,11 +3,155 @@
 """Authentication handlers for Django REST framework"""
 
 # System imports
+import copy
+import hmac
+import time
 import base64
+import hashlib
 import binascii
-from django.contrib.auth import login
+import datetime
+import threading
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.encoding import force_bytes
+from django.utils.timezone import utc
+from django.contrib.auth import login, get_user_model
 from django.contrib.auth.forms import AuthenticationForm
 from rest_framework import authentication, exceptions, HTTP_HEADER_ENCODING
+from rest_framework.authtoken.models import Token
+
+
+def token_lifetime():
+    """Return authentication token lifetime in seconds, None if tokens never expire."""
+    return getattr(settings, 'DRAALCORE_TOKEN_LIFETIME', 14 * 24 * 60 * 60)
+
+
+def token_expiry(token):
+    """Return expiry time of token as epoch seconds, None if token never expires."""
+    lifetime = token_lifetime()
+    return token.created.timestamp() + lifetime if lifetime is not None else None
+
+
+class TokenCache(object):
+    """
+    Two level cache for authentication token details. Token maps to (user ID, expiry time, session auth hash)
+    tuple which is stored to Django cache. Short lived in-process map holds also the user object so that
+    token authentication within the same process requires no database queries. Each caller receives its own
+    copy of the user object. The Django cache entry is checked also on in-process hit so token invalidation
+    (password change, user deactivation, sign-out) takes effect immediately in all processes sharing the cache.
+    """
+
+    KEY_PREFIX = 'draalcore_token_'
+
+    def __init__(self, cache_backend=cache, max_local_entries=10000):
+        self._cache = cache_backend
+        self._local = {}
+        self._lock = threading.Lock()
+        self._max_local_entries = max_local_entries
+
+    @property
+    def local_timeout(self):
+        return getattr(settings, 'DRAALCORE_TOKEN_CACHE_TTL', 30)
+
+    def get_local(self, key):
+        """Return (user, expiry) from in-process map, None if not available or no longer valid."""
+        item = self._local.get(key)
+        if item is None or item[3] <= time.time():
+            return None
+
+        user, expiry, auth_hash = item[:3]
+        entry = self.get(key)
+        if entry is None or entry[2] != auth_hash:
+            return None
+
+        return copy.copy(user), expiry
+
+    def get(self, key):
+        """Return (user ID, expiry, session auth hash) from Django cache, None if not available."""
+        return self._cache.get(self.KEY_PREFIX + key)
+
+    def set(self, key, user, expiry):
+        """Store token details."""
+        timeout = max(int(expiry - time.time()), 1) if expiry is not None else None
+        self._cache.set(self.KEY_PREFIX + key, (user.pk, expiry, user.get_session_auth_hash()), timeout)
+        self.set_local(key, user, expiry)
+
+    def set_local(self, key, user, expiry):
+        with self._lock:
+            if len(self._local) >= self._max_local_entries:
+                self._local.clear()
+            self._local[key] = (copy.copy(user), expiry, user.get_session_auth_hash(), time.time() + self.local_timeout)
+
+    def delete(self, key):
+        """Invalidate token details."""
+        self._cache.delete(self.KEY_PREFIX + key)
+        with self._lock:
+            self._local.pop(key, None)
+
+
+token_cache = TokenCache()
+
+
+def expire_user_token(user):
+    """Delete authentication token of user, new token is created on next login."""
+    for token in Token.objects.filter(user=user):
+        expire_token(token.key)
+
+
+def invalidate_user_token(user):
+    """Remove cached details of user's authentication tokens, details are read from database on next use."""
+    for key in Token.objects.filter(user=user).values_list('key', flat=True):
+        token_cache.delete(key)
+
+
+def expire_token(key):
+    """Delete authentication token with specified key."""
+    token_cache.delete(key)
+    Token.objects.filter(key=key).delete()
+
+
+def expire_request_token(request):
+    """
+    Delete authentication token presented in the Authorization header of the request, if any.
+    Session based clients of the user are not affected.
+
+    Returns
+    -------
+    bool
+       True if token was present in the request, False otherwise.
+    """
+    auth = authentication.get_authorization_header(request).split()
+    keyword = CachedTokenAuthentication.keyword.lower().encode()
+    if len(auth) != 2 or auth[0].lower() != keyword:
+        return False
+
+    try:
+        expire_token(auth[1].decode())
+    except UnicodeError:
+        return False
+
+    return True
+
+
+def refresh_user_token(user):
+    """
+    Return authentication token for user. Existing token is refreshed only when less than half
+    of its lifetime remains and replaced with new token if already expired.
+    """
+    token, created = Token.objects.get_or_create(user=user)
+    lifetime = token_lifetime()
+    if not created and lifetime is not None:
+        remaining = token_expiry(token) - time.time()
+        if remaining <= 0:
+            expire_user_token(user)
+            token = Token.objects.create(user=user)
+        elif remaining < lifetime / 2:
+            # Update the created time of the token to keep it valid
+            token.created = datetime.datetime.utcnow().replace(tzinfo=utc)
+            token.save(update_fields=['created'])
+            token_cache.delete(token.key)
+
+    return token
 
 
 class SessionNoCSRFAuthentication(authentication.SessionAuthentication):
@@ -16,16 +160,124 @@ class SessionNoCSRFAuthentication(authentication.SessionAuthentication):
         pass
 
 
+class CachedTokenAuthentication(authentication.TokenAuthentication):
+    """
+    Token authentication with token lifetime and token details caching. The token lifetime is
+    defined by DRAALCORE_TOKEN_LIFETIME setting (in seconds, None for no expiry).
+    """
+
+    def _load_user(self, key):
+        """Return (user, expiry) for token."""
+        entry = token_cache.get(key)
+        if entry is not None:
+            user_id, expiry, auth_hash = entry
+            user = get_user_model()._default_manager.filter(pk=user_id).first()
+
+            # Password changed since the token details were cached
+            if user is None or user.get_session_auth_hash() != auth_hash:
+                token_cache.delete(key)
+                raise exceptions.AuthenticationFailed('Invalid token.')
+
+            if user.is_active:
+                token_cache.set_local(key, user, expiry)
+            return user, expiry
+
+        try:
+            token = Token.objects.select_related('user').get(key=key)
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+
+        expiry = token_expiry(token)
+        if token.user.is_active:
+            # Details of inactive user are not cached so that reactivation takes effect immediately
+            token_cache.set(key, token.user, expiry)
+        return token.user, expiry
+
+    def authenticate_credentials(self, key):
+        user, expiry = token_cache.get_local(key) or self._load_user(key)
+
+        if expiry is not None and expiry <= time.time():
+            raise exceptions.AuthenticationFailed('Token has expired.')
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+        return (user, key)
+
+
+class CredentialCache(object):
+    """
+    Cache for verified username and password pairs. Password hashing is expensive by design so
+    successfully verified credentials are mapped, via keyed HMAC of the credentials, to
+    (user ID, session auth hash, authentication backend) tuple for DRAALCORE_CREDENTIAL_CACHE_TTL
+    seconds. Session auth hash is derived from the user's password so entry becomes invalid when
+    password changes. Plain credentials are never stored.
+    """
+
+    KEY_PREFIX = 'draalcore_credential_'
+
+    def __init__(self, cache_backend=cache):
+        self._cache = cache_backend
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'DRAALCORE_CREDENTIAL_CACHE_TTL', 300)
+
+    def cache_key(self, username, password):
+        msg = force_bytes(username) + b'\x00' + force_bytes(password)
+        return self.KEY_PREFIX + hmac.new(force_bytes(settings.SECRET_KEY), msg, hashlib.sha256).hexdigest()
+
+    def get_user(self, username, password):
+        """Return active user matching the credentials, None if credentials not available in cache."""
+        if not self.timeout:
+            return None
+
+        key = self.cache_key(username, password)
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+
+        user_id, auth_hash, backend = entry
+        user = get_user_model()._default_manager.filter(pk=user_id).first()
+        if user is None or not user.is_active or user.get_session_auth_hash() != auth_hash:
+            self._cache.delete(key)
+            return None
+
+        user.backend = backend
+        return user
+
+    def set_user(self, username, password, user):
+        if self.timeout:
+            entry = (user.pk, user.get_session_auth_hash(), getattr(user, 'backend', None))
+            self._cache.set(self.cache_key(username, password), entry, self.timeout)
+
+    def delete(self, username, password):
+        self._cache.delete(self.cache_key(username, password))
+
+
+credential_cache = CredentialCache()
+
+
 class RestAuthentication(authentication.BaseAuthentication):
-    """REST authentication against username+password."""
+    """
+    REST authentication against username+password.
+
+    Attributes
+    ----------
+    session_login
+       If True, user is also logged in (session is created) on successful authentication. Value None
+       means that DRAALCORE_BASIC_AUTH_LOGIN setting is used (default True). Stateless API clients
+       should disable this to avoid session writes on each request.
+    """
 
     www_authenticate_realm = 'User credentials'
+    session_login = None
 
     def authenticate(self, request):
         """
         Return user object if valid credentials (username + password) were provided,
         raise AuthenticationFailed exception otherwise.
-        On success, user is also logged in.
+        On success, user is also logged in unless session login is disabled.
         """
         auth = authentication.get_authorization_header(request).split()
 
@@ -53,17 +305,27 @@ class RestAuthentication(authentication.BaseAuthentication):
         """
         Authenticate the userid and password against username and password.
         """
-        auth_data = {'username': userid, 'password': password}
-        f = AuthenticationForm(data=auth_data)
+        user = credential_cache.get_user(userid, password)
+        if user is None:
+            auth_data = {'username': userid, 'password': password}
+            f = AuthenticationForm(data=auth_data)
+            if f.is_valid():
+                user = f.get_user()
+                credential_cache.set_user(userid, password, user)
 
-        # if authenticated log the user in.
-        if f.is_valid():
-            login(request._request, f.get_user())
-            user = request._request.user
-            if user.is_authenticated and user.is_active:
-                return (request._request.user, None)
+        if user is not None and user.is_active:
+            # if authenticated log the user in.
+            if self.use_session_login():
+                login(request._request, user)
+            return (user, None)
 
         raise exceptions.AuthenticationFailed('Invalid username or password')
 
+    def use_session_login(self):
+        if self.session_login is not None:
+            return self.session_login
+
+        return getattr(settings, 'DRAALCORE_BASIC_AUTH_LOGIN', True)
+
     def authenticate_header(self, request):
         return 'Basic realm="%s"' % self.www_authenticate_realm
@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Background execution of actions.
+
+Actions with BACKGROUND attribute set are not executed within the HTTP request. Instead the
+request details are stored to ActionJob and the call returns HTTP 202 with the job ID. The job
+is executed by the executor defined by DRAALCORE_BACKGROUND_EXECUTOR setting: bounded thread pool
+within the web process (default) or Celery worker. The executor rebuilds the request from the
+stored details so the action sees the same parameters and user as in the original call, uploaded
+files are not available. Job status, progress and result are available from the job status
+endpoint until the result TTL expires.
+"""
+
+# System imports
+import abc
+import json
+import uuid
+import logging
+import threading
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import transaction, close_old_connections
+from django.http import QueryDict
+from django.http.response import HttpResponseBase
+from django.test.client import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import urlencode
+from django.contrib.auth.models import AnonymousUser
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+try:
+    from celery import shared_task
+except ImportError:  # pragma: no cover
+    shared_task = None
+
+# Project imports
+from draalcore.exceptions import AppException, DataParsingError
+from draalcore.middleware.current_user import acting_user
+from draalcore.models.models import ActionJob
+from draalcore.rest.handlers import GetMixin, RestAPIBasicAuthView
+from draalcore.rest.request_data import RequestData
+from draalcore.rest.response_data import ResponseData
+
+__author__ = "Juha Ojanpera"
+__copyright__ = "Copyright 2021"
+__email__ = "juha.ojanpera@gmail.com"
+__status__ = "Development"
+
+logger = logging.getLogger(__name__)
+
+# Action scopes
+SCOPE_MODEL = 'model'
+SCOPE_APP = 'app'
+
+PENDING_LIMIT_ERROR = 'Too many pending background jobs, try again later'
+
+
+def _params(data):
+    """Return request parameters as JSON serializable dict."""
+    if isinstance(data, QueryDict):
+        return {key: values[0] if len(values) == 1 else values for key, values in data.lists()}
+
+    return dict(data) if data else {}
+
+
+class BaseExecutor(abc.ABC):
+    """Base class for background job executors."""
+
+    def has_capacity(self):
+        """Return False if executor is at capacity and new jobs should be rejected."""
+        return True
+
+    @abc.abstractmethod
+    def submit(self, job_id):
+        """Schedule job for execution once the current transaction is committed."""
+
+
+class ThreadExecutor(BaseExecutor):
+    """
+    Execute jobs in bounded thread pool of the current process.
+
+    Attributes
+    ----------
+    workers
+       Number of worker threads, as defined by DRAALCORE_BACKGROUND_WORKERS setting by default.
+    max_pending
+       Maximum number of queued and running jobs, as defined by DRAALCORE_BACKGROUND_MAX_PENDING setting by default.
+    """
+
+    def __init__(self, workers=None, max_pending=None):
+        self.workers = workers or getattr(settings, 'DRAALCORE_BACKGROUND_WORKERS', 4)
+        self.max_pending = max_pending or getattr(settings, 'DRAALCORE_BACKGROUND_MAX_PENDING', 100)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='draalcore-job')
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def has_capacity(self):
+        return self._pending < self.max_pending
+
+    def submit(self, job_id):
+        # Slot is reserved only when the job is committed, rolled back jobs never consume capacity
+        transaction.on_commit(lambda: self._start(job_id))
+
+    def _start(self, job_id):
+        with self._lock:
+            accepted = self._pending < self.max_pending
+            if accepted:
+                self._pending += 1
+
+        if not accepted:
+            # Capacity was exhausted by jobs committed after the submission was accepted
+            job = ActionJob.objects.filter(job_id=job_id, status=ActionJob.STATUS_PENDING).first()
+            if job:
+                job.finish(errors=[PENDING_LIMIT_ERROR])
+            return
+
+        try:
+            self._executor.submit(self._run, job_id)
+        except Exception:
+            self._release()
+            raise
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    def _run(self, job_id):
+        try:
+            run_job(job_id)
+        finally:
+            self._release()
+            close_old_connections()
+
+
+class CeleryExecutor(BaseExecutor):
+    """Execute jobs in Celery workers."""
+
+    def submit(self, job_id):
+        if run_job_task is None:
+            raise AppException('Celery is not available for background jobs')
+
+        transaction.on_commit(lambda: run_job_task.delay(str(job_id)))
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return executor instance as defined by DRAALCORE_BACKGROUND_EXECUTOR setting (default ThreadExecutor)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            path = getattr(settings, 'DRAALCORE_BACKGROUND_EXECUTOR', 'draalcore.rest.background.ThreadExecutor')
+            _executor = import_string(path)()
+
+    return _executor
+
+
+def is_background(action_obj, request_obj):
+    """Return True if action is to be submitted as background job instead of executing it within the request."""
+    return getattr(action_obj, 'BACKGROUND', False) and request_obj.job is None
+
+
+def submit(request_obj, scope, method):
+    """
+    Submit action request as background job.
+
+    Parameters
+    ----------
+    request_obj
+       Request object.
+    scope
+       Action scope, SCOPE_MODEL or SCOPE_APP.
+    method
+       HTTP method.
+
+    Returns
+    -------
+    ResponseData
+       HTTP 202 response containing the job details.
+    """
+    executor = get_executor()
+    if not executor.has_capacity():
+        raise AppException(PENDING_LIMIT_ERROR)
+
+    user = request_obj.user if request_obj.user.is_authenticated else None
+    job = ActionJob.objects.create(user=user, action=request_obj.kwargs['action'],
+                                   expires=timezone.now() + timedelta(seconds=ActionJob.result_ttl()),
+                                   request={
+                                       'scope': scope,
+                                       'method': method,
+                                       'path': request_obj.request.path,
+                                       'host': request_obj.request.get_host(),
+                                       'secure': request_obj.request.is_secure(),
+                                       'kwargs': request_obj.kwargs,
+                                       'data': _params(request_obj.data_params),
+                                       'params': _params(request_obj.url_params)
+                                   })
+    executor.submit(job.job_id)
+
+    data = job.serialize()
+    data['url'] = reverse('rest-api-job', kwargs={'job_id': str(job.job_id)})
+    return ResponseData(Response(data, status=status.HTTP_202_ACCEPTED))
+
+
+def _build_request(job):
+    """Rebuild action request from job details."""
+    details = job.request
+    factory = RequestFactory(HTTP_HOST=details['host'])
+    if details['method'] == 'GET':
+        http_request = factory.get(details['path'], details['params'], secure=details['secure'])
+    else:
+        path = '{}?{}'.format(details['path'], urlencode(details['params'], doseq=True))
+        http_request = factory.post(path, json.dumps(details['data']), content_type='application/json',
+                                    secure=details['secure'])
+
+    request = Request(http_request, parsers=[JSONParser()])
+    request.user = job.user or AnonymousUser()
+
+    request_obj = RequestData(request, **details['kwargs'])
+    request_obj.job = job
+    return request_obj
+
+
+def _execute(request_obj, scope, method):
+    # Import here to avoid circular imports
+    from draalcore.rest.actions import ModelActionMixin, AppActionMixin
+
+    if scope == SCOPE_MODEL:
+        mixin = ModelActionMixin()
+        return mixin._execute_action(request_obj, mixin.action_bases(method), method)
+
+    return AppActionMixin()._execute_action(request_obj, method)
+
+
+def run_job(job_id):
+    """Execute pending background job."""
+
+    # Claim the job so that it gets executed only once
+    claimed = ActionJob.objects.filter(job_id=job_id, status=ActionJob.STATUS_PENDING).update(
+        status=ActionJob.STATUS_RUNNING, started=timezone.now())
+    if not claimed:
+        logger.warning('Background job {} is not pending'.format(job_id))
+        return
+
+    job = ActionJob.objects.select_related('user').get(job_id=job_id)
+    logger.info('Executing background job {}'.format(job))
+
+    try:
+        request_obj = _build_request(job)
+        with acting_user(job.user, request_obj.request):
+            response = _execute(request_obj, job.request['scope'], job.request['method'])
+
+        if response.message:
+            errors = response.message
+            job.finish(errors=errors if isinstance(errors, list) else [errors])
+        elif isinstance(response.data, HttpResponseBase):
+            job.finish(errors=['Action response cannot be stored as job result'])
+        else:
+            job.finish(result=response.data)
+    except AppException as err:
+        job.finish(errors=err.args[0] if isinstance(err.args[0], list) else [err.args[0]])
+    except Exception as err:
+        logger.exception('Background job {} failed'.format(job))
+        job.finish(errors=[str(err) or err.__class__.__name__])
+
+
+run_job_task = shared_task(name='draalcore.rest.background.run_job')(run_job) if shared_task else None
+
+
+class ActionJobHandler(GetMixin, RestAPIBasicAuthView):
+    """Status, progress and result of background job submitted by the user."""
+
+    def _get(self, request_obj):
+        job_id = request_obj.kwargs['job_id']
+        try:
+            uuid.UUID(job_id)
+        except ValueError:
+            raise DataParsingError('Invalid job ID {}'.format(job_id))
+
+        job = ActionJob.objects.filter(job_id=job_id, user=request_obj.user, expires__gt=timezone.now()).first()
+        if job is None:
+            raise DataParsingError('Job {} not found'.format(job_id))
+
+        return ResponseData(job.serialize())
@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Batch execution of ReST API calls"""
+
+# System imports
+import io
+import copy
+import json
+import asyncio
+import logging
+from urllib.parse import urlsplit
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import connections
+from django.http import QueryDict
+from django.urls import resolve, Resolver404
+from rest_framework import status
+
+# Project imports
+from .handlers import PostMixin, RestAPIBasicAuthView, RestAPIBaseView
+from .response_data import ResponseData
+from draalcore.middleware.current_user import ContextThreadPoolExecutor
+
+
+logger = logging.getLogger(__name__)
+
+
+class BatchItem(object):
+    """Single ReST API call within batch request."""
+
+    ALLOWED_METHODS = ['GET', 'POST', 'PUT', 'PATCH', 'DELETE']
+
+    def __init__(self, data):
+        self.method = str(data.get('method', 'GET')).upper()
+        self.path = data.get('path')
+        self.body = data.get('body')
+
+    @property
+    def read_only(self):
+        return self.method == 'GET'
+
+    def validate(self):
+        """Return error message if item is not valid, None otherwise."""
+        if not isinstance(self.path, str) or not self.path.startswith('/'):
+            return 'Absolute path is required'
+
+        if self.method not in self.ALLOWED_METHODS:
+            return 'Unsupported method {}'.format(self.method)
+
+        return None
+
+    def create_request(self, request, session=None):
+        """
+        Create Django HTTP request for the item. The request inherits headers, session and
+        authenticated user of the batch request so that no new authentication is needed.
+        Cookies and user object are copied for each item, session is shared unless
+        item specific session is given.
+        """
+        url = urlsplit(self.path)
+        body = json.dumps(self.body).encode('utf-8') if self.body is not None else b''
+
+        sub_request = copy.copy(request._request)
+        sub_request.method = self.method
+        sub_request.path = sub_request.path_info = url.path
+        sub_request.GET = QueryDict(url.query)
+        sub_request.COOKIES = dict(sub_request.COOKIES)
+        sub_request.META = dict(sub_request.META, REQUEST_METHOD=self.method, PATH_INFO=url.path,
+                                QUERY_STRING=url.query, CONTENT_TYPE='application/json',
+                                CONTENT_LENGTH=str(len(body)))
+        if session is not None:
+            sub_request.session = session
+
+        sub_request._body = body
+        sub_request._stream = io.BytesIO(body)
+        sub_request._read_started = False
+        for attr in ['_post', '_files']:
+            if hasattr(sub_request, attr):
+                delattr(sub_request, attr)
+
+        # Authentication is done only once for the batch
+        user = copy.copy(request.user)
+        sub_request.user = user
+        sub_request._force_auth_user = user
+        sub_request._force_auth_token = request.auth
+
+        return sub_request
+
+    def execute(self, request, session=None):
+        """Execute the item and return response details, see create_request() for session."""
+        error = self.validate()
+        if error:
+            return self.error_response(error)
+
+        try:
+            match = resolve(urlsplit(self.path).path)
+        except Resolver404:
+            return self.error_response('Path {} not found'.format(self.path), status.HTTP_404_NOT_FOUND)
+
+        # Only ReST API calls are allowed, batch requests cannot be nested
+        view_cls = getattr(match.func, 'view_class', None)
+        if not view_cls or not issubclass(view_cls, RestAPIBaseView) or issubclass(view_cls, BatchHandler):
+            return self.error_response('Path {} not supported in batch request'.format(self.path))
+
+        try:
+            view = match.func
+            if asyncio.iscoroutinefunction(view):
+                view = async_to_sync(view)
+
+            response = view(self.create_request(request, session), *match.args, **match.kwargs)
+        except Exception as e:
+            logger.exception('Batch item {} {} failed'.format(self.method, self.path))
+            return self.error_response(str(e), status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return {'status': response.status_code, 'body': self.response_body(response)}
+
+    @staticmethod
+    def response_body(response):
+        if hasattr(response, 'data'):
+            return response.data
+
+        if response.streaming:
+            return None
+
+        content = response.content.decode(response.charset)
+        try:
+            return json.loads(content)
+        except ValueError:
+            return content
+
+    @staticmethod
+    def error_response(message, status_code=status.HTTP_400_BAD_REQUEST):
+        return {'status': status_code, 'body': {'errors': [message]}}
+
+
+class BatchMixin(PostMixin):
+    """
+    Execute several ReST API calls within single HTTP request. Request body is either list
+    of {method, path, body} items or object with 'requests' (list of items) and optional 'parallel'
+    key. If 'parallel' is true, consecutive HTTP GET items are executed concurrently in thread pool,
+    other items are executed sequentially in the specified order.
+
+    Sequentially executed items share the session of the batch request. Concurrently executed items
+    use their own copy of the session and the changes are applied to the batch session in item order
+    once all items of the group are completed. Session key changes (login, logout) are not carried over
+    from concurrently executed items.
+
+    Response is list of {status, body} items matching the order of the request items.
+    """
+
+    def _post(self, request_obj):
+        data = request_obj.request.data
+        parallel = False
+        if isinstance(data, dict):
+            parallel = bool(data.get('parallel', False))
+            data = data.get('requests')
+
+        if not isinstance(data, list) or not all(isinstance(item, dict) for item in data):
+            return ResponseData(message='List of requests is required')
+
+        max_items = getattr(settings, 'DRAALCORE_REST_BATCH_MAX_ITEMS', 50)
+        if len(data) > max_items:
+            return ResponseData(message='Maximum of {} requests allowed in batch'.format(max_items))
+
+        items = [BatchItem(item) for item in data]
+        return ResponseData(self._execute_items(request_obj.request, items, parallel))
+
+    def _execute_items(self, request, items, parallel):
+        responses = []
+        index = 0
+        while index < len(items):
+            # Group consecutive read-only items for concurrent execution
+            group = [items[index]]
+            if parallel and items[index].read_only:
+                while index + len(group) < len(items) and items[index + len(group)].read_only:
+                    group.append(items[index + len(group)])
+
+            if len(group) > 1:
+                responses.extend(self._execute_concurrently(request, group))
+            else:
+                responses.append(group[0].execute(request))
+
+            index += len(group)
+
+        return responses
+
+    def _execute_concurrently(self, request, items):
+        session = getattr(request._request, 'session', None)
+        initial = dict(session.items()) if session is not None else None
+        sessions = [self._copy_session(session, initial) for _ in items]
+
+        def execute(args):
+            item, item_session = args
+            try:
+                return item.execute(request, item_session)
+            finally:
+                # Worker threads must release their database connections
+                connections.close_all()
+
+        workers = getattr(settings, 'DRAALCORE_REST_BATCH_WORKERS', 4)
+        with ContextThreadPoolExecutor(max_workers=min(workers, len(items))) as executor:
+            responses = list(executor.map(execute, zip(items, sessions)))
+
+        if session is not None:
+            self._merge_sessions(session, initial, sessions)
+
+        return responses
+
+    @staticmethod
+    def _copy_session(session, data):
+        """Return copy of session that has its own session data."""
+        if session is None:
+            return None
+
+        item_session = copy.copy(session)
+        item_session._session_cache = dict(data)
+        item_session.accessed = False
+        item_session.modified = False
+        return item_session
+
+    @staticmethod
+    def _merge_sessions(session, initial, sessions):
+        """Apply changes of item specific sessions to the batch session."""
+        for item_session in sessions:
+            if not item_session.modified:
+                continue
+
+            data = dict(item_session.items())
+            for key in set(initial) - set(data):
+                session.pop(key, None)
+
+            for key, value in data.items():
+                if key not in initial or initial[key] != value:
+                    session[key] = value
+
+
+class BatchHandler(BatchMixin, RestAPIBasicAuthView):
+    """ReST API entry point for executing batch of ReST API calls"""
+    pass
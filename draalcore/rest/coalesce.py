@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Coalescing (single-flight) of identical concurrent HTTP requests"""
+
+# System imports
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from django.http import HttpResponse
+from django.core.cache import cache
+from rest_framework.response import Response
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Call(object):
+    """In-flight call details."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiting = 0
+
+
+class SingleFlight(object):
+    """
+    Execute function only once for concurrent callers that share the same key within a process.
+    Callers that arrive while the first call is still executing wait and receive its result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def waiting(self, key=None):
+        """Return number of callers waiting for the result of in-flight call(s)."""
+        with self._lock:
+            if key is None:
+                calls = list(self._calls.values())
+            else:
+                calls = [self._calls[key]] if key in self._calls else []
+
+            return sum(call.waiting for call in calls)
+
+    def do(self, key, fn):
+        """
+        Execute function or wait for the result of identical in-flight call.
+
+        Parameters
+        ----------
+        key : string
+           Call identifier.
+        fn : function
+           Function to execute.
+
+        Returns
+        -------
+        tuple
+           Function result and True if result was shared from another caller, False otherwise.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiting += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+        return call.result, False
+
+
+class CacheSingleFlight(object):
+    """
+    Single-flight execution across processes using cache based lock. First caller acquires the lock
+    and publishes the result to cache, other callers poll the cache until the result is available.
+    The result must be picklable.
+    """
+
+    def __init__(self, cache_backend=cache, timeout=30, poll_interval=0.05, result_timeout=10):
+        """
+        Parameters
+        ----------
+        cache_backend : object
+           Cache backend implementation, must be shared between the processes.
+        timeout : integer
+           Maximum number of seconds the lock is held and callers wait for the result.
+        poll_interval : float
+           Number of seconds between the result polls.
+        result_timeout : integer
+           Number of seconds the result is kept available for waiting callers.
+        """
+        self._cache = cache_backend
+        self._timeout = timeout
+        self._poll_interval = poll_interval
+        self._result_timeout = result_timeout
+
+    def do(self, key, fn):
+        """Execute function or wait for the result of identical in-flight call, see SingleFlight.do()."""
+        lock_key = 'draalcore_flight_lock_' + key
+        token = uuid.uuid4().hex
+
+        if self._cache.add(lock_key, token, self._timeout):
+            try:
+                result = fn()
+                self._cache.set('draalcore_flight_{}_{}'.format(key, token), result, self._result_timeout)
+            finally:
+                self._cache.delete(lock_key)
+            return result, False
+
+        # Wait for the lock holder to publish the result
+        token = self._cache.get(lock_key)
+        deadline = time.time() + self._timeout
+        while token and time.time() < deadline:
+            result = self._cache.get('draalcore_flight_{}_{}'.format(key, token))
+            if result is not None:
+                return result, True
+
+            if self._cache.get(lock_key) != token:
+                # Lock holder finished, check the result one more time
+                result = self._cache.get('draalcore_flight_{}_{}'.format(key, token))
+                if result is not None:
+                    return result, True
+                break
+
+            time.sleep(self._poll_interval)
+
+        # Lock holder failed or timed out, execute locally
+        return fn(), False
+
+
+class SharedResponse(object):
+    """
+    Picklable snapshot of view response that is shared with waiting requests. ReST framework
+    responses are stored unrendered so that each request finalizes and renders its own response.
+    """
+
+    def __init__(self, status, headers, data=None, content=None, rest=False):
+        self.status = status
+        self.headers = headers
+        self.data = data
+        self.content = content
+        self.rest = rest
+
+    @classmethod
+    def create(cls, response):
+        """Return snapshot of response, None if response is streamed and thus cannot be shared."""
+        if getattr(response, 'streaming', False):
+            return None
+
+        headers = list(response.items())
+        if isinstance(response, Response):
+            return cls(response.status_code, headers, data=response.data, rest=True)
+
+        return cls(response.status_code, headers, content=response.content)
+
+    def response(self):
+        """Return new HTTP response from the snapshot."""
+        if self.rest:
+            response = Response(self.data, status=self.status)
+        else:
+            response = HttpResponse(self.content, status=self.status)
+
+        for key, value in self.headers:
+            response[key] = value
+
+        return response
+
+
+def request_key(request):
+    """
+    Return coalescing key for HTTP request. Key consists of request path, normalized
+    URL parameters, response media type and authenticated user.
+    """
+    user = getattr(request, 'user', None)
+    scope = user.pk if user is not None and user.is_authenticated else 'anonymous'
+    params = sorted((key, tuple(values)) for key, values in request.GET.lists())
+    media_type = getattr(request, 'accepted_media_type', '')
+    data = repr((request.method, request.path, params, media_type, scope))
+    return hashlib.md5(data.encode('utf-8')).hexdigest()
+
+
+process_flight = SingleFlight()
+cache_flight = CacheSingleFlight()
+
+
+def get_flight(mode):
+    """Return single-flight implementation for specified mode ('process' or 'cache'), None if disabled."""
+    return {'process': process_flight, 'cache': cache_flight}.get(mode)
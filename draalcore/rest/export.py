@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Streaming export of model data"""
+
+# System imports
+import io
+import abc
+import csv
+import json
+import zlib
+import logging
+from rest_framework.utils.encoders import JSONEncoder
+
+
+logger = logging.getLogger(__name__)
+
+
+class ExportWriter(abc.ABC):
+    """Base class for export format writers."""
+
+    content_type = None
+    extension = None
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def header(self):
+        return ''
+
+    @abc.abstractmethod
+    def rows(self, items):
+        """Return serialized items as string."""
+
+
+class CsvExportWriter(ExportWriter):
+    """CSV export, nested values are written as JSON."""
+
+    content_type = 'text/csv'
+    extension = 'csv'
+
+    def _format(self, value):
+        if value is None:
+            return ''
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, cls=JSONEncoder)
+        return value
+
+    def _write(self, rows):
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerows(rows)
+        return buf.getvalue()
+
+    def header(self):
+        return self._write([self.fields])
+
+    def rows(self, items):
+        return self._write([[self._format(item.get(field)) for field in self.fields] for item in items])
+
+
+class NdjsonExportWriter(ExportWriter):
+    """Newline delimited JSON export, one item per line."""
+
+    content_type = 'application/x-ndjson'
+    extension = 'ndjson'
+
+    def rows(self, items):
+        return ''.join(json.dumps(item, cls=JSONEncoder) + '\n' for item in items)
+
+
+EXPORT_WRITERS = {
+    'csv': CsvExportWriter,
+    'ndjson': NdjsonExportWriter
+}
+
+
+class ExportStream(object):
+    """
+    Iterable that serializes queryset in chunks. Only primary keys are streamed from the database
+    using queryset.iterator(), model items are fetched (including related data) chunk by chunk
+    so memory usage stays constant regardless of the queryset size and the ordering is retained.
+
+    Attributes
+    ----------
+    queryset
+       Data to export.
+    serializer
+       Serializer class for the model data.
+    writer
+       ExportWriter instance.
+    compress
+       If True, output is gzip compressed on the fly.
+    chunk_size
+       Number of model items to serialize at a time.
+    """
+
+    def __init__(self, queryset, serializer, writer, compress=False, chunk_size=500):
+        self.queryset = queryset
+        self.serializer = serializer
+        self.writer = writer
+        self.compress = compress
+        self.chunk_size = chunk_size
+
+    def _fetch(self, ids):
+        items = {obj.pk: obj for obj in self.queryset.filter(pk__in=ids)}
+        return [items[pk] for pk in ids if pk in items]
+
+    def _serialize(self, ids):
+        data = self.serializer(self._fetch(ids), fields=self.writer.fields, many=True).data
+        return self.writer.rows(data)
+
+    def chunks(self):
+        """Yield export data as strings."""
+        yield self.writer.header()
+
+        ids = []
+        for pk in self.queryset.values_list('pk', flat=True).iterator(chunk_size=self.chunk_size):
+            ids.append(pk)
+            if len(ids) >= self.chunk_size:
+                yield self._serialize(ids)
+                ids = []
+
+        if ids:
+            yield self._serialize(ids)
+
+    def __iter__(self):
+        if not self.compress:
+            for chunk in self.chunks():
+                if chunk:
+                    yield chunk.encode('utf-8')
+            return
+
+        # gzip container format
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in self.chunks():
+            data = compressor.compress(chunk.encode('utf-8'))
+            if data:
+                yield data
+
+        yield compressor.flush()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Server-Sent Events feed for model changes"""
+
+# System imports
+import json
+import time
+import logging
+from django.conf import settings
+from django.db import connections
+from django.http import StreamingHttpResponse
+
+# Project imports
+from .handlers import GetMixin, RestAPIBasicAuthView
+from .response_data import ResponseData
+from draalcore.rest.model import ModelContainer
+from draalcore.exceptions import DataParsingError
+from draalcore.models.changes import get_broker, change_channel
+
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeFeed(object):
+    """
+    Change notification stream in Server-Sent Events format.
+
+    Attributes
+    ----------
+    channel
+       Broker channel.
+    last_id
+       ID of the last event that listener has received.
+    heartbeat
+       Interval in seconds for heartbeat comments when no events are available.
+    duration
+       Maximum duration of the stream in seconds, client reconnects using the ID of the last received event.
+    """
+
+    RETRY_MS = 3000
+
+    def __init__(self, channel, last_id, heartbeat, duration, broker=None):
+        self.channel = channel
+        self.last_id = last_id
+        self.heartbeat = heartbeat
+        self.duration = duration
+        self.broker = broker or get_broker()
+
+    @staticmethod
+    def format_event(event_id, event):
+        return 'id: {}\nevent: change\ndata: {}\n\n'.format(event_id, json.dumps(event))
+
+    def __iter__(self):
+        # Stream may stay open for long time, do not reserve database connection for it
+        connections.close_all()
+
+        yield 'retry: {}\n\n'.format(self.RETRY_MS)
+
+        deadline = time.time() + self.duration
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+
+            events = self.broker.wait(self.channel, self.last_id, min(self.heartbeat, remaining))
+            if not events:
+                yield ': heartbeat\n\n'
+
+            for event_id, event in events:
+                self.last_id = event_id
+                yield self.format_event(event_id, event)
+
+
+class ModelFeedMixin(GetMixin):
+    """
+    ReST mixin for streaming change notifications (create, edit and delete) of model as
+    Server-Sent Events. Event ID of the last received event can be specified using
+    Last-Event-ID header or 'last_event_id' URL parameter, by default only new events are streamed.
+    Items changed in bulk (import, upsert) are reported using single event per chunk that lists the
+    item IDs in 'ids' instead of 'id'.
+    """
+
+    def _last_event_id(self, request_obj, channel):
+        value = request_obj.request.META.get('HTTP_LAST_EVENT_ID', request_obj.url_params.get('last_event_id'))
+        if value is None:
+            return get_broker().last_id(channel)
+
+        try:
+            return int(value)
+        except ValueError:
+            raise DataParsingError('Invalid event ID {}'.format(value))
+
+    def _get(self, request_obj):
+        model_cls = ModelContainer(request_obj.kwargs['app'], request_obj.kwargs['model']).model_cls
+        channel = change_channel(model_cls)
+
+        feed = ChangeFeed(channel, self._last_event_id(request_obj, channel),
+                          getattr(settings, 'DRAALCORE_CHANGE_FEED_HEARTBEAT', 15),
+                          getattr(settings, 'DRAALCORE_CHANGE_FEED_DURATION', 300))
+
+        response = StreamingHttpResponse(feed, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return ResponseData(response)
+
+
+class ModelFeedHandler(ModelFeedMixin, RestAPIBasicAuthView):
+    """ReST API handler for model change notifications"""
+    pass
@@ -3,7 +3,7 @@
 """ReST API handlers"""
 
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, post_save, pre_save
 from django.dispatch import receiver
 from rest_framework.authtoken.models import Token
 
@@ -11,10 +11,11 @@ from rest_framework.authtoken.models import Token
 from draalcore.rest.request_data import RequestData  # noqa
 from draalcore.exceptions import AppException  # noqa
 from draalcore.rest.response_data import ResponseData  # noqa
-from draalcore.rest.mixins import GetMixin, PostMixin, DeleteMixin, PutMixin, PatchMixin  # noqa
-from draalcore.rest.auth import RestAuthentication, SessionNoCSRFAuthentication  # noqa
+from draalcore.rest.mixins import GetMixin, PostMixin, DeleteMixin, PutMixin, PatchMixin, AsyncGetMixin, AsyncPostMixin  # noqa
+from draalcore.rest.auth import RestAuthentication, SessionNoCSRFAuthentication, expire_user_token, expire_request_token, invalidate_user_token  # noqa
 from draalcore.rest.file_upload import FileUploadHandler  # noqa
 from draalcore.rest.views import api_response, AppActionsPermission, RestAPIBaseView, RestAPINoAuthView, RestAPIBasicAuthView  # noqa
+from draalcore.rest.views import AsyncRestAPIBaseView, AsyncRestAPINoAuthView, AsyncRestAPIBasicAuthView  # noqa
 
 
 @receiver(post_save, sender=get_user_model())
@@ -22,3 +23,37 @@ def create_auth_token(sender, instance=None, created=False, **kwargs):
     """Generate authentication token for new user"""
     if created:
         Token.objects.create(user=instance)
+
+
+@receiver(post_init, sender=get_user_model())
+def remember_password(sender, instance, **kwargs):
+    """Remember password of the user for change detection, deferred password is not loaded"""
+    if 'password' in instance.__dict__:
+        instance._draalcore_password = instance.password
+
+
+@receiver(pre_save, sender=get_user_model())
+def expire_auth_token_on_password_change(sender, instance, update_fields=None, **kwargs):
+    """Invalidate authentication token of user whose password changes"""
+    if instance.pk and (update_fields is None or 'password' in update_fields):
+        password = getattr(instance, '_draalcore_password', None)
+        if password is None:
+            # Password was not loaded with the user
+            password = sender._default_manager.filter(pk=instance.pk).values_list('password', flat=True).first()
+
+        if password is not None and password != instance.password:
+            expire_user_token(instance)
+
+
+@receiver(post_save, sender=get_user_model())
+def update_password(sender, instance, **kwargs):
+    """Saved password is the reference for next change detection"""
+    if 'password' in instance.__dict__:
+        instance._draalcore_password = instance.password
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_auth_token_on_deactivation(sender, instance, created=False, **kwargs):
+    """Cached token details of deactivated user are no longer used"""
+    if not created and not instance.is_active:
+        invalidate_user_token(instance)
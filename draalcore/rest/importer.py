@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Streaming import of model data"""
+
+# System imports
+import abc
+import csv
+import json
+import codecs
+import logging
+
+# Project imports
+from draalcore.exceptions import DataParsingError
+from draalcore.models.fields import IntegerFieldType, IntegerListFieldType
+
+
+logger = logging.getLogger(__name__)
+
+
+class ImportReader(abc.ABC):
+    """
+    Base class for import format readers. Reader yields (row number, field values) tuples,
+    field values are DataParsingError instance if the row could not be parsed.
+
+    Attributes
+    ----------
+    fileobj
+       Uploaded file object, read line by line.
+    fields
+       Model field items, keyed by field name.
+    """
+
+    encoding = 'utf-8'
+
+    def __init__(self, fileobj, fields):
+        self.fileobj = fileobj
+        self.fields = fields
+
+    def lines(self):
+        return codecs.iterdecode(self.fileobj, self.encoding)
+
+    @abc.abstractmethod
+    def rows(self):
+        """Yield (row number, field values) tuples."""
+
+    def __iter__(self):
+        return self.rows()
+
+
+class CsvImportReader(ImportReader):
+    """
+    CSV input, first line contains field names. Empty values are omitted, integer values are
+    converted from text and list values are given either as JSON or comma separated values.
+    """
+
+    encoding = 'utf-8-sig'
+
+    def _convert(self, field, value):
+        if field.type is None:
+            return value
+
+        try:
+            if issubclass(field.type, IntegerListFieldType):
+                if value.startswith('['):
+                    return json.loads(value)
+                return [int(item) for item in value.split(',')]
+
+            if issubclass(field.type, IntegerFieldType):
+                return int(value)
+        except ValueError:
+            # Type validation reports the error
+            pass
+
+        return value
+
+    def rows(self):
+        reader = csv.DictReader(self.lines())
+        for values in reader:
+            row = {}
+            for name, value in values.items():
+                if name in self.fields and value not in (None, ''):
+                    row[name] = self._convert(self.fields[name], value)
+
+            yield reader.line_num, row
+
+
+class NdjsonImportReader(ImportReader):
+    """Newline delimited JSON input, one item per line."""
+
+    def rows(self):
+        for line_num, line in enumerate(self.lines(), 1):
+            if not line.strip():
+                continue
+
+            try:
+                yield line_num, json.loads(line)
+            except ValueError as e:
+                yield line_num, DataParsingError('Invalid JSON data: {}'.format(e))
+
+
+IMPORT_READERS = {
+    'csv': CsvImportReader,
+    'ndjson': NdjsonImportReader
+}
@@ -32,6 +32,16 @@ class DeleteMixin(object):
         return self._execute(request, *args, **kwargs)
 
 
+class AsyncGetMixin(object):
+    async def get(self, request, *args, **kwargs):
+        return await self._execute(request, *args, **kwargs)
+
+
+class AsyncPostMixin(object):
+    async def post(self, request, *args, **kwargs):
+        return await self._execute(request, *args, **kwargs)
+
+
 class FactoryDeleteMixin(DeleteMixin):
     def _delete(self, request_obj):
         fn = getattr(self.factory, 'call_' + request_obj.method)
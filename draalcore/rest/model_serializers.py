@@ -11,6 +11,7 @@ from django.contrib.admin.models import LogEntry
 # Project imports
 from .actions import ActionsSerializer
 from .base_serializers import DynamicFieldsModelSerializer
+from draalcore.models.models import HistoryEvent, HISTORY_EVENTS, history_store
 
 
 logger = logging.getLogger(__name__)
@@ -98,6 +99,8 @@ class HistorySerializer(ModelSerializer):
         fields = ['modified_by', 'last_modified', 'events']
 
     def field_modified_by(self, obj):
+        if obj.user is None:
+            return None
         return obj.user.first_name + ' ' + obj.user.last_name if obj.user.first_name else obj.user.username
 
     def field_last_modified(self, obj):
@@ -108,3 +111,18 @@ class HistorySerializer(ModelSerializer):
             return json.loads(obj.change_message)
         except ValueError:
             return obj.change_message
+
+
+class HistoryEventSerializer(HistorySerializer):
+    """Serialize model change history stored to HistoryEvent, output is the same as for HistorySerializer."""
+
+    class Meta(HistorySerializer.Meta):
+        model = HistoryEvent
+
+    def field_events(self, obj):
+        return obj.changes
+
+
+def history_serializer():
+    """Return serializer class for the history storage defined by settings."""
+    return HistoryEventSerializer if history_store() == HISTORY_EVENTS else HistorySerializer
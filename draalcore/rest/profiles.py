@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Listing and download of request profiles stored by the profiling middleware"""
+
+# System imports
+import json
+from django.http import HttpResponse
+from django.urls import reverse
+from rest_framework.permissions import IsAdminUser
+
+# Project imports
+from draalcore.exceptions import DataParsingError
+from draalcore.middleware.profile import ProfileStore, collapsed_stacks
+from draalcore.rest.handlers import GetMixin, RestAPIBasicAuthView
+from draalcore.rest.response_data import ResponseData
+
+__author__ = "Juha Ojanpera"
+__copyright__ = "Copyright 2021"
+__email__ = "juha.ojanpera@gmail.com"
+__status__ = "Development"
+
+
+class ProfilesHandler(GetMixin, RestAPIBasicAuthView):
+    """
+    List stored profiles or download single profile, staff users only. Download format is
+    selected using 'profile_format' URL parameter: 'speedscope' (default) or 'collapsed'.
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    def _get(self, request_obj):
+        store = ProfileStore()
+
+        profile_id = request_obj.kwargs.get('profile_id')
+        if profile_id is None:
+            items = store.list()
+            for item in items:
+                item['url'] = reverse('rest-api-profile', kwargs={'profile_id': item['id']})
+            return ResponseData(items)
+
+        data = store.load(profile_id)
+        if data is None:
+            raise DataParsingError('Profile {} not found'.format(profile_id))
+
+        profile_format = request_obj.url_params.get('profile_format', 'speedscope')
+        if profile_format == 'collapsed':
+            response = HttpResponse(collapsed_stacks(data), content_type='text/plain')
+            filename = '{}.collapsed.txt'.format(profile_id)
+        elif profile_format == 'speedscope':
+            response = HttpResponse(json.dumps(data), content_type='application/json')
+            filename = '{}.speedscope.json'.format(profile_id)
+        else:
+            raise DataParsingError('Unsupported profile format {}'.format(profile_format))
+
+        response['Content-Disposition'] = 'attachment; filename="{}"'.format(filename)
+        return ResponseData(response)
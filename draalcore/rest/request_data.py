@@ -3,6 +3,7 @@
 """HTTP request data class"""
 
 import logging
+from django.utils.datastructures import MultiValueDict
 
 
 logger = logging.getLogger(__name__)
@@ -17,8 +18,14 @@ class RequestData(object):
         self._request = request
         self._queryset = None
 
+        # Background job (ActionJob) under which the request is executed, None for HTTP requests
+        self.job = None
+
         try:
-            self._data_params = request.data.copy()
+            # Uploaded files are not copied (those are available via request.FILES)
+            files = getattr(request, 'FILES', None)
+            has_files = isinstance(files, MultiValueDict) and len(files) > 0
+            self._data_params = request.POST.copy() if has_files else request.data.copy()
         except AttributeError:
             self._data_params = {}
 
@@ -15,24 +15,49 @@ from draalcore.rest.actions import (ModelActionHandler,
                                     AppActionHandler,
                                     ActionsListingHandler,
                                     AppPublicActionHandler,
+                                    AsyncModelActionHandler,
+                                    AsyncAppActionHandler,
+                                    AsyncAppPublicActionHandler,
                                     ActionsPublicListingHandler,
                                     SystemAppsPublicListingHandler,
                                     SystemAppsListingHandler)
+from draalcore.rest.batch import BatchHandler
+from draalcore.rest.background import ActionJobHandler
+from draalcore.rest.profiles import ProfilesHandler
+from draalcore.rest.feed import ModelFeedHandler
 
 
 prefix = getattr(settings, 'DRAALCORE_REST_SYSTEM_BASE_PREFIX', 'apps')
 app_prefix = '{}/(?P<app>[A-Za-z0-9\\-_]+)'.format(prefix)
 model_prefix = '{}/(?P<model>[A-Za-z0-9]+)'.format(app_prefix)
 
+# Actions are served using async views, useful under ASGI server when actions are I/O bound
+async_actions = getattr(settings, 'DRAALCORE_REST_ASYNC_ACTIONS', False)
+model_action_handler = AsyncModelActionHandler if async_actions else ModelActionHandler
+app_action_handler = AsyncAppActionHandler if async_actions else AppActionHandler
+app_public_action_handler = AsyncAppPublicActionHandler if async_actions else AppPublicActionHandler
+
 
 urlpatterns = [
 
+    url(r'{}/jobs/(?P<job_id>[0-9a-fA-F\-]+)$'.format(prefix),
+        ActionJobHandler.as_view(),
+        name='rest-api-job'),
+
+    url(r'{}/profiles/(?P<profile_id>[0-9T\-a-f]+)$'.format(prefix),
+        ProfilesHandler.as_view(),
+        name='rest-api-profile'),
+
+    url(r'{}/profiles$'.format(prefix),
+        ProfilesHandler.as_view(),
+        name='rest-api-profiles'),
+
     url(r'{}/(?P<id>\d+)/actions/(?P<action>[A-Za-z0-9\-]+)$'.format(model_prefix),
-        ModelActionHandler.as_view(),
+        model_action_handler.as_view(),
         name='rest-api-model-id-action'),
 
     url(r'{}/actions/(?P<action>[A-Za-z0-9\-]+)$'.format(model_prefix),
-        ModelActionHandler.as_view(),
+        model_action_handler.as_view(),
         name='rest-api-model-action'),
 
     url(r'{}/(?P<id>\d+)/actions$'.format(model_prefix),
@@ -51,12 +76,16 @@ urlpatterns = [
         ActionsListingHandler.as_view(),
         name='rest-api-model-actions-listing'),
 
+    url(r'{}/feed$'.format(model_prefix),
+        ModelFeedHandler.as_view(),
+        name='rest-api-model-feed'),
+
     url(r'{}/meta$'.format(model_prefix),
         BaseSerializerModelMetaHandler.as_view(),
         name='rest-api-model-meta'),
 
     url(r'{}/public-actions/(?P<action>[A-Za-z0-9\-]+)$'.format(app_prefix),
-        AppPublicActionHandler.as_view(),
+        app_public_action_handler.as_view(),
         {'noauth': True},
         name='rest-api-app-public-action'),
 
@@ -66,7 +95,7 @@ urlpatterns = [
         name='rest-api-app-public-actions-listing'),
 
     url(r'{}/actions/(?P<action>[A-Za-z0-9\-]+)$'.format(app_prefix),
-        AppActionHandler.as_view(),
+        app_action_handler.as_view(),
         name='rest-api-app-action'),
 
     url(r'{}/actions$'.format(app_prefix),
@@ -77,6 +106,10 @@ urlpatterns = [
         BaseSerializerHandler.as_view(),
         name='rest-api-model'),
 
+    url(r'{}/batch$'.format(prefix),
+        BatchHandler.as_view(),
+        name='rest-api-batch'),
+
     url(r'{}/public$'.format(prefix),
         SystemAppsPublicListingHandler.as_view(),
         name='rest-api-public'),
@@ -4,33 +4,81 @@
 
 # System imports
 import logging
+import datetime
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
 # Project imports
 from .req_query import QueryRequest
 from draalcore.factory import Factory
-from draalcore.rest.model_serializers import HistorySerializer
+from draalcore.exceptions import DataParsingError
+from draalcore.rest.model_serializers import history_serializer
 from draalcore.rest.serializer_object import SerializerDataItemObject, SerializerPaginatorMixin
 
 
 logger = logging.getLogger(__name__)
 
 
+def parse_timestamp(value):
+    """Parse ISO 8601 date or datetime, date refers to the end of the day."""
+    try:
+        timestamp = parse_datetime(value)
+        if timestamp is None:
+            date = parse_date(value)
+            timestamp = datetime.datetime.combine(date, datetime.time.max) if date else None
+    except ValueError:
+        timestamp = None
+
+    if timestamp is None:
+        raise DataParsingError('Invalid timestamp {}'.format(value))
+
+    return timezone.make_aware(timestamp) if timezone.is_naive(timestamp) else timestamp
+
+
 class SerializerDataItemHistoryObject(SerializerPaginatorMixin, SerializerDataItemObject):
     """
     Base class for serializing model data item history. The class fetches history for model
-    based on its ID.
+    based on its ID. If 'as_of' URL parameter is present, the state of model item at that
+    point in time is returned instead.
     """
 
     has_history = True
 
+    # URL parameter for point-in-time state
+    as_of_tag = 'as_of'
+
     @classmethod
     def create(cls, request_obj, model_cls):
         obj = cls(request_obj)
         obj.factory = Factory(model_cls.objects)
-        obj.serializer = HistorySerializer
+        obj.serializer = history_serializer()
         return obj
 
+    @property
+    def _is_as_of(self):
+        return self.as_of_tag in self.params
+
     def get_request_object(self):
         """Request queryset that returns the model changes/events"""
+        if self._is_as_of:
+            return QueryRequest(method='model_as_of', is_factory=True,
+                                query_kwargs={'model_id': self.data_id,
+                                              'timestamp': parse_timestamp(self.params[self.as_of_tag])})
+
         return QueryRequest(method='model_history', is_factory=True,
                             query_kwargs={'model_id': self.data_id})
+
+    def serialize(self):
+        if self._is_as_of:
+            self._query = self.get_queryset()
+            return self
+
+        return super(SerializerDataItemHistoryObject, self).serialize()
+
+    @property
+    def data(self):
+        """Return serialized data"""
+        if self._is_as_of:
+            return {'id': self.data_id, self.as_of_tag: self.params[self.as_of_tag], 'state': self._query}
+
+        return super(SerializerDataItemHistoryObject, self).data
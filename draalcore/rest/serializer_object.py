@@ -5,8 +5,10 @@
 # System imports
 import logging
 from math import floor
+from django.conf import settings
 from django.db.models.query import QuerySet
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger, Page
+from collections.abc import Sequence
+from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 
 # Project imports
 from .req_query import QueryRequest
@@ -241,6 +243,47 @@ class SerializerSearchMixin(object):
         return query
 
 
+class SerializerDeltaMixin(object):
+    """
+    Delta sync of model data. If URL contains 'since' parameter, only items that have changed after
+    the specified cursor are serialized. Output contains the changed items, IDs of removed items, cursor
+    for the next call and indication whether more changes are available. Use 'since=0' for the initial
+    sync. Search and pagination parameters are not applied in delta mode. Changes made within the
+    last DRAALCORE_SYNC_LAG seconds may be reported again on the next call.
+    """
+
+    since_tag = 'since'
+
+    @property
+    def _is_delta(self):
+        return self.since_tag in self.params
+
+    def serialize(self):
+        if not self._is_delta:
+            return super(SerializerDeltaMixin, self).serialize()
+
+        kwargs = {
+            'cursor': self.params[self.since_tag],
+            'limit': getattr(settings, 'DRAALCORE_SYNC_PAGE_SIZE', 500)
+        }
+        self._changes = self.factory.do_query(QueryRequest(method='get_data_changes', query_kwargs=kwargs)).query
+        self._query = self._changes['items']
+        return self
+
+    @property
+    def data(self):
+        data = super(SerializerDeltaMixin, self).data
+        if not self._is_delta:
+            return data
+
+        return {
+            'items': data,
+            'deleted': self._changes['deleted'],
+            'cursor': self._changes['cursor'],
+            'more': self._changes['more']
+        }
+
+
 class BaseSerializerObject(object):
     """
     Base class that defines data query and related serialization. Requires that factory,
@@ -370,8 +413,8 @@ class BaseSerializerObject(object):
     def get_request_object(self):
         return getattr(self, '_' + self.kwargs.get('fn', 'default_query'))()
 
-    def serialize(self):
-        """Define the queryset for data serialization"""
+    def get_queryset(self):
+        """Return the queryset for data serialization, search is applied but not pagination"""
 
         # Query specification
         req_obj = self.get_request_object()
@@ -387,8 +430,11 @@ class BaseSerializerObject(object):
             if hasattr(self, '_post_query'):
                 query = self._post_query(query)
 
-        self._query = query
+        return query
 
+    def serialize(self):
+        """Define the queryset for data serialization"""
+        self._query = self.get_queryset()
         return self
 
     @property
@@ -399,7 +445,8 @@ class BaseSerializerObject(object):
             return self._query
 
         # Base data serialization
-        many = True if isinstance(self._query, (QuerySet, Page)) else False
+        # Lists of items include paginator pages, sliced data and merged model history
+        many = True if isinstance(self._query, (QuerySet, Sequence)) else False
         data = self.serializer(self._query, fields=self.get_fields, many=many).data
 
         # Custom field data serialization
@@ -412,10 +459,11 @@ class BaseSerializerObject(object):
         return data
 
 
-class SerializerDataObject(SerializerPaginatorMixin,
+class SerializerDataObject(SerializerDeltaMixin,
+                           SerializerPaginatorMixin,
                            SerializerSearchMixin,
                            BaseSerializerObject):
-    """Base class for model data serialization with search and pagination support"""
+    """Base class for model data serialization with delta sync, search and pagination support"""
     pass
 
 
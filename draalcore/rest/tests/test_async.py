@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Async view tests"""
+
+# System imports
+import json
+import asyncio
+import importlib
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.test import AsyncClient
+from django.test.utils import override_settings
+from django.urls import reverse, resolve, clear_url_caches
+from django.contrib.auth.models import User
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+# Project imports
+from draalcore.test_utils.basetest import BaseTest, BaseTestUser
+from draalcore.test_apps.test_models.tests.utils.mixins import TestModelMixin
+from draalcore.rest.mixins import AsyncGetMixin, AsyncPostMixin
+from draalcore.rest.views import AsyncRestAPIBaseView, AsyncRestAPINoAuthView
+from draalcore.rest.actions import (BaseAction, AsyncModelActionHandler, AsyncAppActionHandler, AsyncAppPublicActionHandler,
+                                    execute_action, execute_action_async)
+from draalcore.rest.response_data import ResponseData
+from draalcore.middleware.current_user import get_current_user, set_current_user
+
+
+class AsyncView(AsyncGetMixin, AsyncPostMixin, AsyncRestAPINoAuthView):
+    """View with coroutine and synchronous method implementations"""
+
+    async def _get(self, request_obj):
+        await asyncio.sleep(0)
+        return ResponseData({'method': 'get'})
+
+    def _post(self, request_obj):
+        return ResponseData({'method': 'post', 'users': User.objects.count()})
+
+
+class AsyncAuthView(AsyncGetMixin, AsyncRestAPIBaseView):
+    """View requiring authentication"""
+
+    async def _get(self, request_obj):
+        return ResponseData({'user': get_current_user().username})
+
+
+class AsyncAction(BaseAction):
+    async def execute(self):
+        await asyncio.sleep(0)
+        return {'user': get_current_user()}
+
+
+class SyncAction(BaseAction):
+    def execute(self):
+        return {'user': get_current_user()}
+
+
+class AsyncViewTestCase(BaseTest):
+    """Async ReST API views."""
+
+    def basetest_initialize(self):
+        self.factory = APIRequestFactory()
+
+    def test_async_view(self):
+        """Coroutine and synchronous method implementations are supported"""
+
+        # GIVEN async view
+        view = AsyncView.as_view()
+        self.assertTrue(asyncio.iscoroutinefunction(view))
+
+        # WHEN HTTP GET is executed
+        response = async_to_sync(view)(self.factory.get('/'))
+
+        # THEN coroutine implementation is executed
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['method'], 'get')
+
+        # ----------
+
+        # WHEN HTTP POST is executed
+        response = async_to_sync(view)(self.factory.post('/', {}, format='json'))
+
+        # THEN synchronous implementation is executed
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'method': 'post', 'users': 0})
+
+        # ----------
+
+        # WHEN unsupported HTTP method is executed
+        response = async_to_sync(view)(self.factory.put('/', {}, format='json'))
+
+        # THEN it should fail
+        self.assertEqual(response.status_code, 405)
+
+    def test_async_view_authentication(self):
+        """Authentication and current user in async view"""
+
+        view = AsyncAuthView.as_view()
+
+        # GIVEN unauthenticated request
+        # WHEN view is executed
+        response = async_to_sync(view)(self.factory.get('/'))
+
+        # THEN it should fail
+        self.assertEqual(response.status_code, 401)
+
+        # ----------
+
+        # GIVEN authenticated request
+        user = User.objects.create_user('async-user', 'async@gmail.com', 'password')
+        request = self.factory.get('/')
+        force_authenticate(request, user=user)
+
+        # WHEN view is executed
+        response = async_to_sync(view)(request)
+
+        # THEN current user is available in the coroutine
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user'], 'async-user')
+
+    def test_action_execution(self):
+        """Synchronous and coroutine actions are executed with current user context"""
+
+        set_current_user('test-user')
+        self.addCleanup(set_current_user, None)
+
+        for action_cls in [AsyncAction, SyncAction]:
+            action_obj = action_cls(None, None)
+            self.assertEqual(execute_action(action_obj), {'user': 'test-user'})
+            self.assertEqual(async_to_sync(execute_action_async)(action_obj), {'user': 'test-user'})
+
+
+def reload_urls():
+    """Reload ReST URLs so that handlers are selected according to current settings."""
+    for name in ('draalcore.rest.rest_urls', 'draalcore.rest.urls', settings.ROOT_URLCONF):
+        importlib.reload(importlib.import_module(name))
+    clear_url_caches()
+
+
+class AsyncActionHandlerTestCase(TestModelMixin, BaseTestUser):
+    """Actions are served using async handlers when DRAALCORE_REST_ASYNC_ACTIONS is enabled."""
+
+    def initialize(self):
+        super(AsyncActionHandlerTestCase, self).initialize()
+
+        # URLs are restored after settings
+        self.addCleanup(reload_urls)
+        test_settings = override_settings(DRAALCORE_REST_ASYNC_ACTIONS=True)
+        test_settings.enable()
+        self.addCleanup(test_settings.disable)
+        reload_urls()
+
+        self.async_client = AsyncClient()
+        self.async_client.force_login(self.user)
+
+    def _call(self, method, name, client=None, **kwargs):
+        url = reverse(name, kwargs=kwargs)
+        client = client or self.async_client
+
+        async def request():
+            if method == 'post':
+                return await client.post(url, json.dumps({}), content_type='application/json')
+            return await client.get(url)
+
+        return async_to_sync(request)(), resolve(url).func.view_class
+
+    def test_model_action(self):
+        """Model actions are executed using async handler"""
+
+        kwargs = {'app': self.app_label, 'model': self.model_name2}
+
+        # WHEN executing model action using HTTP GET
+        response, handler = self._call('get', 'rest-api-model-action', action='get', **kwargs)
+
+        # THEN it should succeed
+        self.assertEqual(handler, AsyncModelActionHandler)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'data': 'dcba'})
+
+        # ----------
+
+        # WHEN executing model action using HTTP POST
+        response, _ = self._call('post', 'rest-api-model-action', action='create-new', **kwargs)
+
+        # THEN it should succeed
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'data': 'abcd'})
+
+        # ----------
+
+        # WHEN executing model action using unsupported HTTP method
+        response, _ = self._call('get', 'rest-api-model-action', action='create-new', **kwargs)
+
+        # THEN it should fail
+        self.assertEqual(response.status_code, 400)
+
+    def test_app_action(self):
+        """Application actions are executed using async handlers"""
+
+        # WHEN executing application action
+        response, handler = self._call('post', 'rest-api-app-action', app='admin', action='create-new')
+
+        # THEN it should succeed
+        self.assertEqual(handler, AsyncAppActionHandler)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
+
+        # AND unsupported HTTP method fails
+        response, _ = self._call('get', 'rest-api-app-action', app='admin', action='create-new')
+        self.assertEqual(response.status_code, 400)
+
+        # ----------
+
+        # GIVEN unauthenticated user
+        client = AsyncClient()
+
+        # WHEN executing application action
+        response, _ = self._call('post', 'rest-api-app-action', client=client, app='admin', action='create-new')
+
+        # THEN it should fail
+        self.assertEqual(response.status_code, 401)
+
+        # WHEN executing public application action
+        response, handler = self._call('post', 'rest-api-app-public-action', client=client, app='admin',
+                                       action='admin-public-action')
+
+        # THEN it should succeed
+        self.assertEqual(handler, AsyncAppPublicActionHandler)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), 'Ok')
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Request coalescing tests"""
+
+# System imports
+import time
+import threading
+from mock import patch
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework import exceptions
+from rest_framework.test import APIRequestFactory
+
+# Project imports
+from draalcore.exceptions import AppException
+from draalcore.test_utils.basetest import BaseTest
+from draalcore.rest.mixins import GetMixin
+from draalcore.rest.views import RestAPINoAuthView
+from draalcore.rest.response_data import ResponseData
+from draalcore.rest.coalesce import SingleFlight, CacheSingleFlight, process_flight
+
+
+class CountingView(GetMixin, RestAPINoAuthView):
+    """View that counts query executions and waits until other requests are in-flight"""
+
+    coalesce_get = 'process'
+    executions = 0
+    expected_waiting = 0
+
+    def _get(self, request_obj):
+        CountingView.executions += 1
+
+        deadline = time.time() + 5
+        while process_flight.waiting() < self.expected_waiting and time.time() < deadline:
+            time.sleep(0.01)
+
+        return ResponseData({'count': CountingView.executions})
+
+
+class FailingView(CountingView):
+    """View that raises the specified error once other requests are in-flight"""
+
+    error = None
+
+    def _get(self, request_obj):
+        super(FailingView, self)._get(request_obj)
+        raise self.error
+
+
+class CookieView(GetMixin, RestAPINoAuthView):
+    """View that sets cookie to the response"""
+
+    coalesce_get = 'process'
+
+    def _get(self, request_obj):
+        response = HttpResponse('cookie')
+        response.set_cookie('draalcore', 'value')
+        return ResponseData(response)
+
+
+class SingleFlightTestCase(BaseTest):
+    """Single-flight execution."""
+
+    def _run_concurrently(self, count, target):
+        threads = [threading.Thread(target=target) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_concurrent_requests(self):
+        """Concurrent identical GET requests execute the query only once."""
+
+        # GIVEN N concurrent identical requests
+        count = 8
+        CountingView.executions = 0
+        CountingView.expected_waiting = count - 1
+        view = CountingView.as_view()
+        responses = []
+
+        def request():
+            responses.append(view(APIRequestFactory().get('/coalesce?b=2&a=1')).render())
+
+        # WHEN requests are executed
+        with patch.object(CountingView, 'finalize_response', autospec=True,
+                          side_effect=RestAPINoAuthView.finalize_response) as finalize:
+            self._run_concurrently(count, request)
+
+        # THEN query is executed only once
+        self.assertEqual(CountingView.executions, 1)
+
+        # AND each response is finalized once
+        self.assertEqual(finalize.call_count, count)
+
+        # AND all callers receive the same rendered response
+        self.assertEqual(len(responses), count)
+        for response in responses:
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, b'{"count":1}')
+
+        # ----------
+
+        # WHEN request is made after in-flight request completed
+        CountingView.expected_waiting = 0
+        response = view(APIRequestFactory().get('/coalesce?a=1&b=2')).render()
+
+        # THEN query is executed again
+        self.assertEqual(CountingView.executions, 2)
+        self.assertEqual(response.content, b'{"count":2}')
+
+    def test_leader_response(self):
+        """Request executing the query receives its original response."""
+
+        # WHEN request is executed by the leader
+        response = CookieView.as_view()(APIRequestFactory().get('/cookie'))
+
+        # THEN response cookies are retained
+        self.assertEqual(response.content, b'cookie')
+        self.assertEqual(response.cookies['draalcore'].value, 'value')
+
+    def test_error_shared(self):
+        """Error of the in-flight call is raised for all callers."""
+        flight = SingleFlight()
+
+        def fn():
+            raise ValueError('failure')
+
+        self.assertRaises(ValueError, lambda: flight.do('key', fn))
+        self.assertEqual(flight.waiting(), 0)
+
+        # ----------
+
+        view = FailingView.as_view()
+        for error, status_code in [(AppException('Invalid request'), 400), (exceptions.NotFound(), 404)]:
+            # GIVEN concurrent identical requests whose execution fails
+            count = 4
+            CountingView.executions = 0
+            CountingView.expected_waiting = count - 1
+            FailingView.error = error
+            responses = []
+
+            def request():
+                responses.append(view(APIRequestFactory().get('/failing')).render())
+
+            # WHEN requests are executed
+            self._run_concurrently(count, request)
+
+            # THEN failing query is executed only once
+            self.assertEqual(CountingView.executions, 1)
+
+            # AND all callers receive the status of the leader, each within its own rendered response
+            self.assertEqual([response.status_code for response in responses], [status_code] * count)
+            self.assertEqual(len(set(id(response) for response in responses)), count)
+            for response in responses:
+                self.assertEqual(response.content, responses[0].content)
+                self.assertEqual(response['Content-Type'], 'application/json')
+
+    def test_cache_flight(self):
+        """Cache based single-flight shares result of lock holder."""
+        cache.clear()
+        flight = CacheSingleFlight(poll_interval=0.01, timeout=5)
+
+        # GIVEN lock is free
+        # WHEN executing the function
+        # THEN result is computed
+        self.assertEqual(flight.do('key', lambda: 'value'), ('value', False))
+
+        # ----------
+
+        # GIVEN lock is held by another process
+        cache.add('draalcore_flight_lock_key2', 'token', 5)
+
+        def publish():
+            time.sleep(0.05)
+            cache.set('draalcore_flight_key2_token', 'shared', 5)
+
+        thread = threading.Thread(target=publish)
+        thread.start()
+
+        # WHEN executing the function
+        result = flight.do('key2', lambda: 'local')
+        thread.join()
+
+        # THEN result of the lock holder is returned
+        self.assertEqual(result, ('shared', True))
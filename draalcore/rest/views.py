@@ -3,21 +3,24 @@
 """Base views, permissions and response definitions for ReST API"""
 
 # System imports
+import asyncio
 import logging
+import functools
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.http.response import HttpResponseBase
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import BasePermission, IsAuthenticated
-from rest_framework.authentication import (SessionAuthentication,
-                                           BasicAuthentication,
-                                           TokenAuthentication)
+from rest_framework.authentication import SessionAuthentication, BasicAuthentication
 
 # Project imports
 from draalcore.exceptions import AppException
 from draalcore.rest.request_data import RequestData
 from draalcore.rest.response_data import ResponseData
-from draalcore.rest.auth import RestAuthentication
+from draalcore.rest.auth import RestAuthentication, CachedTokenAuthentication
+from draalcore.rest.coalesce import get_flight, request_key, SharedResponse
 from draalcore.middleware.current_user import CurrentUserMiddleware
 
 
@@ -75,9 +78,46 @@ class RestAPIBaseView(APIView):
     """ReST API base class with token and session authentication"""
 
     permission_classes = (IsAuthenticated, AppActionsPermission,)
-    authentication_classes = (TokenAuthentication, SessionAuthentication,)
+    authentication_classes = (CachedTokenAuthentication, SessionAuthentication,)
+
+    # Coalescing of identical concurrent HTTP GET requests: 'process' (within process),
+    # 'cache' (across processes using cache lock) or None (disabled). If not set, value
+    # is read from DRAALCORE_REST_COALESCE_GET setting.
+    coalesce_get = None
 
     def _execute(self, request, *args, **kwargs):
+        if request.method == 'GET':
+            flight = get_flight(self.coalesce_get or getattr(settings, 'DRAALCORE_REST_COALESCE_GET', None))
+            if flight:
+                return self._execute_coalesced(flight, request, *args, **kwargs)
+
+        return self._execute_request(request, *args, **kwargs)
+
+    def _execute_coalesced(self, flight, request, *args, **kwargs):
+        """
+        Execute request so that identical in-flight requests share the response. Shared response
+        is not finalized, dispatch() of each request finalizes and renders its own response.
+        """
+        leader_response = []
+
+        def execute():
+            response = self._execute_request(request, *args, **kwargs)
+            leader_response.append(response)
+            return SharedResponse.create(response)
+
+        data, shared = flight.do(request_key(request), execute)
+
+        # Leader keeps its original response (cookies and other attributes are not part of the snapshot)
+        if leader_response:
+            return leader_response[0]
+
+        # Streamed responses are not shared
+        if data is None:
+            return self._execute_request(request, *args, **kwargs)
+
+        return data.response()
+
+    def _execute_request(self, request, *args, **kwargs):
         try:
             try:
                 # Assign current user for other modules to use
@@ -106,7 +146,7 @@ class RestAPINoAuthView(RestAPIBaseView):
 class RestAPIBasicAuthView(RestAPIBaseView):
     """ReST API base class with token, session, and basic auth authentication"""
 
-    authentication_classes = (TokenAuthentication, SessionAuthentication,
+    authentication_classes = (CachedTokenAuthentication, SessionAuthentication,
                               RestAuthentication, BasicAuthentication,)
 
     def get_authenticate_header(self, request):
@@ -120,3 +160,87 @@ class RestAPIBasicAuthView(RestAPIBaseView):
         now authenticated).
         """
         return self.authentication_classes[2]().authenticate_header(request)
+
+
+class AsyncViewMixin(object):
+    """
+    Async request processing for ReST API views. Authentication, permission checks and other
+    synchronous (database) operations are executed in worker thread while the HTTP method
+    implementation (_get, _post, etc) may be declared as coroutine. Synchronous method
+    implementations are executed in worker thread.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+
+        async def async_view(request, *args, **kwargs):
+            return await view(request, *args, **kwargs)
+
+        # Keep CSRF exemption and view class details of the original view
+        functools.update_wrapper(async_view, view)
+        return async_view
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def _execute(self, request, *args, **kwargs):
+        try:
+            try:
+                # Assign current user for other modules to use
+                CurrentUserMiddleware(None).process_request(request)
+
+                # Get HTTP method
+                fn = getattr(self, '_' + request.method.lower())
+            except AttributeError:
+                msg = 'Implementation missing for %s' % (request.method)
+                return api_response(ResponseData(message=msg))
+
+            # Execute HTTP method and return response
+            req_data = RequestData(request, *args, **kwargs)
+            if asyncio.iscoroutinefunction(fn):
+                response = await fn(req_data)
+            else:
+                response = await sync_to_async(fn)(req_data)
+
+            return api_response(response)
+
+        except AppException as e:
+            return api_response(ResponseData(message=e.args[0]))
+
+
+class AsyncRestAPIBaseView(AsyncViewMixin, RestAPIBaseView):
+    """Async ReST API base class with token and session authentication"""
+    pass
+
+
+class AsyncRestAPINoAuthView(AsyncViewMixin, RestAPINoAuthView):
+    """Async ReST API base class that requires no authentication"""
+    pass
+
+
+class AsyncRestAPIBasicAuthView(AsyncViewMixin, RestAPIBasicAuthView):
+    """Async ReST API base class with token, session, and basic auth authentication"""
+    pass
@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+In-process scheduler for periodic maintenance jobs.
+
+Jobs are registered using periodic_job decorator, typically in 'jobs' module of an application
+(discovered by autodiscover()). Any number of workers may run the scheduler, each job run is
+coordinated through the code lock factory: the worker that acquires the job lock (with lease)
+becomes leader for that run and executes the job only if it is due according to the run details
+shared via PeriodicJobState model. Random jitter is added to the check times so that workers
+do not contend for the locks at the same moment.
+"""
+
+# System imports
+import time
+import random
+import logging
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+# Project imports
+from draalcore.code_lock import lock_factory
+from draalcore.exceptions import LockTimeoutError
+from draalcore.models.models import PeriodicJobState
+
+__author__ = "Juha Ojanpera"
+__copyright__ = "Copyright 2021"
+__email__ = "juha.ojanpera@gmail.com"
+__status__ = "Development"
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob(object):
+    """
+    Periodic job.
+
+    Parameters
+    ----------
+    name
+       Unique job name.
+    func
+       Callable executing the job, return value is logged.
+    interval : float
+       Minimum time between runs in seconds.
+    jitter : float
+       Maximum random delay in seconds added to the scheduled check time.
+    lease : float
+       Job lock lease in seconds, by default the interval.
+    """
+
+    def __init__(self, name, func, interval, jitter=0, lease=None):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.lease = lease or interval
+
+    def __repr__(self):
+        return '%s(%s, %s)' % (self.__class__.__name__, self.name, self.interval)
+
+    def __call__(self):
+        return self.func()
+
+    @property
+    def lock_id(self):
+        return 'periodic-job:{}'.format(self.name)
+
+    def delay(self):
+        """Return random jitter delay."""
+        return random.uniform(0, self.jitter) if self.jitter else 0
+
+
+class JobRegistry(object):
+    """Registered periodic jobs keyed by job name."""
+
+    def __init__(self):
+        self._jobs = {}
+
+    def register(self, job):
+        if job.name in self._jobs:
+            logger.debug('Replacing periodic job {}'.format(job.name))
+        self._jobs[job.name] = job
+
+    def unregister(self, name):
+        self._jobs.pop(name, None)
+
+    def get(self, name):
+        return self._jobs.get(name)
+
+    def __iter__(self):
+        return iter(list(self._jobs.values()))
+
+    def __len__(self):
+        return len(self._jobs)
+
+
+registry = JobRegistry()
+
+
+def periodic_job(interval, name=None, jitter=0, lease=None):
+    """
+    Decorator for registering function as periodic job, see PeriodicJob for the parameters.
+    Job name defaults to dotted path of the function.
+
+    Examples
+    --------
+    @periodic_job(interval=3600, jitter=60)
+    def rebuild_caches():
+        ...
+    """
+    def decorator(func):
+        job_name = name or '{}.{}'.format(func.__module__, func.__name__)
+        registry.register(PeriodicJob(job_name, func, interval, jitter=jitter, lease=lease))
+        return func
+
+    return decorator
+
+
+def autodiscover():
+    """Import 'jobs' module of installed applications so that their periodic jobs get registered."""
+    autodiscover_modules('jobs')
+
+
+class JobMetrics(object):
+    """Run duration metrics per job name."""
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _item(self, name):
+        return self._stats.setdefault(name, {
+            'runs': 0, 'failures': 0, 'skipped': 0, 'last_duration': None, 'total_duration': 0.0, 'max_duration': 0.0
+        })
+
+    def record(self, name, duration, success):
+        """Record job run that took specified number of seconds."""
+        with self._lock:
+            item = self._item(name)
+            item['runs'] += 1
+            item['failures'] += 0 if success else 1
+            item['last_duration'] = duration
+            item['total_duration'] += duration
+            item['max_duration'] = max(item['max_duration'], duration)
+
+    def record_skipped(self, name):
+        """Record job check where job was run by other worker."""
+        with self._lock:
+            self._item(name)['skipped'] += 1
+
+    def stats(self, name=None):
+        """Return copy of metrics of specified job or all jobs keyed by job name."""
+        with self._lock:
+            if name is not None:
+                return dict(self._item(name))
+            return {key: dict(value) for key, value in self._stats.items()}
+
+
+class JobScheduler(object):
+    """
+    Run periodic jobs.
+
+    Parameters
+    ----------
+    jobs : list
+       PeriodicJob objects, by default all registered jobs.
+    locker : MutexHandler
+       Lock handler used for leader election, by default the code lock factory.
+    """
+
+    def __init__(self, jobs=None, locker=None):
+        self.jobs = list(registry) if jobs is None else list(jobs)
+        self.locker = locker or lock_factory
+        self._metrics = JobMetrics()
+
+        # Local check time (monotonic clock) per job name
+        self._checks = {}
+
+    def run_job(self, job, force=False):
+        """
+        Run job if this worker becomes leader for the run and job is due.
+
+        Parameters
+        ----------
+        job : PeriodicJob
+           Job to run.
+        force
+           If True, job is run even if it is not due.
+
+        Returns
+        -------
+        tuple
+           True if job was executed by this worker and number of seconds until the job is due next.
+        """
+        try:
+            lock = self.locker.acquire(job.lock_id, timeout=0, lease=job.lease)
+        except LockTimeoutError:
+            # Another worker is running the job
+            self._metrics.record_skipped(job.name)
+            return False, job.interval
+
+        try:
+            state, _ = PeriodicJobState.objects.get_or_create(name=job.name)
+            now = timezone.now()
+            if not force and state.last_run:
+                remaining = (state.last_run + timedelta(seconds=job.interval) - now).total_seconds()
+                if remaining > 0:
+                    self._metrics.record_skipped(job.name)
+                    return False, remaining
+
+            # Claim the run before executing so that the job is not repeated if the lease expires. The
+            # claim is committed on its own and fails if another worker has claimed the run meanwhile.
+            claimed = PeriodicJobState.objects.filter(pk=state.pk, last_run=state.last_run).update(last_run=now)
+            if not claimed:
+                self._metrics.record_skipped(job.name)
+                return False, job.interval
+            state.last_run = now
+
+            start = time.monotonic()
+            error = None
+            try:
+                result = job()
+                logger.info('Periodic job {} done: {}'.format(job.name, result))
+            except Exception as err:
+                error = err
+                logger.exception('Periodic job {} failed'.format(job.name))
+
+            duration = time.monotonic() - start
+            if not self.locker.is_held(lock):
+                logger.warning('Periodic job {} exceeded its lease of {} seconds'.format(job.name, job.lease))
+
+            state.last_duration = duration
+            state.runs += 1
+            if error is not None:
+                state.failures += 1
+                state.last_error = repr(error)
+            state.save(update_fields=['last_duration', 'runs', 'failures', 'last_error'])
+
+            self._metrics.record(job.name, duration, error is None)
+            return True, job.interval
+        finally:
+            self.locker.release(lock)
+
+    def run_pending(self):
+        """Check jobs whose check time has passed, return number of executed jobs."""
+        executed = 0
+        for job in self.jobs:
+            if time.monotonic() < self._checks.get(job.name, 0):
+                continue
+
+            # Failure of single job check (e.g. database error) does not stop checking the other jobs
+            try:
+                ran, next_due = self.run_job(job)
+            except Exception:
+                logger.exception('Periodic job {} check failed'.format(job.name))
+                ran, next_due = False, min(job.interval, getattr(settings, 'DRAALCORE_SCHEDULER_POLL_INTERVAL', 30))
+
+            self._checks[job.name] = time.monotonic() + next_due + job.delay()
+            executed += 1 if ran else 0
+
+        return executed
+
+    def next_check(self):
+        """Return number of seconds until next job check."""
+        now = time.monotonic()
+        return max(min([self._checks.get(job.name, 0) - now for job in self.jobs] or [0]), 0)
+
+    def run_forever(self, stop_event=None, poll_interval=None):
+        """
+        Run jobs until stop event is set.
+
+        Parameters
+        ----------
+        stop_event : threading.Event
+           Scheduler is stopped when set.
+        poll_interval : float
+           Maximum sleep time between job checks, by default as defined by DRAALCORE_SCHEDULER_POLL_INTERVAL setting.
+        """
+        stop_event = stop_event or threading.Event()
+        poll_interval = poll_interval or getattr(settings, 'DRAALCORE_SCHEDULER_POLL_INTERVAL', 30)
+
+        logger.info('Periodic job scheduler started with {} jobs'.format(len(self.jobs)))
+        while not stop_event.is_set():
+            self.run_pending()
+            stop_event.wait(min(self.next_check(), poll_interval))
+
+        logger.info('Periodic job scheduler stopped')
+
+    def metrics(self, name=None):
+        """Return run duration metrics, see JobMetrics.stats()."""
+        return self._metrics.stats(name)
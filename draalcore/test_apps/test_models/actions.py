@@ -5,7 +5,7 @@
 # Project imports
 from draalcore.exceptions import ActionError
 from draalcore.rest.actions import CreateAction, AbstractModelGetAction, AbstractModelItemGetAction
-from .models import TestModel, TestModel2
+from .models import TestModel, TestModel2, TestModel6
 
 
 class CreateNewAction(CreateAction):
@@ -35,3 +35,16 @@ class GetAction2(AbstractModelItemGetAction):
 
     def _execute(self, model_obj):
         raise ActionError(['error1', 'error2'])
+
+
+class BackgroundAction(CreateAction):
+    ACTION = 'background'
+    MODEL = TestModel6
+    BACKGROUND = True
+
+    def _execute(self):
+        self.report_progress(50, 'Half way')
+        if self.request_obj.data_params.get('fail'):
+            raise ActionError(['failed'])
+
+        return self.model_cls.objects.create(name=self.request_obj.data_params['name'])
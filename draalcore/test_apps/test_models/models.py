@@ -6,6 +6,7 @@
 from django.db import models
 
 # Project imports
+from draalcore.cache.cache import cached
 from draalcore.models.base_model import BaseModel, ModelLogger, ModelBaseManager
 from draalcore.models.fields import (AppModelCharField, AppModelForeignKey, AppModelManyToManyField,
                                      AppModelTextField, AppModelForeignObjectKey)
@@ -26,7 +27,7 @@ class TestModel(ModelLogger):
 
     name = AppModelCharField(mandatory=True, max_length=256, blank=True, null=True)
 
-    class Meta:
+    class Meta(ModelLogger.Meta):
         db_table = 'testmodel'
 
     def __str__(self):
@@ -50,6 +51,14 @@ class TestModel2Manager(ModelBaseManager):
     def public_call(self, query, kwargs):
         return query
 
+    @cached(ttl=60, tags=['test-tag'])
+    def public_cached(self, query, kwargs):
+        return query.filter(name__startswith=kwargs.get('prefix', ''))
+
+    @cached(ttl=60)
+    def cached_names(self, prefix):
+        return [item.name for item in self.filter(name__startswith=prefix).order_by('id')]
+
 
 class TestModel2(ModelLogger):
     """Simple test model that can be accessed also externally (e.g., via ReST API)"""
@@ -84,7 +93,7 @@ class TestModel2(ModelLogger):
 
     objects = TestModel2Manager()
 
-    class Meta:
+    class Meta(ModelLogger.Meta):
         db_table = 'testmodel2'
 
     def __str__(self):
@@ -120,7 +129,7 @@ class TestModel4(ModelLogger):
 
     name = AppModelCharField(optional=True, max_length=256, blank=True, null=True)
 
-    class Meta:
+    class Meta(ModelLogger.Meta):
         db_table = 'testmodel4'
 
     def __str__(self):
@@ -137,7 +146,7 @@ class TestModel5(ModelLogger):
 
     name = AppModelCharField(optional=True, max_length=256, blank=True, null=True)
 
-    class Meta:
+    class Meta(ModelLogger.Meta):
         db_table = 'testmodel5'
 
     def __str__(self):
@@ -161,5 +170,5 @@ class TestModel6(ModelLogger):
 
     objects = TestModel6Manager()
 
-    class Meta:
+    class Meta(ModelLogger.Meta):
         db_table = 'testmodel6'
@@ -48,7 +48,7 @@ class ModelActionsTestCase(TestModelMixin, BaseTestUser):
         self.assertTrue(response.success)
 
         # AND correct actions are returned
-        self.assertEqual(set(response.data.keys()), set(['create', 'create-new']))
+        self.assertEqual(set(response.data.keys()), set(['create', 'create-new', 'import']))
 
         # AND action items return correct data fields
         for item in response.data:
@@ -64,7 +64,7 @@ class ModelActionsTestCase(TestModelMixin, BaseTestUser):
         self.assertTrue(response.success)
 
         # AND correct actions are returned
-        self.assertEqual(set(response.data.keys()), set(['create', 'create-new', 'get']))
+        self.assertEqual(set(response.data.keys()), set(['create', 'create-new', 'import', 'get', 'export', 'history']))
 
         # ----------
 
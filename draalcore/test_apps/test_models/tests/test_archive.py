@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Model history archival tests"""
+
+# System imports
+import os
+import shutil
+import tempfile
+from io import StringIO
+from datetime import timedelta
+from django.utils import timezone
+from django.core.management import call_command
+from django.test.utils import override_settings
+
+# Project imports
+from ..models import TestModel2
+from .utils.mixins import TestModelMixin
+from draalcore.models.archive import archive_history
+from draalcore.models.models import HistoryArchiveIndex, HistorySnapshot, history_model
+from draalcore.test_utils.basetest import BaseTestUser
+
+
+class HistoryArchiveTestCase(TestModelMixin, BaseTestUser):
+    """Old history events are moved to compressed segment files"""
+
+    def setUp(self):
+        super(HistoryArchiveTestCase, self).setUp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+        settings = override_settings(DRAALCORE_HISTORY_ARCHIVE_ROOT=self.root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def _create_history(self, name, count):
+        obj = TestModel2.objects.create(name=name, model1=self.obj1)
+        for index in range(count - 1):
+            obj.set_values(comments='{}{}'.format(name, index))
+        return obj
+
+    def _age_events(self, obj, days):
+        obj.get_events().update(action_time=timezone.now() - timedelta(days=days))
+
+    def _history(self, obj, **kwargs):
+        response = self.api.history(self.app_label, self.model_name2, obj.id, params=kwargs)
+        self.assertTrue(response.success)
+        return response.data
+
+    def _archive(self, **kwargs):
+        out = StringIO()
+        call_command('archive_history', stdout=out, **kwargs)
+        return out.getvalue()
+
+    def test_archive(self):
+        """Events older than retention window are archived"""
+
+        # GIVEN model items with old and recent events
+        obj = self._create_history('archive', 5)
+        other = self._create_history('other', 2)
+        self._age_events(obj, 400)
+        self._age_events(other, 400)
+        history = self._history(obj)
+        obj.set_values(comments='recent')
+
+        # WHEN archiving the events
+        output = self._archive(days=365)
+
+        # THEN old events are moved to single segment file
+        self.assertTrue('Done, 7 events of 2 items archived' in output)
+        self.assertEqual(obj.get_events().count(), 1)
+        self.assertEqual(other.get_events().count(), 0)
+        self.assertEqual(len(os.listdir(self.root)), 1)
+        self.assertEqual(HistoryArchiveIndex.objects.filter(object_id=obj.id).get().count, 5)
+
+        # AND archived events are included in model history
+        data = self._history(obj)
+        self.assertEqual(len(data), 6)
+        self.assertEqual(data[0]['events'], [{'comments': ['archive3', 'recent']}])
+        self.assertEqual(data[1:], history)
+
+        # ----------
+
+        # WHEN archiving again
+        # THEN nothing is archived
+        self.assertTrue('Done, 0 events of 0 items archived' in self._archive())
+
+    def test_archive_paging(self):
+        """History pages are served from hot and archived events"""
+
+        # GIVEN model item with events archived in two runs
+        obj = self._create_history('paging', 4)
+        self._age_events(obj, 20)
+        archive_history(timezone.now() - timedelta(days=10))
+
+        obj.set_values(comments='second')
+        obj.set_values(comments='third')
+        self._age_events(obj, 5)
+        archive_history(timezone.now() - timedelta(days=1))
+
+        obj.set_values(comments='hot')
+        self.assertEqual(HistoryArchiveIndex.objects.filter(object_id=obj.id).count(), 2)
+
+        # WHEN requesting pages of the history
+        page1 = self._history(obj, draw=1, start=0, length=2)
+        page2 = self._history(obj, draw=1, start=2, length=2)
+        page3 = self._history(obj, draw=1, start=4, length=4)
+
+        # THEN events are returned in order, newest first
+        self.assertEqual(page1['recordsTotal'], 7)
+        events = [item['events'][0] for item in page1['aaData'] + page2['aaData'] + page3['aaData']]
+        self.assertEqual(len(events), 7)
+        self.assertEqual(events[0], {'comments': ['third', 'hot']})
+        self.assertEqual(events[1], {'comments': ['second', 'third']})
+        self.assertEqual(events[3], {'comments': ['paging1', 'paging2']})
+        self.assertEqual(events[-1]['name'], ['Created value paging'])
+
+        # AND modifying user is available also for archived events
+        self.assertEqual(page3['aaData'][-1]['modified_by'], 'user user')
+
+        # ----------
+
+        # WHEN limiting the history to archived range only
+        data = self._history(obj, start=5, length=10)
+
+        # THEN remaining events are returned
+        self.assertEqual(len(data), 2)
+        self.assertEqual(data[0]['events'], [{'comments': ['None', 'paging0']}])
+
+    @override_settings(DRAALCORE_HISTORY_STORE='history', DRAALCORE_HISTORY_SNAPSHOT_INTERVAL=2)
+    def test_archive_history_store(self):
+        """Events of history model are archived"""
+
+        # GIVEN old events in history model
+        obj = self._create_history('store', 3)
+        self._age_events(obj, 30)
+        history = self._history(obj)
+
+        # WHEN archiving the events
+        stats = archive_history(timezone.now() - timedelta(days=10))
+
+        # THEN events are moved from history model
+        self.assertEqual(stats['events'], 3)
+        self.assertFalse(history_model().objects.filter(object_id=obj.id).exists())
+
+        # AND history is unchanged
+        self.assertEqual(self._history(obj), history)
+
+        # AND state snapshots are written before archival
+        self.assertEqual(stats['snapshots'], 1)
+        self.assertEqual(HistorySnapshot.objects.filter(object_id=obj.id).count(), 1)
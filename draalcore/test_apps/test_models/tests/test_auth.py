@@ -3,11 +3,16 @@
 
 # Project imports
 import base64
-from rest_framework import HTTP_HEADER_ENCODING
+import datetime
+from mock import patch
+from django.contrib.auth import SESSION_KEY
+from django.test.utils import override_settings
+from rest_framework import HTTP_HEADER_ENCODING, exceptions
 from rest_framework.authtoken.models import Token
 
 # System imports
 from .test_upload import FileUploadMixin
+from draalcore.rest.auth import CachedTokenAuthentication, refresh_user_token, token_cache
 from draalcore.test_utils.basetest import BaseTestUser
 
 
@@ -18,6 +23,161 @@ class TokenAPITestCase(BaseTestUser):
         """Token is created for new user"""
         self.assertEqual(len(Token.objects.get(user=self.user).key), 40)
 
+    def _age_token(self, days):
+        token = Token.objects.get(user=self.user)
+        token.created -= datetime.timedelta(days=days)
+        token.save(update_fields=['created'])
+        token_cache.delete(token.key)
+        return token
+
+    def test_cached_token_authentication(self):
+        """Token details are cached after first authentication"""
+
+        key = Token.objects.get(user=self.user).key
+        auth = CachedTokenAuthentication()
+
+        # GIVEN token has been validated once
+        self.assertEqual(auth.authenticate_credentials(key), (self.user, key))
+
+        # WHEN token is validated again
+        # THEN no database queries are needed
+        with self.assertNumQueries(0):
+            user, _ = auth.authenticate_credentials(key)
+        self.assertEqual(user, self.user)
+
+        # ----------
+
+        # WHEN user object of the request is modified
+        user.backend = 'custom-backend'
+
+        # THEN other requests using the same token are not affected
+        other_user, _ = auth.authenticate_credentials(key)
+        self.assertIsNot(other_user, user)
+        self.assertFalse(hasattr(other_user, 'backend'))
+
+        # ----------
+
+        # WHEN in-process cache is not available
+        token_cache._local.clear()
+
+        # THEN user is read from database without token lookup
+        with self.assertNumQueries(1):
+            user, _ = auth.authenticate_credentials(key)
+        self.assertEqual(user, self.user)
+
+    def test_token_expiry(self):
+        """Expired token is rejected and renewed on next token retrieval"""
+
+        # GIVEN token that has expired
+        token = self._age_token(15)
+
+        # WHEN token is validated
+        # THEN it should fail
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            CachedTokenAuthentication().authenticate_credentials(token.key)
+
+        # ----------
+
+        # WHEN token is retrieved for the user
+        new_token = refresh_user_token(self.user)
+
+        # THEN new token is created
+        self.assertNotEqual(new_token.key, token.key)
+        self.assertEqual(CachedTokenAuthentication().authenticate_credentials(new_token.key)[0], self.user)
+
+    def test_token_refresh(self):
+        """Token is refreshed only when more than half of its lifetime has passed"""
+
+        # GIVEN fresh token
+        token = self._age_token(1)
+
+        # WHEN token is retrieved
+        # THEN token is not modified
+        self.assertEqual(refresh_user_token(self.user).created, token.created)
+
+        # ----------
+
+        # GIVEN token that is about to expire
+        token = self._age_token(10)
+
+        # WHEN token is retrieved
+        new_token = refresh_user_token(self.user)
+
+        # THEN token key remains but its creation time is updated
+        self.assertEqual(new_token.key, token.key)
+        self.assertGreater(new_token.created, token.created)
+
+    @override_settings(DRAALCORE_TOKEN_LIFETIME=None)
+    def test_token_no_expiry(self):
+        """Token expiry can be disabled"""
+        token = self._age_token(365)
+        self.assertEqual(refresh_user_token(self.user).created, token.created)
+        self.assertEqual(CachedTokenAuthentication().authenticate_credentials(token.key)[0], self.user)
+
+    def test_token_invalidation(self):
+        """Token is invalidated on password change and on logout of token client"""
+
+        key = Token.objects.get(user=self.user).key
+        auth = CachedTokenAuthentication()
+        auth.authenticate_credentials(key)
+
+        # WHEN user is saved without password change
+        # THEN password is not queried for change detection
+        with self.assertNumQueries(1):
+            self.user.save()
+
+        auth.authenticate_credentials(key)
+
+        # WHEN user password changes
+        self.user.set_password('new-password')
+        self.user.save()
+
+        # THEN cached token is no longer valid
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            auth.authenticate_credentials(key)
+
+        # ----------
+
+        # GIVEN token details cached in another process
+        key = refresh_user_token(self.user).key
+        auth.authenticate_credentials(key)
+        local = dict(token_cache._local)
+
+        # WHEN user is deactivated
+        self.user.is_active = False
+        self.user.save()
+        token_cache._local.update(local)
+
+        # THEN in-process details are not used
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            auth.authenticate_credentials(key)
+
+        self.user.is_active = True
+        self.user.save()
+
+        # ----------
+
+        # GIVEN new token for signed in user
+        self.client.login(username=self.username, password='new-password')
+        key = refresh_user_token(self.user).key
+        auth.authenticate_credentials(key)
+
+        # WHEN user session logs out
+        self.logout()
+
+        # THEN token remains valid for other clients
+        self.assertEqual(auth.authenticate_credentials(key)[0], self.user)
+
+        # ----------
+
+        # WHEN token client logs out
+        response = self.auth_api.logout(HTTP_AUTHORIZATION='Token {}'.format(key))
+        self.assertTrue(response.success)
+
+        # THEN token is no longer valid
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            auth.authenticate_credentials(key)
+
 
 class HttpAuthorizationTestCase(FileUploadMixin, BaseTestUser):
     """Test Basic Auth over Rest API"""
@@ -92,3 +252,50 @@ class HttpAuthorizationTestCase(FileUploadMixin, BaseTestUser):
 
         # THEN API call should fail due to missing permission
         self.assertTrue(response.forbidden)
+
+    def _basic_auth_header(self, password=None):
+        credentials = '%s:%s' % (self.username, password or self.password)
+        return base64.b64encode(credentials.encode(HTTP_HEADER_ENCODING)).decode('utf-8')
+
+    def test_credential_cache(self):
+        """Verified basic auth credentials are cached"""
+
+        # GIVEN user whose credentials have been verified
+        self.logout()
+        auth_header = self._basic_auth_header()
+        self._http_auth_call(auth_header)
+
+        # WHEN same credentials are used again
+        with patch('draalcore.rest.auth.AuthenticationForm') as mock_form:
+            response = self._http_auth_call(auth_header)
+
+            # THEN password is not verified again
+            self.assertFalse(mock_form.called)
+            self.assertTrue(response.forbidden)
+
+        # ----------
+
+        # WHEN user password changes
+        self.user.set_password('new-password')
+        self.user.save()
+
+        # THEN old credentials are rejected
+        self.assertTrue(self._http_auth_call(auth_header).unauthorized)
+
+        # AND new credentials are accepted
+        self.assertTrue(self._http_auth_call(self._basic_auth_header('new-password')).forbidden)
+
+    def test_no_session_login(self):
+        """Basic auth without session creation"""
+
+        # GIVEN session login is disabled
+        self.logout()
+        with override_settings(DRAALCORE_BASIC_AUTH_LOGIN=False):
+            # WHEN basic auth is used
+            response = self._http_auth_call(self._basic_auth_header())
+
+            # THEN authentication succeeds
+            self.assertTrue(response.forbidden)
+
+        # AND no session was created
+        self.assertFalse(SESSION_KEY in self.client.session)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Background action tests"""
+
+# System imports
+import mock
+from datetime import timedelta
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.test import TransactionTestCase
+
+# Project imports
+from ..models import TestModel6
+from .utils.mixins import TestModelMixin
+from draalcore.models.jobs import purge_action_jobs
+from draalcore.models.models import ActionJob
+from draalcore.rest import background
+from draalcore.rest.background import ThreadExecutor, run_job
+from draalcore.test_utils.basetest import BaseTestUser, create_user
+from draalcore.test_utils.rest_api import GenericAPI
+
+
+class BackgroundActionMixin(object):
+
+    def _submit(self, **data):
+        response = self.api.action(self.app_label, self.model_name6, 'background', data)
+        self.assertEqual(response.status_code, 202)
+        return response.data
+
+    def _status(self, job_id):
+        return self.api.get_call(reverse('rest-api-job', kwargs={'job_id': job_id}))
+
+
+class BackgroundActionTestCase(BackgroundActionMixin, TestModelMixin, BaseTestUser):
+    """Background actions are executed as jobs"""
+
+    def initialize(self):
+        super(BackgroundActionTestCase, self).initialize()
+        self.model_name6 = TestModel6._meta.db_table
+
+    def test_background_action(self):
+        """Action result is available from job status"""
+
+        # WHEN calling background action
+        data = self._submit(name='background')
+
+        # THEN job is created and no action is executed yet
+        self.assertEqual(data['status'], ActionJob.STATUS_PENDING)
+        self.assertEqual(data['url'], reverse('rest-api-job', kwargs={'job_id': data['id']}))
+        self.assertFalse(TestModel6.objects.filter(name='background').exists())
+
+        response = self._status(data['id'])
+        self.assertTrue(response.success)
+        self.assertEqual(response.data['status'], ActionJob.STATUS_PENDING)
+
+        # ----------
+
+        # WHEN job is executed
+        run_job(data['id'])
+
+        # THEN action result is available
+        response = self._status(data['id'])
+        self.assertEqual(response.data['status'], ActionJob.STATUS_SUCCEEDED)
+        self.assertEqual(response.data['progress'], 100)
+        self.assertEqual(response.data['message'], 'Half way')
+        self.assertEqual(response.data['result'][0]['name'], 'background')
+
+        # AND action was executed on behalf of the calling user
+        self.assertEqual(response.data['result'][0]['request_user'], self.username)
+        self.assertEqual(TestModel6.objects.get(name='background').modified_by, self.user)
+
+        # AND job is executed only once
+        run_job(data['id'])
+        self.assertEqual(TestModel6.objects.filter(name='background').count(), 1)
+
+    def test_background_action_failure(self):
+        """Action errors are available from job status"""
+
+        # GIVEN background action that fails
+        data = self._submit(name='fail', fail=1)
+
+        # WHEN job is executed
+        run_job(data['id'])
+
+        # THEN errors are reported
+        response = self._status(data['id'])
+        self.assertEqual(response.data['status'], ActionJob.STATUS_FAILED)
+        self.assertEqual(response.data['errors'], ['failed'])
+        self.assertIsNone(response.data['result'])
+
+    def test_job_access(self):
+        """Job status is available to the submitting user until the job expires"""
+
+        # GIVEN job of another user
+        data = self._submit(name='access')
+        ActionJob.objects.filter(job_id=data['id']).update(user=create_user('other', 'pw', 'other@gmail.com'))
+
+        # WHEN querying the job status
+        # THEN it should fail
+        self.assertTrue(self._status(data['id']).error)
+        self.assertTrue(self._status('abc').error)
+
+        # ----------
+
+        # GIVEN expired job
+        data = self._submit(name='expired')
+        ActionJob.objects.filter(job_id=data['id']).update(expires=timezone.now() - timedelta(seconds=1))
+
+        # WHEN querying the job status
+        # THEN it should fail
+        self.assertTrue(self._status(data['id']).error)
+
+        # AND job is removed by periodic job
+        self.assertEqual(purge_action_jobs(), 1)
+        self.assertEqual(ActionJob.objects.count(), 1)
+
+    def test_pending_limit(self):
+        """Jobs are rejected when executor is at capacity"""
+
+        # GIVEN executor that is at capacity
+        executor = ThreadExecutor(workers=1, max_pending=1)
+        executor._executor = mock.Mock()
+        self.addCleanup(setattr, background, '_executor', background._executor)
+        background._executor = executor
+        with self.captureOnCommitCallbacks(execute=True):
+            self._submit(name='first')
+
+        # WHEN submitting another job
+        response = self.api.action(self.app_label, self.model_name6, 'background', {'name': 'second'})
+
+        # THEN it should fail
+        self.assertTrue(response.error)
+        self.assertEqual(ActionJob.objects.count(), 1)
+
+    def test_pending_limit_commit(self):
+        """Executor capacity is reserved only when job is committed"""
+
+        executor = ThreadExecutor(workers=1, max_pending=1)
+        executor._executor = mock.Mock()
+        self.addCleanup(setattr, background, '_executor', background._executor)
+        background._executor = executor
+
+        # GIVEN job submission that is rolled back
+        with self.captureOnCommitCallbacks(execute=False):
+            self._submit(name='rollback')
+
+        # WHEN submitting more jobs than there is capacity
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self._submit(name='first')
+            second = self._submit(name='second')
+
+        # THEN rolled back job does not consume capacity
+        self.assertEqual(executor._executor.submit.call_count, 1)
+        self.assertEqual(self._status(first['id']).data['status'], ActionJob.STATUS_PENDING)
+
+        # AND job exceeding the capacity at commit time fails
+        data = self._status(second['id']).data
+        self.assertEqual(data['status'], ActionJob.STATUS_FAILED)
+        self.assertEqual(data['errors'], [background.PENDING_LIMIT_ERROR])
+
+
+class ThreadExecutorTestCase(BackgroundActionMixin, TransactionTestCase):
+    """Background jobs are executed by local thread pool"""
+
+    def setUp(self):
+        super(ThreadExecutorTestCase, self).setUp()
+        self.user = create_user('user', 'user-password', 'user@gmail.com')
+        self.client.login(username='user', password='user-password')
+        self.api = GenericAPI(self)
+        self.app_label = 'test_models'
+        self.model_name6 = TestModel6._meta.db_table
+
+        # Single worker as in-memory SQLite test database does not allow concurrent writers
+        self.executor = ThreadExecutor(workers=1)
+        self.addCleanup(setattr, background, '_executor', background._executor)
+        background._executor = self.executor
+
+    def test_thread_executor(self):
+        """Jobs are executed after the request returns"""
+
+        # WHEN submitting background actions
+        with transaction.atomic():
+            jobs = [self._submit(name='thread{}'.format(index)) for index in range(3)]
+
+        # THEN jobs are executed by worker thread
+        self.executor._executor.shutdown(wait=True)
+        statuses = [self._status(job['id']).data['status'] for job in jobs]
+        self.assertEqual(statuses, [ActionJob.STATUS_SUCCEEDED] * 3)
+        self.assertEqual(TestModel6.objects.filter(name__startswith='thread').count(), 3)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""ReST API batch request tests"""
+
+# System imports
+from django.urls import reverse
+
+# Project imports
+from ..models import TestModel2
+from .utils.mixins import TestModelMixin
+from draalcore.test_utils.basetest import BaseTestUser
+
+
+class BatchRequestTestCase(TestModelMixin, BaseTestUser):
+    """Several ReST API calls are executed in single request"""
+
+    def _model_url(self, name='rest-api-model', **kwargs):
+        kwargs.update({'app': self.app_label, 'model': self.model_name2})
+        return reverse(name, kwargs=kwargs)
+
+    def test_batch(self):
+        """Batch of read and write calls"""
+
+        # GIVEN batch of calls
+        requests = [
+            {'path': self._model_url()},
+            {'method': 'post', 'path': self._model_url('rest-api-model-action', action='create'),
+             'body': {'name': 'batch', 'model1': self.obj1.id}},
+            {'path': self._model_url() + '?fields=name'},
+            {'path': self._model_url('rest-api-model-id', id=9999)},
+            {'path': '/api/unknown'},
+            {'path': reverse('rest-api-batch')},
+            {'path': 'relative'}
+        ]
+
+        # WHEN batch is executed
+        response = self.api.batch(requests)
+
+        # THEN it should succeed
+        self.assertTrue(response.success)
+        data = response.data
+        self.assertEqual(len(data), len(requests))
+
+        # AND each call has its own response
+        self.assertEqual(data[0]['status'], 200)
+        self.assertEqual(len(data[0]['body']), 1)
+
+        self.assertEqual(data[1]['status'], 200)
+        self.assertEqual(data[1]['body']['name'], 'batch')
+        self.assertEqual(TestModel2.objects.get(name='batch').modified_by, self.user)
+
+        self.assertEqual(data[2]['status'], 200)
+        self.assertEqual([item['name'] for item in data[2]['body']], ['test2', 'batch'])
+
+        self.assertEqual(data[3]['status'], 400)
+        self.assertEqual(data[4]['status'], 404)
+        self.assertEqual(data[5]['status'], 400)
+        self.assertEqual(data[6]['status'], 400)
+
+    def test_batch_parallel(self):
+        """HTTP GET calls are executed concurrently"""
+
+        # GIVEN read calls to be executed concurrently
+        requests = {
+            'parallel': True,
+            'requests': [
+                {'path': self._model_url('rest-api-model-meta')},
+                {'path': self._model_url('rest-api-model-actions-listing')},
+                {'path': reverse('rest-api-app-public-actions-listing', kwargs={'app': 'auth'})}
+            ]
+        }
+
+        # WHEN batch is executed
+        response = self.api.batch(requests)
+
+        # THEN it should succeed
+        self.assertTrue(response.success)
+        self.assertEqual([item['status'] for item in response.data], [200, 200, 200])
+        self.assertTrue('create' in response.data[1]['body'])
+
+    def test_batch_parallel_session(self):
+        """Concurrently executed calls use their own session"""
+
+        url = reverse('test-session-api')
+
+        # GIVEN read calls that modify the session
+        requests = {
+            'parallel': True,
+            'requests': [
+                {'path': url + '?item1=1&common=1'},
+                {'path': url + '?item2=2&common=2'},
+                {'path': url}
+            ]
+        }
+
+        # WHEN batch is executed
+        response = self.api.batch(requests)
+
+        # THEN calls do not see session changes of other concurrent calls
+        self.assertTrue(response.success)
+        self.assertEqual(response.data[0]['body'], {'test_item1': '1', 'test_common': '1'})
+        self.assertEqual(response.data[1]['body'], {'test_item2': '2', 'test_common': '2'})
+        self.assertEqual(response.data[2]['body'], {})
+
+        # AND changes are stored to the session in call order
+        session = self.client.session
+        self.assertEqual([session.get(key) for key in ['test_item1', 'test_item2', 'test_common']], ['1', '2', '2'])
+
+    def test_batch_invalid(self):
+        """Invalid batch request"""
+
+        # GIVEN unauthenticated user
+        self.logout()
+
+        # WHEN batch is executed
+        response = self.api.batch([])
+
+        # THEN it should fail
+        self.assertTrue(response.unauthorized)
+
+        # ----------
+
+        # GIVEN authenticated user
+        self.login()
+
+        # WHEN batch data is not valid
+        for data in [{'requests': 'abcd'}, ['abcd'], [{'path': '/'}] * 51]:
+            response = self.api.batch(data)
+
+            # THEN it should fail
+            self.assertTrue(response.error)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Performance benchmarks. Benchmarks are skipped by default, run those using
+
+    DRAALCORE_BENCHMARK=1 python manage.py test draalcore.test_apps.test_models.tests.test_benchmarks
+
+Number of rows can be changed using DRAALCORE_BENCHMARK_ROWS environment variable (default 100000).
+"""
+
+# System imports
+import os
+import sys
+import time
+import unittest
+import tracemalloc
+from mock import patch
+from django.db import models
+
+# Project imports
+from ..models import TestModel, TestModel2
+from .utils.mixins import TestModelMixin
+from draalcore.test_utils.basetest import BaseTestUser
+from draalcore.middleware.current_user import acting_user
+
+BENCHMARK_ROWS = int(os.environ.get('DRAALCORE_BENCHMARK_ROWS', 100000))
+
+
+def report(name, duration, rows, memory=None):
+    details = ', peak memory {:.1f} MB'.format(memory / 2 ** 20) if memory is not None else ''
+    sys.stderr.write('\n{}: {} rows in {:.2f}s ({:.0f} rows/s){}\n'.format(name, rows, duration, rows / duration, details))
+
+
+@unittest.skipUnless(os.environ.get('DRAALCORE_BENCHMARK'), 'DRAALCORE_BENCHMARK not set')
+class ImportBenchmarkTestCase(TestModelMixin, BaseTestUser):
+    """Bulk import of model items"""
+
+    def _import(self, name, user=True, **values):
+        rows = ((index, dict(values, name='bench{}'.format(index), model1=self.obj1.id)) for index in range(BENCHMARK_ROWS))
+
+        start = time.perf_counter()
+        with acting_user(self.user if user else None):
+            result = TestModel2.objects.import_data(rows)
+
+        report(name, time.perf_counter() - start, BENCHMARK_ROWS)
+        self.assertEqual(result['created'], BENCHMARK_ROWS)
+
+    def test_import(self):
+        """Import of items having foreign key references, history event refers to the created items"""
+        self._import('import')
+
+    def test_import_no_event(self):
+        """Import of items without history event, primary keys of the created items are not needed"""
+        self._import('import without history event', user=False)
+
+    def test_import_related(self):
+        """Import of items having also many-to-many references"""
+        self._import('import with many-to-many', model3=[self.obj1.id])
+        self.assertEqual(TestModel2.model3.through.objects.count(), BENCHMARK_ROWS)
+
+
+@unittest.skipUnless(os.environ.get('DRAALCORE_BENCHMARK'), 'DRAALCORE_BENCHMARK not set')
+class HydrationBenchmarkTestCase(BaseTestUser):
+    """Loading of model items from DB"""
+
+    def _measure(self, model):
+        """Return (best of 3 load durations, peak memory) for loading all model items."""
+
+        # Memory is traced separately as tracing slows down the loading
+        durations = []
+        for _ in range(3):
+            start = time.perf_counter()
+            objs = list(model.objects.all())
+            durations.append(time.perf_counter() - start)
+            self.assertEqual(len(objs), BENCHMARK_ROWS)
+            del objs
+
+        tracemalloc.start()
+        objs = list(model.objects.all())
+        memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del objs
+
+        return min(durations), memory
+
+    def _hydrate(self, name, model):
+        model.objects.bulk_create([model(name='bench{}'.format(index)) for index in range(BENCHMARK_ROWS)], batch_size=1000)
+
+        # Baseline loads the same items without change tracking
+        with patch.object(model, 'from_db', classmethod(models.Model.from_db.__func__)):
+            base_duration, base_memory = self._measure(model)
+        report('{} without change tracking'.format(name), base_duration, BENCHMARK_ROWS, base_memory)
+
+        duration, memory = self._measure(model)
+        report(name, duration, BENCHMARK_ROWS, memory)
+        sys.stderr.write('{}: change tracking overhead {:.2f}x time, {:.2f}x memory\n'.format(
+            name, duration / base_duration, memory / base_memory))
+
+    def test_hydrate(self):
+        """Model items with change tracking compared to plain model loading, list(TestModel.objects.all())"""
+        self._hydrate('hydrate', TestModel)
@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Method result caching tests"""
+
+# System imports
+import logging
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import Count
+from django.contrib.auth.models import User
+
+# Project imports
+from ..models import TestModel, TestModel2
+from .utils.mixins import TestModelMixin
+from draalcore.factory import Factory
+from draalcore.cache.cache import MethodCache, invalidate_tags
+from draalcore.rest.req_query import QueryRequest
+from draalcore.test_utils.basetest import BaseTestUser
+
+
+logger = logging.getLogger(__name__)
+
+
+class CachedMethodTestCase(TestModelMixin, BaseTestUser):
+    """@cached decorator for manager methods."""
+
+    def initialize(self):
+        super(CachedMethodTestCase, self).initialize()
+        cache.clear()
+        self.factory = Factory(TestModel2.objects)
+
+    def _query(self, prefix='test'):
+        return self.factory.do_query(QueryRequest(method='cached_names', query_args=[prefix]))
+
+    def test_query_result_cached(self):
+        """Cached manager method result is reported as cached."""
+
+        # GIVEN manager method result is not yet cached
+        response = self._query()
+
+        # THEN result is computed
+        self.assertFalse(response.cached)
+        self.assertEqual(response.query, ['test2'])
+
+        # WHEN calling the method again with same arguments
+        with self.assertNumQueries(0):
+            response = self._query()
+
+        # THEN result is served from cache
+        self.assertTrue(response.cached)
+        self.assertEqual(response.query, ['test2'])
+
+        # ----------
+
+        # WHEN calling the method with different arguments
+        response = self._query('none')
+
+        # THEN result is computed
+        self.assertFalse(response.cached)
+        self.assertEqual(response.query, [])
+
+    def test_model_change_invalidates(self):
+        """Model changes invalidate cached results."""
+
+        # GIVEN cached result
+        self._query()
+
+        # WHEN new model item is created
+        TestModel2.objects.create(name='test3', model1=self.obj1)
+
+        # THEN result is no longer served from cache
+        response = self._query()
+        self.assertFalse(response.cached)
+        self.assertEqual(response.query, ['test2', 'test3'])
+
+        # ----------
+
+        # WHEN model item is deleted
+        self.obj2.deactivate()
+
+        # THEN result is no longer served from cache
+        response = self._query()
+        self.assertFalse(response.cached)
+        self.assertEqual(response.query, ['test3'])
+
+    def test_public_call_cached(self):
+        """Public listing method is cached."""
+
+        # GIVEN tag invalidation in place
+        invalidate_tags('test-tag')
+
+        # WHEN fetching listing data through cached public method
+        params = {'call': 'cached', 'prefix': 'test'}
+        response = self.api.GET(self.app_label, self.model_name2, params)
+
+        # THEN it should succeed
+        self.assertTrue(response.success)
+        self.assertEqual(len(response.data), 1)
+
+        # WHEN fetching the data again
+        response = self.api.GET(self.app_label, self.model_name2, params)
+
+        # THEN same data is returned
+        self.assertTrue(response.success)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['name'], 'test2')
+
+        # ----------
+
+        # GIVEN cached public method result
+        mgr = TestModel2.objects
+        mgr.public_cached(mgr.all(), {})
+
+        # WHEN result is requested again
+        query, cached = mgr.public_cached.cache_lookup(mgr, mgr.all(), {})
+
+        # THEN queryset is restored from cache
+        self.assertTrue(cached)
+        self.assertEqual([item.name for item in query], ['test2'])
+
+        # WHEN tag is invalidated
+        invalidate_tags('test-tag')
+
+        # THEN result is computed again
+        query, cached = mgr.public_cached.cache_lookup(mgr, mgr.all(), {})
+        self.assertFalse(cached)
+
+    def test_queryset_restore(self):
+        """Restored queryset matches the original queryset."""
+
+        TestModel2.objects.create(name='test3', model1=self.obj1)
+        mgr = TestModel2.objects
+        method_cache = MethodCache(lambda obj, query: query)
+
+        # GIVEN queryset with ordering and queryset with ordering cleared
+        for query in (mgr.order_by('-name'), mgr.order_by()):
+            method_cache.lookup(mgr, query)
+
+            # WHEN queryset is restored from cache
+            restored, cached = method_cache.lookup(mgr, query)
+
+            # THEN it has the same ordering setup and items
+            self.assertTrue(cached)
+            self.assertEqual(restored.query.order_by, query.query.order_by)
+            self.assertEqual(restored.query.default_ordering, query.query.default_ordering)
+            self.assertEqual(list(restored), list(query))
+
+        # ----------
+
+        # GIVEN querysets that cannot be restored from primary keys
+        queries = (mgr.annotate(count=Count('model1')), mgr.order_by('id').distinct(), mgr.order_by('id')[:1])
+        for query in queries:
+            method_cache.lookup(mgr, query)
+
+            # WHEN calling the method again
+            # THEN result is not served from cache
+            self.assertFalse(method_cache.lookup(mgr, query)[1])
+
+    def test_cache_backend(self):
+        """Results are cached and invalidated using the specified cache backend."""
+
+        backend = LocMemCache('draalcore-test', {})
+        mgr = TestModel2.objects
+        method_cache = MethodCache(lambda obj, prefix: [prefix], cache_backend=backend)
+
+        # GIVEN cached result
+        method_cache.lookup(mgr, 'test')
+        self.assertTrue(method_cache.lookup(mgr, 'test')[1])
+
+        # WHEN invalidating the result
+        method_cache.invalidate(mgr, 'test')
+
+        # THEN it is no longer served from cache
+        self.assertFalse(method_cache.lookup(mgr, 'test')[1])
+
+
+class ListingFactory(Factory):
+    cached_queries = {'get_data_listing': 60, 'get_model': 60}
+
+
+class FactoryQueryCacheTestCase(TestModelMixin, BaseTestUser):
+    """Query result caching policy of the factory."""
+
+    def initialize(self):
+        super(FactoryQueryCacheTestCase, self).initialize()
+        cache.clear()
+        self.factory = ListingFactory(TestModel2.objects)
+
+    def _listing(self):
+        return self.factory.do_query(QueryRequest(method='get_data_listing', query_kwargs={'kwargs': {}}))
+
+    def test_dependencies(self):
+        """Query dependencies are derived from select and prefetch plan."""
+        self.assertEqual(set(self.factory.query_dependencies()), set([TestModel2, TestModel, User]))
+
+    def test_listing_cached(self):
+        """Listing query result is cached until dependency changes."""
+
+        # GIVEN listing query result is not cached
+        response = self._listing()
+        self.assertFalse(response.cached)
+        self.assertEqual([item.name for item in response.query], ['test2'])
+
+        # WHEN query is repeated
+        response = self._listing()
+
+        # THEN it is served from cache
+        self.assertTrue(response.cached)
+        self.assertEqual([item.name for item in response.query], ['test2'])
+        self.assertEqual(response.query[0].model1.name, 'test')
+
+        # ----------
+
+        # WHEN related model item changes
+        self.obj1.set_values(name='test-changed')
+
+        # THEN listing is computed again
+        response = self._listing()
+        self.assertFalse(response.cached)
+        self.assertEqual(response.query[0].model1.name, 'test-changed')
+
+    def test_model_item_cached(self):
+        """Model item query result is cached."""
+
+        # GIVEN model item query
+        req_obj = QueryRequest(method='get_model', query_args=[self.obj2.id])
+        self.assertFalse(self.factory.do_query(req_obj).cached)
+
+        # WHEN query is repeated
+        response = self.factory.do_query(req_obj)
+
+        # THEN it is served from cache
+        self.assertTrue(response.cached)
+        self.assertEqual(response.query.id, self.obj2.id)
+
+    def test_uncached_query(self):
+        """Queries that are not part of the policy are not cached."""
+        req_obj = QueryRequest(method='history', query_kwargs={'model_id': self.obj2.id})
+        self.factory.do_query(req_obj)
+        self.assertFalse(self.factory.do_query(req_obj).cached)
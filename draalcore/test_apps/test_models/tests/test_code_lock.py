@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Code lock tests"""
+
+# System imports
+import time
+import shutil
+import tempfile
+import threading
+from mock import patch
+from django.db import connection, OperationalError, ProgrammingError
+from django.test import TransactionTestCase
+
+# Project imports
+from draalcore.code_lock import (MutexHandler, DatabaseLockBackend, FileLockBackend, CacheLockBackend,
+                                 AdvisoryLockBackend)
+from draalcore.exceptions import LockError, LockTimeoutError
+from draalcore.models.models import CodeLock
+
+
+class CodeLockTestCase(TransactionTestCase):
+    """Named locks using different lock backends"""
+
+    def _file_handler(self):
+        lock_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, lock_dir)
+        return MutexHandler(FileLockBackend(lock_dir))
+
+    def test_database_lock(self):
+        """Lock row is created on first use and token increases"""
+
+        handler = MutexHandler(DatabaseLockBackend())
+
+        # WHEN acquiring lock that has no lock row
+        with handler.lock('db-lock') as lock:
+            # THEN lock is acquired
+            self.assertEqual(lock.unique_id, 1)
+            self.assertTrue(handler.is_held(lock))
+
+        # AND token is incremented on each acquisition
+        with handler.lock('db-lock') as lock:
+            self.assertEqual(lock.token, 2)
+
+        self.assertEqual(CodeLock.objects.get(lock_id='db-lock').run_id, 2)
+        self.assertFalse(handler.is_held(lock))
+
+    def test_database_lock_lease(self):
+        """Database lock is held using lease instead of open transaction"""
+
+        handler = MutexHandler(DatabaseLockBackend())
+
+        # GIVEN lock with short lease
+        lock = handler.acquire('db-lease', lease=0.1)
+
+        # THEN no transaction is kept open
+        self.assertFalse(connection.in_atomic_block)
+
+        # AND lock cannot be acquired while held
+        self.assertRaises(LockTimeoutError, handler.acquire, 'db-lease', timeout=0)
+
+        # WHEN lease expires
+        time.sleep(0.15)
+
+        # THEN lock can be acquired by someone else with larger fencing token
+        other = handler.acquire('db-lease', timeout=0)
+        self.assertTrue(other.token > lock.token)
+        self.assertFalse(handler.is_held(lock))
+
+        # AND releasing the expired lock does not free the new holder's lock
+        handler.release(lock)
+        self.assertTrue(handler.is_held(other))
+
+        handler.release(other)
+        self.assertFalse(handler.is_held(other))
+
+        # ----------
+
+        # WHEN locks are released in different order than acquired
+        first = handler.acquire('db-first', timeout=0)
+        second = handler.acquire('db-second', timeout=0)
+        handler.release(first)
+        handler.release(second)
+
+        # THEN both locks are free
+        for lock_id in ['db-first', 'db-second']:
+            with handler.lock(lock_id, timeout=0):
+                pass
+
+    def test_database_lock_errors(self):
+        """Only lock contention is retried, other database errors are raised"""
+
+        handler = MutexHandler(DatabaseLockBackend())
+        target = 'draalcore.models.models.CodeLock.objects.get_or_create'
+
+        # WHEN database reports that lock is held by another transaction
+        with patch(target, side_effect=OperationalError('database is locked')):
+            # THEN lock acquisition times out
+            self.assertRaises(LockTimeoutError, handler.acquire, 'db-error', timeout=0.05)
+
+        # ----------
+
+        # WHEN database fails for other reasons
+        for err in [OperationalError('server closed the connection unexpectedly'), ProgrammingError('no such table')]:
+            with patch(target, side_effect=err):
+                # THEN error is raised without retrying
+                with self.assertRaises(err.__class__):
+                    handler.acquire('db-error', timeout=None)
+
+    def test_file_lock_contention(self):
+        """File lock is held by single thread at a time"""
+
+        # GIVEN threads running critical section using same lock
+        handler = self._file_handler()
+        state = {'active': 0, 'max_active': 0, 'tokens': []}
+
+        def worker():
+            for _ in range(3):
+                with handler.lock('file-lock', timeout=10) as lock:
+                    state['active'] += 1
+                    state['max_active'] = max(state['max_active'], state['active'])
+                    state['tokens'].append(lock.token)
+                    time.sleep(0.005)
+                    state['active'] -= 1
+
+        # WHEN threads are executed
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # THEN critical section is never entered concurrently
+        self.assertEqual(state['max_active'], 1)
+
+        # AND each acquisition received unique, increasing token
+        self.assertEqual(state['tokens'], list(range(1, 13)))
+
+        # AND contention is reported in metrics
+        metrics = handler.metrics('file-lock')
+        self.assertEqual(metrics['acquired'], 12)
+        self.assertEqual(metrics['timeouts'], 0)
+        self.assertTrue(metrics['contended'] > 0)
+
+    def test_timeout(self):
+        """Lock acquisition fails after timeout"""
+
+        # GIVEN lock that is held
+        handler = self._file_handler()
+        lock = handler.acquire('timeout-lock')
+
+        # WHEN acquiring the same lock with timeout
+        # THEN it should fail
+        with self.assertRaises(LockTimeoutError):
+            handler.acquire('timeout-lock', timeout=0.05)
+
+        metrics = handler.metrics('timeout-lock')
+        self.assertEqual(metrics['timeouts'], 1)
+        self.assertTrue(metrics['max_wait'] >= 0.05)
+
+        # ----------
+
+        # WHEN lock is released
+        handler.release(lock)
+
+        # THEN it can be acquired again
+        with handler.lock('timeout-lock', timeout=0) as lock:
+            self.assertEqual(lock.token, 2)
+
+    def test_cache_lease(self):
+        """Cache lock is freed when lease expires"""
+
+        # GIVEN lock with short lease
+        handler = MutexHandler(CacheLockBackend())
+        lock = handler.acquire('cache-lock', lease=0.1)
+        self.assertTrue(handler.is_held(lock))
+        self.assertRaises(LockTimeoutError, handler.acquire, 'cache-lock', timeout=0)
+
+        # WHEN lease expires
+        time.sleep(0.15)
+
+        # THEN lock can be acquired by someone else with larger fencing token
+        other = handler.acquire('cache-lock', timeout=0)
+        self.assertTrue(other.token > lock.token)
+        self.assertFalse(handler.is_held(lock))
+
+        # AND releasing the expired lock does not free the new holder's lock
+        handler.release(lock)
+        self.assertTrue(handler.is_held(other))
+        self.assertEqual(handler.metrics('cache-lock')['expired'], 1)
+
+        handler.release(other)
+        self.assertFalse(handler.is_held(other))
+
+    def test_advisory_lock(self):
+        """Advisory locks require PostgreSQL"""
+
+        handler = MutexHandler(AdvisoryLockBackend())
+        self.assertRaises(LockError, handler.acquire, 'advisory-lock')
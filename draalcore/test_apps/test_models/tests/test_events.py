@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Model history event writing tests"""
+
+# System imports
+import threading
+from mock import patch
+from django.db import transaction
+from django.contrib.admin.models import LogEntry
+from django.test.utils import override_settings
+
+# Project imports
+from ..models import TestModel2
+from .utils.mixins import TestModelMixin
+from draalcore.test_utils.basetest import BaseTestUser
+from draalcore.models.event_buffer import EventBuffer, event_buffer, _CommitCallback
+
+
+class EventBufferTestCase(TestModelMixin, BaseTestUser):
+    """History events are written in bulk on transaction commit"""
+
+    def _events(self, obj):
+        return list(obj.get_events().values_list('change_message', flat=True))
+
+    @override_settings(DRAALCORE_EVENT_WRITE_MODE='deferred')
+    def test_deferred_events(self):
+        """Events of transaction are written using single query on commit"""
+
+        count = LogEntry.objects.count()
+
+        # WHEN model is created and edited within transaction
+        with self.captureOnCommitCallbacks() as callbacks:
+            obj = TestModel2.objects.create(name='deferred', model1=self.obj1)
+            obj.set_values(name='deferred2')
+
+            # AND changes within rolled back save point are discarded
+            try:
+                with transaction.atomic():
+                    obj.set_values(comments='discarded')
+                    raise ValueError
+            except ValueError:
+                pass
+
+            # THEN no events are written before commit
+            self.assertEqual(LogEntry.objects.count(), count)
+
+        # AND events are written using single query on commit
+        with self.assertNumQueries(1):
+            for callback in callbacks:
+                callback()
+
+        events = self._events(obj)
+        self.assertEqual(len(events), 2)
+        self.assertTrue('deferred2' in events[0])
+
+    @override_settings(DRAALCORE_EVENT_WRITE_MODE='deferred')
+    def test_savepoint_callbacks(self):
+        """Single commit callback is registered per save point level"""
+
+        # WHEN model is edited at transaction level and within save points
+        with self.captureOnCommitCallbacks() as callbacks:
+            obj = TestModel2.objects.create(name='level', model1=self.obj1)
+
+            try:
+                with transaction.atomic():
+                    obj.set_values(comments='discarded')
+                    raise ValueError
+            except ValueError:
+                pass
+
+            with transaction.atomic():
+                obj.set_values(comments='kept')
+                obj.set_values(name='level2')
+
+            obj.set_values(name='level3')
+
+        # THEN callback of rolled back save point is not tracked anymore
+        self.assertEqual(len(event_buffer._pending()), 2)
+
+        # AND events are collected per save point level
+        callbacks = [callback for callback in callbacks if isinstance(callback, _CommitCallback)]
+        self.assertEqual([len(callback.entries) for callback in callbacks], [2, 2])
+
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(len(self._events(obj)), 4)
+
+        # ----------
+
+        # WHEN model is edited after commit callbacks have been executed
+        with self.captureOnCommitCallbacks() as callbacks:
+            obj.set_values(comments='new')
+
+        # THEN new callback is registered
+        callbacks = [callback for callback in callbacks if isinstance(callback, _CommitCallback)]
+        self.assertEqual([len(callback.entries) for callback in callbacks], [1])
+
+    @override_settings(DRAALCORE_EVENT_WRITE_MODE='async')
+    def test_async_events(self):
+        """Events are written in background thread"""
+
+        threads = []
+
+        def write(buffer, using, entries):
+            threads.append((threading.current_thread(), len(entries)))
+
+        # WHEN model is created within transaction
+        with patch.object(EventBuffer, '_write_async', write):
+            with self.captureOnCommitCallbacks(execute=True):
+                obj = TestModel2.objects.create(name='async', model1=self.obj1)
+                obj.set_values(name='async2')
+
+            event_buffer.wait()
+
+        # THEN events are written outside the request thread
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0][0], threading.current_thread())
+        self.assertEqual(threads[0][1], 2)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Model data export tests"""
+
+# System imports
+import csv
+import io
+import gzip
+import json
+from django.urls import reverse
+
+# Project imports
+from ..models import TestModel2
+from .utils.mixins import TestModelMixin
+from draalcore.test_utils.basetest import BaseTestUser
+
+
+class ModelExportTestCase(TestModelMixin, BaseTestUser):
+    """Model data is exported as stream"""
+
+    def initialize(self):
+        super(ModelExportTestCase, self).initialize()
+        TestModel2.objects.create(name='test3', model1=self.obj1)
+        TestModel2.objects.create(name='other', model1=self.obj1)
+
+    def _export(self, **params):
+        kwargs = {'app': self.app_label, 'model': self.model_name2, 'action': 'export'}
+        url = reverse('rest-api-model-action', kwargs=kwargs)
+        return self.client.get(url, params)
+
+    def _content(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_csv_export(self):
+        """Model data is exported as CSV"""
+
+        # WHEN exporting selected fields as CSV
+        response = self._export(fields='id,name,model1')
+
+        # THEN download is streamed
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="testmodel2.csv"')
+
+        # AND it contains all items
+        rows = list(csv.reader(io.StringIO(self._content(response).decode('utf-8'))))
+        self.assertEqual(rows[0], ['id', 'name', 'model1'])
+        self.assertEqual([row[1] for row in rows[1:]], ['test2', 'test3', 'other'])
+
+        # AND nested data is exported as JSON
+        self.assertEqual(json.loads(rows[1][2])['id'], self.obj1.id)
+
+    def test_ndjson_export(self):
+        """Model data is exported as gzip compressed NDJSON with search"""
+
+        # WHEN exporting search results
+        response = self._export(export_format='ndjson', compress='gzip', fields='name', sSearch='test')
+
+        # THEN compressed download is streamed
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="testmodel2.ndjson.gz"')
+
+        # AND it contains the matching items only
+        lines = gzip.decompress(self._content(response)).decode('utf-8').splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [{'name': 'test2'}, {'name': 'test3'}])
+
+    def test_export_invalid_params(self):
+        """Invalid export parameters"""
+
+        for params in [{'export_format': 'xml'}, {'compress': 'zip'}]:
+            # WHEN export parameters are not valid
+            response = self._export(**params)
+
+            # THEN it should fail
+            self.assertEqual(response.status_code, 400)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Model change notification tests"""
+
+# System imports
+import json
+import time
+import tempfile
+from mock import patch
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.test.utils import override_settings
+
+# Project imports
+from ..models import TestModel2
+from .utils.mixins import TestModelMixin
+from draalcore.exceptions import AppException
+from draalcore.middleware.current_user import acting_user
+from draalcore.test_utils.basetest import BaseTest, BaseTestUser
+from draalcore.models.changes import LocalBroker, CacheBroker, get_broker, change_channel
+
+
+class BrokerTestCase(BaseTest):
+    """Change notification brokers"""
+
+    def _test_broker(self, broker):
+        # GIVEN no events
+        self.assertEqual(broker.last_id('channel'), 0)
+
+        # WHEN waiting for events
+        start = time.time()
+        events = broker.wait('channel', 0, 0.05)
+
+        # THEN no events are returned after timeout
+        self.assertEqual(events, [])
+        self.assertGreaterEqual(time.time() - start, 0.04)
+
+        # ----------
+
+        # WHEN events are published
+        for index in range(4):
+            broker.publish('channel', {'index': index})
+
+        # THEN events are available after specified ID
+        self.assertEqual(broker.last_id('channel'), 4)
+        self.assertEqual(broker.read('channel', 2), [(3, {'index': 2}), (4, {'index': 3})])
+
+        # AND only backlog of events is retained
+        self.assertEqual([item[0] for item in broker.wait('channel', 0, 1)], [2, 3, 4])
+
+        # AND channels are separate
+        self.assertEqual(broker.read('channel2', 0), [])
+
+    def test_local_broker(self):
+        """In-process broker"""
+        self._test_broker(LocalBroker(backlog=3))
+
+    def test_cache_broker(self):
+        """Cache based broker"""
+        cache.clear()
+        self._test_broker(CacheBroker(backlog=3))
+
+        # Cache backend without atomic incr() is not supported
+        with tempfile.TemporaryDirectory() as root:
+            self.assertRaises(AppException, CacheBroker, cache_backend=FileBasedCache(root, {}))
+
+
+@patch('draalcore.models.changes._broker', LocalBroker())
+class ModelChangeFeedTestCase(TestModelMixin, BaseTestUser):
+    """Model changes are published and streamed"""
+
+    def _events(self, after_id=0):
+        return [event for _, event in get_broker().read(change_channel(TestModel2), after_id)]
+
+    def _stream(self, **kwargs):
+        response = self.api.feed(self.app_label, self.model_name2, **kwargs)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_model_notifications(self):
+        """Model creation, editing and deletion are published after commit"""
+
+        last_id = get_broker().last_id(change_channel(TestModel2))
+
+        # WHEN model is created, edited and deleted
+        with self.captureOnCommitCallbacks(execute=True):
+            obj = TestModel2.objects.create(name='feed', model1=self.obj1)
+
+            # THEN nothing is published before commit
+            self.assertEqual(self._events(last_id), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            obj.set_values(name='feed2')
+            obj.deactivate()
+
+        # THEN changes are published
+        events = self._events(last_id)
+        self.assertEqual([(item['action'], item['id']) for item in events],
+                         [('create', obj.id), ('edit', obj.id), ('delete', obj.id)])
+        self.assertEqual(events[-1]['last_modified'], obj.last_modified.isoformat())
+
+    def test_bulk_notifications(self):
+        """Bulk changes are published as single event per chunk"""
+
+        last_id = get_broker().last_id(change_channel(TestModel2))
+
+        # WHEN model items are imported in bulk
+        rows = [(index, {'name': 'bulk{}'.format(index), 'model1': self.obj1.id}) for index in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            with acting_user(self.user):
+                TestModel2.objects.import_data(rows, chunk_size=2)
+
+        # THEN one event is published per chunk
+        events = self._events(last_id)
+        self.assertEqual([(item['action'], len(item['ids'])) for item in events], [('create', 2), ('create', 1)])
+        last_id += len(events)
+
+        # ----------
+
+        # WHEN model items are created and updated in bulk
+        records = [{'name': 'bulk0', 'model1': self.obj1.id, 'comments': 'edited'}, {'name': 'bulk3', 'model1': self.obj1.id}]
+        with self.captureOnCommitCallbacks(execute=True):
+            with acting_user(self.user):
+                TestModel2.objects.upsert_many(records, ['name'])
+
+        # THEN created and updated items are published
+        obj = TestModel2.objects.get(name='bulk0')
+        events = self._events(last_id)
+        self.assertEqual([item['action'] for item in events], ['create', 'edit'])
+        self.assertEqual(events[1]['ids'], [obj.id])
+        self.assertEqual(events[1]['last_modified'], obj.last_modified.isoformat())
+
+    @override_settings(DRAALCORE_CHANGE_FEED_HEARTBEAT=0.01, DRAALCORE_CHANGE_FEED_DURATION=0.05)
+    def test_feed(self):
+        """Change notifications are streamed as Server-Sent Events"""
+
+        # GIVEN model changes
+        broker = get_broker()
+        channel = change_channel(TestModel2)
+        first_id = broker.publish(channel, {'action': 'create', 'id': 1})
+        broker.publish(channel, {'action': 'edit', 'id': 1})
+
+        # WHEN listening for new events only
+        content = self._stream()
+
+        # THEN only heartbeats are received
+        self.assertTrue(content.startswith('retry: '))
+        self.assertTrue(': heartbeat' in content)
+        self.assertFalse('event: change' in content)
+
+        # ----------
+
+        # WHEN listening is resumed from specified event
+        content = self._stream(HTTP_LAST_EVENT_ID=str(first_id))
+
+        # THEN events after the specified event are received
+        expected = 'id: {}\nevent: change\ndata: {}\n\n'.format(first_id + 1, json.dumps({'action': 'edit', 'id': 1}))
+        self.assertTrue(expected in content)
+        self.assertEqual(content.count('event: change'), 1)
+
+        # ----------
+
+        # WHEN event ID is not valid
+        response = self.api.feed(self.app_label, self.model_name2, {'last_event_id': 'abc'})
+
+        # THEN it should fail
+        self.assertEqual(response.status_code, 400)
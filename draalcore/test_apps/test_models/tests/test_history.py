@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Model history storage tests"""
+
+# System imports
+from io import StringIO
+from django.core.management import call_command
+from django.contrib.admin.models import LogEntry, CHANGE
+from django.contrib.contenttypes.models import ContentType
+from django.test.utils import override_settings
+
+# Project imports
+from ..models import TestModel2
+from .utils.mixins import TestModelMixin
+from draalcore.models.models import HistoryEvent, history_events_batch
+from draalcore.test_utils.basetest import BaseTestUser
+
+
+class HistoryStoreTestCase(TestModelMixin, BaseTestUser):
+    """Model history is stored to dedicated history model"""
+
+    def _history(self, obj):
+        response = self.api.history(self.app_label, self.model_name2, obj.id)
+        self.assertTrue(response.success)
+        return response.data
+
+    @override_settings(DRAALCORE_HISTORY_STORE='history')
+    def test_history_store(self):
+        """History events are written to and read from history model"""
+
+        # WHEN model item is created and edited
+        obj = TestModel2.objects.create(name='history', model1=self.obj1)
+        obj.set_values(name='history2')
+
+        # THEN events are stored to history model only
+        self.assertEqual(HistoryEvent.objects.filter(object_id=obj.id).count(), 2)
+        self.assertFalse(LogEntry.objects.filter(object_id=str(obj.id)).exists())
+
+        # AND history is available via API
+        data = self._history(obj)
+        self.assertEqual(len(data), 2)
+        self.assertEqual(data[0]['events'], [{'name': ['history', 'history2']}])
+        self.assertEqual(data[0]['modified_by'], 'user user')
+
+    def test_backfill(self):
+        """Existing events are copied from LogEntry"""
+
+        # GIVEN model history in LogEntry
+        obj = TestModel2.objects.create(name='history', model1=self.obj1)
+        obj.set_values(name='history2')
+        history = self._history(obj)
+
+        # WHEN copying the events to history model
+        out = StringIO()
+        call_command('backfill_history', batch_size=2, stdout=out)
+
+        # THEN events are copied
+        self.assertTrue('Done' in out.getvalue())
+
+        # AND history is the same when read from history model
+        with self.settings(DRAALCORE_HISTORY_STORE='history'):
+            self.assertEqual(self._history(obj), history)
+
+        # ----------
+
+        # GIVEN log entry without changes
+        content_type = ContentType.objects.get_for_model(TestModel2)
+        LogEntry.objects.create(user=self.user, content_type=content_type, object_id=str(obj.id), object_repr=str(obj),
+                                action_flag=CHANGE, change_message='')
+        count = HistoryEvent.objects.count()
+
+        # WHEN copying the events again, also from the beginning
+        call_command('backfill_history', stdout=StringIO())
+        call_command('backfill_history', after_id=0, stdout=StringIO())
+
+        # THEN no events are copied
+        self.assertEqual(HistoryEvent.objects.count(), count)
+
+    @override_settings(DRAALCORE_HISTORY_STORE='history')
+    def test_empty_events(self):
+        """History events without changes are not included in history"""
+
+        # GIVEN history event without changes
+        obj = TestModel2.objects.create(name='history', model1=self.obj1)
+        content_type = ContentType.objects.get_for_model(TestModel2)
+        HistoryEvent.objects.create(user=self.user, content_type=content_type, object_id=obj.id, object_repr=str(obj),
+                                    action_flag=CHANGE, changes=[])
+
+        # WHEN reading model history
+        data = self._history(obj)
+
+        # THEN empty event is not included
+        self.assertEqual(len(data), 1)
+
+        # AND same applies to history of several model items
+        self.assertEqual(history_events_batch(content_type.id, [obj.id], 10).count(), 1)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Batch model history tests"""
+
+# System imports
+import shutil
+import tempfile
+from datetime import timedelta
+from django.urls import reverse
+from django.utils import timezone
+from django.test.utils import override_settings
+
+# Project imports
+from ..models import TestModel2
+from .utils.mixins import TestModelMixin
+from draalcore.models.archive import archive_history
+from draalcore.test_utils.basetest import BaseTestUser
+
+
+class HistoryBatchTestCase(TestModelMixin, BaseTestUser):
+    """History of several model items is returned at once"""
+
+    def setUp(self):
+        super(HistoryBatchTestCase, self).setUp()
+        self.items = []
+        for index in range(3):
+            obj = TestModel2.objects.create(name='batch{}'.format(index), model1=self.obj1)
+            for count in range(index + 1):
+                obj.set_values(comments='{}-{}'.format(index, count))
+            self.items.append(obj)
+
+    def _history(self, **params):
+        kwargs = {'app': self.app_label, 'model': self.model_name2, 'action': 'history'}
+        return self.api.get_call(reverse('rest-api-model-action', kwargs=kwargs), params)
+
+    def _ids(self, items):
+        return ','.join([str(item.id) for item in items])
+
+    def _cursors(self, *items):
+        return ','.join(['{}:{}'.format(item['id'], item['next']) for item in items])
+
+    def _comments(self, item):
+        changes = [event['events'][0]['comments'] for event in item['events']]
+        return ['created' if len(value) == 1 else value[1] for value in changes]
+
+    def test_history_batch(self):
+        """Latest events are returned per model item"""
+
+        # WHEN fetching history of several model items
+        with self.assertNumQueries(5):
+            response = self._history(ids=self._ids(self.items + [self.items[0]]) + ',999', limit=2)
+
+        # THEN it should succeed
+        self.assertTrue(response.success)
+
+        # AND events are grouped per model item in request order
+        data = response.data
+        self.assertEqual([item['id'] for item in data], [obj.id for obj in self.items])
+        self.assertEqual(self._comments(data[0]), ['0-0', 'created'])
+        self.assertEqual(self._comments(data[2]), ['2-2', '2-1'])
+        self.assertEqual(data[2]['events'][0]['modified_by'], 'user user')
+
+        # AND cursor is available when more events exist
+        self.assertIsNone(data[0]['next'])
+        self.assertIsNotNone(data[2]['next'])
+
+        # ----------
+
+        # WHEN fetching next events using the cursor
+        response = self._history(ids=self._ids(self.items[2:]), limit=2, before=self._cursors(data[2]))
+
+        # THEN remaining events are returned
+        self.assertEqual(self._comments(response.data[0]), ['2-0', 'created'])
+        self.assertIsNone(response.data[0]['next'])
+
+    def test_history_batch_cursors(self):
+        """Each model item is paginated using its own cursor"""
+
+        # GIVEN first events of model items with different history lengths
+        items = self.items[1:]
+        data = self._history(ids=self._ids(items), limit=1).data
+        self.assertEqual([self._comments(item) for item in data], [['1-1'], ['2-2']])
+
+        # WHEN fetching next events of all model items using the per item cursors
+        response = self._history(ids=self._ids(items), limit=1, before=self._cursors(*data))
+
+        # THEN next events are returned for each model item
+        self.assertTrue(response.success)
+        self.assertEqual([self._comments(item) for item in response.data], [['1-0'], ['2-1']])
+
+        # ----------
+
+        # WHEN cursor is given only for some model item
+        response = self._history(ids=self._ids(items), limit=1, before=self._cursors(data[1]))
+
+        # THEN latest events are returned for the other model items
+        self.assertEqual([self._comments(item) for item in response.data], [['1-1'], ['2-1']])
+
+    @override_settings(DRAALCORE_HISTORY_STORE='history')
+    def test_history_batch_store(self):
+        """History model events are returned"""
+
+        # GIVEN model item history in history model
+        obj = TestModel2.objects.create(name='store', model1=self.obj1)
+        obj.set_values(comments='store')
+
+        # WHEN fetching the history
+        response = self._history(ids=self._ids([obj]))
+
+        # THEN latest events are returned
+        self.assertTrue(response.success)
+        self.assertEqual(self._comments(response.data[0]), ['store', 'created'])
+
+    def test_history_batch_archived(self):
+        """Archived events are included"""
+
+        # GIVEN model item with archived events
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+
+        obj = self.items[2]
+        with self.settings(DRAALCORE_HISTORY_ARCHIVE_ROOT=root):
+            obj.get_events().update(action_time=timezone.now() - timedelta(days=10))
+            archive_history(timezone.now() - timedelta(days=5))
+            obj.set_values(comments='hot')
+
+            # WHEN fetching the history
+            response = self._history(ids=self._ids([obj]), limit=3)
+            next_response = self._history(ids=self._ids([obj]), limit=3, before=self._cursors(response.data[0]))
+
+        # THEN hot events are followed by archived events
+        self.assertEqual(self._comments(response.data[0]), ['hot', '2-2', '2-1'])
+        self.assertEqual(self._comments(next_response.data[0]), ['2-0', 'created'])
+
+    def test_history_batch_invalid(self):
+        """Invalid parameters are rejected"""
+
+        for params in [{}, {'ids': 'a'}, {'ids': '1', 'limit': '0'}, {'ids': '1', 'before': 'x'},
+                       {'ids': '1', 'before': '1'}]:
+            # WHEN parameters are not valid
+            response = self._history(**params)
+
+            # THEN it should fail
+            self.assertTrue(response.error)
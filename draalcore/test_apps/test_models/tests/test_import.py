@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Model data import tests"""
+
+# System imports
+import json
+from mock import patch
+from django.db import connection, transaction
+from django.db.models.signals import post_save
+from django.contrib.admin.models import LogEntry
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+# Project imports
+from ..models import TestModel, TestModel2
+from .utils.mixins import TestModelMixin
+from draalcore.test_utils.basetest import BaseTestUser
+
+
+class ModelImportTestCase(TestModelMixin, BaseTestUser):
+    """Model data is imported from file"""
+
+    def _import(self, name, content, **data):
+        data['file'] = SimpleUploadedFile(name, content.encode('utf-8'))
+        return self.api.import_file(self.app_label, self.model_name2, data)
+
+    def _events(self):
+        content_type = ContentType.objects.get_for_model(TestModel2)
+        return LogEntry.objects.filter(content_type=content_type, object_id=None)
+
+    def test_csv_import(self):
+        """Model items are created from CSV file"""
+
+        obj = TestModel.objects.create(name='other')
+
+        # GIVEN CSV file with valid and invalid rows
+        content = 'name,model1,model2,model3\n' \
+                  'csv1,{0},,"{0},{1}"\n' \
+                  'csv2,{0},{1},\n' \
+                  ',{0},,\n' \
+                  'csv4,abc,,\n' \
+                  'csv5,999,,[{1}]\n'.format(self.obj1.id, obj.id)
+
+        # WHEN importing the file
+        response = self._import('items.csv', content)
+
+        # THEN it should succeed
+        self.assertTrue(response.success)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['failed'], 3)
+
+        # AND invalid rows are reported
+        self.assertEqual([item['row'] for item in response.data['errors']], [4, 5, 6])
+        self.assertEqual(response.data['errors'][0]['errors'], ['Data field name is required'])
+        self.assertEqual(response.data['errors'][2]['errors'], ['ID 999 does not exist for field model1'])
+
+        # AND valid rows are created including related data
+        item = TestModel2.objects.get(name='csv1')
+        self.assertEqual(item.model1, self.obj1)
+        self.assertEqual(item.modified_by, self.user)
+        self.assertEqual(set(item.model3.values_list('id', flat=True)), set([self.obj1.id, obj.id]))
+        self.assertEqual(TestModel2.objects.get(name='csv2').model2, obj)
+
+        # AND single history event is created for the imported items
+        events = self._events()
+        self.assertEqual(events.count(), 1)
+        self.assertEqual(json.loads(events[0].change_message)[0]['import']['data'],
+                         [str(item.id), str(TestModel2.objects.get(name='csv2').id)])
+
+    def test_ndjson_import(self):
+        """Model items are created from NDJSON file in chunks"""
+
+        # GIVEN NDJSON file
+        rows = [json.dumps({'name': 'json{}'.format(index), 'model1': self.obj1.id}) for index in range(5)]
+        content = '\n'.join(rows[:2] + ['{invalid', ''] + rows[2:]) + '\n'
+
+        # WHEN importing the file using small chunk size
+        with self.settings(DRAALCORE_IMPORT_CHUNK_SIZE=2):
+            response = self._import('items.txt', content, import_format='ndjson')
+
+        # THEN valid items are created
+        self.assertTrue(response.success)
+        self.assertEqual(response.data['created'], 5)
+        self.assertEqual(response.data['errors'][0]['row'], 3)
+        self.assertEqual(TestModel2.objects.filter(name__startswith='json').count(), 5)
+
+        # AND history event is created per chunk
+        events = self._events()
+        self.assertEqual(events.count(), 3)
+
+        # AND events refer to the created items
+        ids = sum([json.loads(event.change_message)[0]['import']['data'] for event in events], [])
+        self.assertEqual(set(ids), set(str(pk) for pk in TestModel2.objects.filter(name__startswith='json').values_list('id', flat=True)))
+
+    def test_bulk_insert_pks(self):
+        """Primary keys are assigned to bulk inserted items without sending model signals"""
+
+        signals = []
+
+        def receiver(sender, **kwargs):
+            signals.append(sender)
+
+        post_save.connect(receiver, sender=TestModel2)
+        self.addCleanup(post_save.disconnect, receiver, sender=TestModel2)
+
+        for vendor in ['sqlite', 'other']:
+            # GIVEN items to insert
+            objs = [TestModel2(name='{}{}'.format(vendor, index), model1=self.obj1) for index in range(3)]
+
+            # WHEN inserting the items in bulk on backend that cannot return inserted primary keys
+            with patch.object(connection, 'vendor', vendor), transaction.atomic():
+                TestModel2.objects._bulk_insert(objs, True)
+
+            # THEN objects receive the primary keys of the inserted rows
+            self.assertEqual([obj.name for obj in TestModel2.objects.filter(pk__in=[obj.pk for obj in objs]).order_by('pk')],
+                             [obj.name for obj in objs])
+
+        # AND model signals are not sent
+        self.assertEqual(signals, [])
+
+    def test_invalid_import(self):
+        """Import format is not supported"""
+
+        # WHEN importing file with unsupported format
+        response = self._import('items.xml', '<items/>')
+
+        # THEN it should fail
+        self.assertTrue(response.error)
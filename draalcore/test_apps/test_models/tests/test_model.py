@@ -3,16 +3,21 @@
 """Model related tests"""
 
 # System imports
+import json
 import logging
-from django.db import models
+from mock import patch
+from django.db import models, connection
+from django.test.utils import CaptureQueriesContext, isolate_apps
 
 # Project imports
 from .utils.mixins import TestModelMixin
 from ..models import TestModel, TestModel2
 from draalcore.rest.model import ModelContainer
 from draalcore.exceptions import ModelNotFoundError, ModelAccessDeniedError
-from draalcore.test_utils.basetest import BaseTest, BaseTestUser
+from draalcore.test_utils.basetest import BaseTest, BaseTestUser, create_user
 from draalcore.models.fields import AppModelCharField
+from draalcore.models.base_model import ModelLogger
+from draalcore.middleware.current_user import acting_user
 from draalcore.test_apps.test_models.models import TestModelBaseModel
 
 
@@ -207,6 +212,149 @@ class BaseModelTestCase(TestModelMixin, BaseTestUser):
         # THEN it should succeed
         self.assertTrue(response.success)
 
+    def test_model_lazy_tracking(self):
+        """Change tracking of model item loaded from DB is set up on first write"""
+
+        other = create_user('other', 'password', 'other@gmail.com')
+
+        # GIVEN model items loaded from DB
+        with patch('draalcore.models.base_model.get_current_user', return_value=other) as current_user:
+            objs = list(TestModel2.objects.all())
+
+            # THEN editing user is not resolved
+            self.assertEqual(current_user.call_count, 0)
+            self.assertEqual(objs[0].modified_by, self.obj2.modified_by)
+            self.assertFalse('_changed_fields' in objs[0].__dict__)
+
+            # ----------
+
+            # WHEN model item is edited
+            objs[0].set_values(comments='lazy')
+
+        # THEN editing user is recorded
+        self.assertEqual(current_user.call_count, 1)
+        self.assertEqual(TestModel2.objects.get(id=objs[0].id).modified_by, other)
+        self.assertEqual(objs[0].get_events().first().user, other)
+
+    def test_model_assigned_modifier(self):
+        """Modifier assigned to model item loaded from DB is kept"""
+
+        other = create_user('other', 'password', 'other@gmail.com')
+
+        # GIVEN model item loaded from DB and modifier is assigned
+        obj = TestModel2.objects.get(id=self.obj2.id)
+        obj.modified_by = other
+
+        # WHEN model item is saved by another user
+        with acting_user(self.user):
+            obj.comments = 'assigned'
+            obj.save()
+
+        # THEN assigned modifier is recorded
+        self.assertEqual(TestModel2.objects.get(id=obj.id).modified_by, other)
+        self.assertEqual(obj.get_events().first().user, other)
+
+        # ----------
+
+        # WHEN modifier is assigned and values are set
+        obj = TestModel2.objects.get(id=self.obj2.id)
+        obj.modified_by = self.user
+        with acting_user(other):
+            obj.set_values(comments='assigned2')
+
+        # THEN assigned modifier is recorded
+        self.assertEqual(TestModel2.objects.get(id=obj.id).modified_by, self.user)
+
+        # ----------
+
+        # WHEN modifier is not assigned
+        obj = TestModel2.objects.get(id=self.obj2.id)
+        with acting_user(other):
+            obj.set_values(comments='assigned3')
+
+        # THEN editing user is recorded
+        self.assertEqual(TestModel2.objects.get(id=obj.id).modified_by, other)
+
+    def test_model_dirty_tracking(self):
+        """Changes made via attribute assignment are saved and logged"""
+
+        other = TestModel.objects.create(name='other')
+
+        # GIVEN model item loaded from DB
+        obj = TestModel2.objects.get(id=self.obj2.id)
+        events = obj.get_events().count()
+
+        # WHEN saving without changes
+        with CaptureQueriesContext(connection) as queries:
+            with patch('django.db.models.signals.post_save.send') as post_save:
+                obj.save()
+
+        # THEN only modifier and modification time are written
+        self.assertEqual(len(queries), 1)
+        self.assertTrue('"last_modified"' in queries[0]['sql'] and '"modified_by_id"' in queries[0]['sql'])
+        self.assertFalse('"name"' in queries[0]['sql'])
+
+        # AND save signal is sent
+        self.assertEqual(post_save.call_count, 1)
+
+        # AND no changes are logged
+        self.assertEqual(obj.get_events().count(), events)
+
+        # ----------
+
+        # WHEN fields are changed via assignment
+        obj.name = 'assigned'
+        obj.model1 = other
+        with CaptureQueriesContext(connection) as queries:
+            obj.save()
+
+        # THEN only changed columns are written
+        update = [item['sql'] for item in queries.captured_queries if item['sql'].startswith('UPDATE')][0]
+        self.assertTrue('"name"' in update and '"model1_id"' in update)
+        self.assertFalse('"comments"' in update)
+
+        # AND changes are logged
+        changes = json.loads(obj.get_events().first().change_message)[0]
+        self.assertEqual(changes, {'name': [self.obj2.name, 'assigned'], 'model1': [str(self.obj1), str(other)]})
+
+        item = TestModel2.objects.get(id=obj.id)
+        self.assertEqual((item.name, item.model1), ('assigned', other))
+
+        # ----------
+
+        # WHEN saving again
+        obj.save()
+
+        # THEN no changes are logged
+        self.assertEqual(obj.get_events().count(), events + 1)
+
+    def test_model_mutable_tracking(self):
+        """In place modifications of mutable field values are detected"""
+
+        # GIVEN model item loaded from DB with mutable field value
+        values = [self.obj2.id, [1, 2]]
+        obj = TestModel2.from_db('default', ['id', 'comments'], values)
+        self.assertEqual(obj.dirty_fields(), {})
+
+        # WHEN value is modified in place
+        obj.comments.append(3)
+
+        # THEN field is dirty
+        self.assertEqual(obj.dirty_fields(), {'comments': [1, 2]})
+
+    @isolate_apps('draalcore.test_apps.test_models')
+    def test_model_pre_save_fields(self):
+        """Fields populated on save are saved together with changed fields"""
+
+        class PreSaveModel(ModelLogger):
+            name = models.CharField(max_length=32)
+            updated = models.DateTimeField(auto_now=True)
+            created = models.DateTimeField(auto_now_add=True)
+
+        # THEN auto updated fields are included in the saved fields
+        self.assertEqual(PreSaveModel._pre_save_fields(), ('updated',))
+        self.assertEqual(PreSaveModel._save_fields(['name']), ['name', 'updated'])
+
     def test_basemodel_query(self):
         """Model is derived from BaseModel"""
 
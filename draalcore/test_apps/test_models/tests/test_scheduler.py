@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Periodic job scheduler tests"""
+
+# System imports
+import shutil
+import tempfile
+from io import StringIO
+from mock import patch
+from django.db import DatabaseError
+from datetime import timedelta
+from django.utils import timezone
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test.utils import override_settings
+
+# Project imports
+from ..models import TestModel, TestModel2
+from .utils.mixins import TestModelMixin
+from draalcore.auth.models import UserAccountProfile
+from draalcore.code_lock import MutexHandler, FileLockBackend
+from draalcore.models.jobs import purge_deleted
+from draalcore.models.models import PeriodicJobState
+from draalcore.scheduler import JobScheduler, PeriodicJob, periodic_job, registry
+from draalcore.test_utils.basetest import BaseTestUser
+
+
+class JobSchedulerTestCase(TestModelMixin, BaseTestUser):
+    """Periodic jobs are run by single worker"""
+
+    def _job(self, name, interval=60, func=None):
+        self.calls = []
+        return PeriodicJob(name, func or (lambda: self.calls.append(name)), interval, jitter=1)
+
+    def _call(self, *args):
+        out = StringIO()
+        call_command('run_jobs', *args, stdout=out)
+        return out.getvalue()
+
+    def test_single_worker(self):
+        """Job is run once per interval regardless of number of workers"""
+
+        # GIVEN two workers with the same job
+        job = self._job('single')
+        worker1 = JobScheduler([job])
+        worker2 = JobScheduler([job])
+
+        # WHEN both workers check the job
+        self.assertEqual(worker1.run_pending(), 1)
+        self.assertEqual(worker2.run_pending(), 0)
+
+        # THEN job is executed only once
+        self.assertEqual(self.calls, ['single'])
+        state = PeriodicJobState.objects.get(name='single')
+        self.assertEqual(state.runs, 1)
+        self.assertIsNotNone(state.last_duration)
+
+        # AND next check is scheduled after the interval with jitter
+        self.assertTrue(59 < worker1.next_check() <= 61)
+        self.assertTrue(worker2.next_check() <= 61)
+
+        # AND run duration is available in metrics
+        self.assertEqual(worker1.metrics('single')['runs'], 1)
+        self.assertEqual(worker2.metrics('single')['skipped'], 1)
+
+        # ----------
+
+        # WHEN interval has elapsed
+        PeriodicJobState.objects.filter(name='single').update(last_run=timezone.now() - timedelta(seconds=61))
+
+        # THEN job is executed again
+        ran, _ = worker2.run_job(job)
+        self.assertTrue(ran)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_job_claimed(self):
+        """Job is skipped if another worker claims the run meanwhile"""
+
+        # GIVEN job run details read before another worker claimed the run
+        job = self._job('claimed')
+        state = PeriodicJobState.objects.create(name='claimed')
+        PeriodicJobState.objects.filter(name='claimed').update(last_run=timezone.now())
+
+        # WHEN running the job
+        with patch.object(PeriodicJobState.objects, 'get_or_create', return_value=(state, False)):
+            ran, _ = JobScheduler([job]).run_job(job, force=True)
+
+        # THEN it is skipped
+        self.assertFalse(ran)
+        self.assertEqual(self.calls, [])
+
+    def test_job_lock_held(self):
+        """Job is skipped while another worker holds the job lock"""
+
+        # GIVEN job lock that is held by another worker
+        lock_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, lock_dir)
+        locker = MutexHandler(FileLockBackend(lock_dir))
+
+        job = self._job('locked')
+        lock = locker.acquire(job.lock_id)
+
+        # WHEN running the job
+        scheduler = JobScheduler([job], locker=MutexHandler(FileLockBackend(lock_dir)))
+        ran, _ = scheduler.run_job(job, force=True)
+
+        # THEN it is skipped
+        self.assertFalse(ran)
+        self.assertEqual(self.calls, [])
+
+        # ----------
+
+        # WHEN lock is released
+        locker.release(lock)
+
+        # THEN job is executed
+        self.assertEqual(scheduler.run_pending(), 1)
+        self.assertEqual(self.calls, ['locked'])
+
+    def test_job_failure(self):
+        """Failed job run is recorded"""
+
+        def fail():
+            raise ValueError('Job error')
+
+        # WHEN job fails
+        scheduler = JobScheduler([self._job('failing', func=fail)])
+        scheduler.run_pending()
+
+        # THEN failure details are stored
+        state = PeriodicJobState.objects.get(name='failing')
+        self.assertEqual((state.runs, state.failures), (1, 1))
+        self.assertTrue('Job error' in state.last_error)
+        self.assertEqual(scheduler.metrics('failing')['failures'], 1)
+
+    def test_decorator(self):
+        """Jobs are registered using decorator"""
+
+        @periodic_job(interval=10, name='decorated')
+        def decorated():
+            return 'done'
+
+        self.addCleanup(registry.unregister, 'decorated')
+
+        # WHEN running the job using command
+        output = self._call('--job', 'decorated', '--once')
+
+        # THEN job is executed
+        self.assertTrue('decorated: executed' in output)
+        self.assertTrue('decorated every 10s: last run' in self._call('--job', 'decorated', '--list'))
+
+    @override_settings(DRAALCORE_PURGE_DELETED_DAYS=30)
+    def test_purge_deleted(self):
+        """Old soft-deleted model items are removed"""
+
+        # GIVEN deleted model items
+        old = TestModel.objects.create(name='old')
+        old.deactivate()
+        recent = TestModel.objects.create(name='recent')
+        recent.deactivate()
+        TestModel.admin_objects.filter(id=old.id).update(last_modified=timezone.now() - timedelta(days=31))
+
+        # WHEN running the purge job
+        output = self._call('--job', 'draalcore.models.jobs.purge_deleted', '--force')
+
+        # THEN only old items are removed
+        self.assertTrue('executed' in output)
+        self.assertFalse(TestModel.admin_objects.filter(id=old.id).exists())
+        self.assertTrue(TestModel.admin_objects.filter(id=recent.id).exists())
+        self.assertTrue(TestModel.admin_objects.filter(id=self.obj1.id).exists())
+
+    @override_settings(DRAALCORE_PURGE_DELETED_DAYS=30)
+    def test_purge_deleted_cascade(self):
+        """Items whose removal would cascade into active items are kept"""
+
+        # GIVEN old deleted model items, one of which is referenced by active item
+        items = []
+        for index in range(4):
+            obj = TestModel.objects.create(name='purge{}'.format(index))
+            obj.deactivate()
+            items.append(obj)
+        TestModel.admin_objects.filter(id__in=[obj.id for obj in items]).update(last_modified=timezone.now() - timedelta(days=31))
+
+        referenced = items[2]
+        active = TestModel2.objects.create(name='active', model1=referenced)
+
+        # WHEN running the purge job
+        stats = purge_deleted()
+
+        # THEN only items without active references are removed
+        self.assertEqual(stats['test_models.TestModel'], 3)
+        self.assertEqual(list(TestModel.admin_objects.filter(id__in=[obj.id for obj in items])), [referenced])
+        self.assertTrue(TestModel2.admin_objects.filter(id=active.id).exists())
+
+        # ----------
+
+        # WHEN cascading is allowed
+        with self.settings(DRAALCORE_PURGE_CASCADE=True):
+            stats = purge_deleted()
+
+        # THEN also referencing items are removed
+        self.assertEqual(stats['test_models.TestModel'], 1)
+        self.assertFalse(TestModel2.admin_objects.filter(id=active.id).exists())
+
+    def test_job_check_failure(self):
+        """Failing job check does not prevent checking other jobs"""
+
+        # GIVEN job whose check fails
+        broken = self._job('broken')
+        job = PeriodicJob('working', lambda: self.calls.append('working'), 60)
+        scheduler = JobScheduler([broken, job])
+        acquire = scheduler.locker.acquire
+
+        def locker(lock_id, **kwargs):
+            if lock_id == broken.lock_id:
+                raise DatabaseError('Check failed')
+            return acquire(lock_id, **kwargs)
+
+        # WHEN checking the jobs
+        with patch.object(scheduler.locker, 'acquire', locker):
+            executed = scheduler.run_pending()
+
+        # THEN other jobs are executed
+        self.assertEqual(executed, 1)
+        self.assertEqual(self.calls, ['working'])
+
+        # AND failed job is checked again after poll interval
+        self.assertTrue(scheduler.next_check() <= 31)
+
+    def test_expire_accounts(self):
+        """Accounts not activated in time are expired"""
+
+        # GIVEN registered users
+        kwargs = {'email': 'a@b.com', 'password': 'pw', 'first_name': 'a', 'last_name': 'b'}
+        old = UserAccountProfile.objects.register_user(username='old', **kwargs)
+        recent = UserAccountProfile.objects.register_user(username='recent', **kwargs)
+        User.objects.filter(id=old.user.id).update(date_joined=timezone.now() - timedelta(days=30))
+
+        # WHEN running the expiration job
+        self._call('--job', 'draalcore.auth.jobs.expire_accounts', '--force')
+
+        # THEN only old account is expired
+        self.assertEqual(UserAccountProfile.objects.get(id=old.id).account_status, UserAccountProfile.ACCOUNT_EXPIRED)
+        self.assertEqual(UserAccountProfile.objects.get(id=recent.id).account_status, UserAccountProfile.ACCOUNT_ACTIVE)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Point-in-time model state tests"""
+
+# System imports
+import json
+from mock import patch
+from datetime import timedelta
+from django.utils import timezone
+from django.test.utils import override_settings
+from django.contrib.admin.models import LogEntry, CHANGE
+
+# Project imports
+from ..models import TestModel, TestModel2
+from .utils.mixins import TestModelMixin
+from draalcore.exceptions import ModelManagerError
+from draalcore.middleware.current_user import acting_user
+from draalcore.models.jobs import create_history_snapshots
+from draalcore.models.models import HistorySnapshot
+from draalcore.models.snapshots import StateBuilder, snapshot_history
+from draalcore.test_utils.basetest import BaseTestUser
+
+
+class ModelStateTestCase(TestModelMixin, BaseTestUser):
+    """Model item state is rebuilt from history events"""
+
+    def _create(self, name):
+        obj = TestModel2.objects.create(name=name, model1=self.obj1)
+        obj.get_events().update(action_time=timezone.now() - timedelta(days=10))
+        return obj
+
+    def _set_time(self, obj, days):
+        event = obj.get_events().first()
+        LogEntry.objects.filter(id=event.id).update(action_time=timezone.now() - timedelta(days=days))
+
+    def test_as_of(self):
+        """State at specified time is returned"""
+
+        # GIVEN model item with history
+        obj = self._create('state')
+        obj.set_values(comments='first')
+        self._set_time(obj, 5)
+        obj.set_values(name='state2', comments='second')
+        obj.create_related_event('model3', [self.obj1])
+
+        # WHEN querying the state at different points in time
+        # THEN state is rebuilt from the events
+        state = TestModel2.objects.as_of(obj.id, timezone.now() - timedelta(days=7))
+        self.assertEqual(state['name'], 'state')
+        self.assertEqual(state['comments'], 'None')
+        self.assertEqual(state['model1'], str(self.obj1))
+
+        state = TestModel2.objects.as_of(obj.id, timezone.now() - timedelta(days=1))
+        self.assertEqual(state['comments'], 'first')
+
+        state = TestModel2.objects.as_of(obj.id, timezone.now())
+        self.assertEqual(state['name'], 'state2')
+        self.assertEqual(state['comments'], 'second')
+        self.assertEqual(state['model3'], [str(self.obj1)])
+
+        # AND model item has no state before it was created
+        self.assertIsNone(TestModel2.objects.as_of(obj.id, timezone.now() - timedelta(days=20)))
+
+        # AND unknown model item is reported
+        self.assertRaises(ModelManagerError, TestModel2.objects.as_of, 999, timezone.now())
+
+    def test_cleared_field(self):
+        """Cleared related field is included in the state"""
+
+        # GIVEN model item with related field values
+        obj = self._create('cleared')
+        with acting_user(self.user):
+            TestModel2.objects.edit_model(obj, name='cleared', model1=self.obj1.id, model3=[self.obj1.id])
+            self.assertEqual(TestModel2.objects.as_of(obj.id, timezone.now())['model3'], [str(self.obj1)])
+
+            # WHEN related field values are removed
+            TestModel2.objects.edit_model(obj, name='cleared', model1=self.obj1.id, model3=[])
+
+        # THEN field is empty in the state
+        self.assertEqual(TestModel2.objects.as_of(obj.id, timezone.now())['model3'], [])
+
+    def test_snapshot(self):
+        """State is rebuilt from snapshot"""
+
+        # GIVEN model item with snapshot of its current state
+        obj = self._create('snapshot')
+        obj.set_values(comments='first')
+        state = TestModel2.objects.history_snapshot(obj.id)
+        self.assertEqual(HistorySnapshot.objects.filter(object_id=obj.id).count(), 1)
+
+        # WHEN model item is changed
+        obj.set_values(comments='second')
+
+        # THEN only events after the snapshot are replayed
+        builder = StateBuilder(obj)
+        snapshot = builder._snapshot(timezone.now())
+        self.assertEqual(snapshot.state, state)
+        self.assertEqual(len(builder._events(snapshot, timezone.now())), 1)
+        self.assertEqual(TestModel2.objects.as_of(obj.id, timezone.now())['comments'], 'second')
+
+    @override_settings(DRAALCORE_HISTORY_SNAPSHOT_INTERVAL=100)
+    def test_large_history(self):
+        """State of model item with long history is rebuilt using periodic snapshots"""
+
+        # GIVEN model item with more than 10k events
+        obj = TestModel.objects.create(name='large')
+        start = timezone.now() - timedelta(days=30)
+        obj.get_events().update(action_time=start)
+
+        count = 10500
+        LogEntry.objects.bulk_create([
+            LogEntry(user_id=self.user.id, content_type_id=obj.content_type.id, object_id=str(obj.id),
+                     object_repr='large', action_flag=CHANGE, action_time=start + timedelta(seconds=index + 1),
+                     change_message=json.dumps([{'name': ['large{}'.format(index), 'large{}'.format(index + 1)]}]))
+            for index in range(count)
+        ])
+
+        # WHEN querying the latest state
+        timestamp = start + timedelta(seconds=count)
+        state = TestModel.objects.as_of(obj.id, timestamp)
+
+        # THEN all events are replayed without writing snapshots
+        self.assertEqual(state['name'], 'large{}'.format(count))
+        self.assertEqual(HistorySnapshot.objects.filter(object_id=obj.id).count(), 0)
+
+        # ----------
+
+        # WHEN snapshots are written by periodic job
+        self.assertEqual(create_history_snapshots(), (count + 1) // 100)
+
+        # THEN snapshot exists every interval events
+        self.assertEqual(HistorySnapshot.objects.filter(object_id=obj.id).count(), (count + 1) // 100)
+
+        # AND items with short history have no snapshots
+        self.assertFalse(HistorySnapshot.objects.exclude(object_id=obj.id).exists())
+
+        # ----------
+
+        # WHEN querying the state at earlier time
+        timestamp = start + timedelta(seconds=5050)
+
+        # THEN state is rebuilt from the nearest snapshot
+        builder = StateBuilder(obj)
+        self.assertTrue(len(builder._events(builder._snapshot(timestamp), timestamp)) < 100)
+
+        with self.assertNumQueries(4):
+            state = TestModel.objects.as_of(obj.id, timestamp)
+        self.assertEqual(state['name'], 'large5050')
+
+        # ----------
+
+        # WHEN job is executed again without new events
+        # THEN no snapshots are written
+        self.assertEqual(snapshot_history(), 0)
+
+        # ----------
+
+        # WHEN events are replayed again from the beginning, e.g. by concurrent jobs
+        with patch.object(StateBuilder, '_snapshot', return_value=None):
+            state, _ = StateBuilder(obj).write_snapshots()
+
+        # THEN existing snapshots are not duplicated
+        self.assertEqual(state['name'], 'large{}'.format(count))
+        self.assertEqual(HistorySnapshot.objects.filter(object_id=obj.id).count(), (count + 1) // 100)
+
+    def test_as_of_api(self):
+        """Model item state is available via history API"""
+
+        # GIVEN model item with history
+        obj = self._create('api')
+        obj.set_values(comments='api')
+
+        # WHEN requesting the state at specified date
+        date = (timezone.now() - timedelta(days=2)).date().isoformat()
+        response = self.api.history(self.app_label, self.model_name2, obj.id, params={'as_of': date})
+
+        # THEN state at that time is returned
+        self.assertTrue(response.success)
+        self.assertEqual(response.data['as_of'], date)
+        self.assertEqual(response.data['state']['name'], 'api')
+        self.assertEqual(response.data['state']['comments'], 'None')
+
+        # ----------
+
+        # WHEN timestamp is invalid
+        response = self.api.history(self.app_label, self.model_name2, obj.id, params={'as_of': 'abc'})
+
+        # THEN it should fail
+        self.assertTrue(response.error)
+        self.assertEqual(response.data['errors'], ['Invalid timestamp abc'])
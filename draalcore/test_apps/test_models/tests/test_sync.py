@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Model data delta sync tests"""
+
+# System imports
+import datetime
+from django.test.utils import override_settings
+
+# Project imports
+from ..models import TestModel2
+from .utils.mixins import TestModelMixin
+from draalcore.test_utils.basetest import BaseTestUser
+from draalcore.models.base_manager import encode_sync_cursor, decode_sync_cursor
+
+
+@override_settings(DRAALCORE_SYNC_LAG=0)
+class ModelDeltaSyncTestCase(TestModelMixin, BaseTestUser):
+    """Model listing returns only changes since cursor"""
+
+    def _sync(self, cursor, **params):
+        params['since'] = cursor
+        return self.api.GET(self.app_label, self.model_name2, params)
+
+    def test_cursor(self):
+        """Cursor encoding"""
+        timestamp = self.obj2.last_modified
+        self.assertEqual(decode_sync_cursor(encode_sync_cursor(timestamp, 12)), (timestamp, 12))
+        self.assertEqual(decode_sync_cursor('0'), (None, None))
+
+    def test_delta_sync(self):
+        """Changed and deleted items are reported"""
+
+        # GIVEN initial sync
+        response = self._sync('0')
+        self.assertTrue(response.success)
+        self.assertEqual([item['id'] for item in response.data['items']], [self.obj2.id])
+        self.assertEqual(response.data['deleted'], [])
+        self.assertFalse(response.data['more'])
+        cursor = response.data['cursor']
+
+        # WHEN no changes are made
+        response = self._sync(cursor)
+
+        # THEN no data is returned and cursor remains the same
+        self.assertEqual(response.data['items'], [])
+        self.assertEqual(response.data['cursor'], cursor)
+
+        # ----------
+
+        # WHEN new item is added and existing item is deleted
+        obj = TestModel2.objects.create(name='new', model1=self.obj1)
+        response = self.api.model_action(self.app_label, self.model_name2, self.obj2.id, 'delete')
+        self.assertTrue(response.success)
+
+        response = self._sync(cursor, fields='id,name')
+
+        # THEN new item and tombstone for the deleted item are returned
+        self.assertEqual(response.data['items'], [{'id': obj.id, 'name': 'new'}])
+        self.assertEqual(response.data['deleted'], [self.obj2.id])
+
+        # AND cursor moves forward
+        self.assertGreater(decode_sync_cursor(response.data['cursor']), decode_sync_cursor(cursor))
+
+        # ----------
+
+        # WHEN item is edited
+        cursor = response.data['cursor']
+        obj.name = 'edited'
+        obj.save()
+        response = self._sync(cursor, fields='id,name')
+
+        # THEN only the edited item is returned
+        self.assertEqual(response.data['items'], [{'id': obj.id, 'name': 'edited'}])
+        self.assertEqual(response.data['deleted'], [])
+
+    @override_settings(DRAALCORE_SYNC_PAGE_SIZE=1)
+    def test_delta_sync_paging(self):
+        """Changes are returned in pages"""
+
+        # GIVEN more changes than fit into single response
+        TestModel2.objects.create(name='new', model1=self.obj1)
+
+        # WHEN syncing
+        response = self._sync('0', fields='name')
+
+        # THEN first change is returned and more changes are indicated
+        self.assertEqual(response.data['items'], [{'name': 'test2'}])
+        self.assertTrue(response.data['more'])
+
+        # AND remaining changes are available using the returned cursor
+        response = self._sync(response.data['cursor'], fields='name')
+        self.assertEqual(response.data['items'], [{'name': 'new'}])
+        self.assertFalse(response.data['more'])
+
+    @override_settings(DRAALCORE_SYNC_LAG=60)
+    def test_delta_sync_lag(self):
+        """Changes committed after the cursor position are not lost"""
+
+        # GIVEN initial sync
+        response = self._sync('0', fields='name')
+        self.assertEqual(response.data['items'], [{'name': 'test2'}])
+        cursor = response.data['cursor']
+
+        # WHEN item that was saved before the reported change is committed after the sync
+        obj = TestModel2.objects.create(name='late', model1=self.obj1)
+        timestamp = self.obj2.last_modified - datetime.timedelta(milliseconds=1)
+        TestModel2.objects.filter(id=obj.id).update(last_modified=timestamp)
+
+        # THEN it is reported on the next sync
+        response = self._sync(cursor, fields='name')
+        self.assertEqual(response.data['items'], [{'name': 'late'}, {'name': 'test2'}])
+
+        # AND cursor is not advanced past the lag window
+        self.assertLess(decode_sync_cursor(response.data['cursor'])[0], timestamp)
+
+        # ----------
+
+        # WHEN changes are older than the lag window
+        timestamp = self.obj2.last_modified - datetime.timedelta(seconds=120)
+        TestModel2.objects.all().update(last_modified=timestamp)
+        response = self._sync('0', fields='name')
+        self.assertEqual(len(response.data['items']), 2)
+
+        # THEN those are no longer reported
+        response = self._sync(response.data['cursor'], fields='name')
+        self.assertEqual(response.data['items'], [])
+
+    def test_invalid_cursor(self):
+        """Invalid sync cursor"""
+
+        # WHEN sync cursor is not valid
+        response = self._sync('abcd')
+
+        # THEN it should fail
+        self.assertTrue(response.error)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Model bulk upsert tests"""
+
+# System imports
+import json
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Project imports
+from ..models import TestModel, TestModel2
+from .utils.mixins import TestModelMixin
+from draalcore.test_utils.basetest import BaseTestUser
+from draalcore.middleware.current_user import acting_user
+from draalcore.exceptions import DataParsingError, ModelManagerError
+
+
+class ModelUpsertTestCase(TestModelMixin, BaseTestUser):
+    """Model items are created or updated in bulk"""
+
+    def _upsert(self, records, key_fields=['name'], **kwargs):
+        with acting_user(self.user):
+            return TestModel2.objects.upsert_many(records, key_fields, **kwargs)
+
+    def _changes(self, obj):
+        return [json.loads(item.change_message)[0] for item in obj.get_events()]
+
+    def test_upsert(self):
+        """Records are split into inserts and updates"""
+
+        other = TestModel.objects.create(name='other')
+
+        # GIVEN records for new and existing items
+        records = [
+            {'name': self.obj2.name, 'model1': other.id, 'comments': 'updated'},
+            {'name': 'new1', 'model1': self.obj1.id, 'model3': [self.obj1.id, other.id]},
+            {'name': 'new2', 'model1': self.obj1.id}
+        ]
+
+        # WHEN storing the records
+        with CaptureQueriesContext(connection) as queries:
+            counts = self._upsert(records, chunk_size=2)
+
+        # THEN queries are made per chunk, not per record (row inserts excluded)
+        self.assertLessEqual(len(queries), 15)
+
+        # THEN new items are created and existing item is updated
+        self.assertEqual(counts, {'created': 2, 'updated': 1, 'unchanged': 0})
+
+        obj = TestModel2.objects.get(id=self.obj2.id)
+        self.assertEqual(obj.model1, other)
+        self.assertEqual(obj.comments, 'updated')
+
+        obj = TestModel2.objects.get(name='new1')
+        self.assertEqual(obj.model1, self.obj1)
+        self.assertEqual(set(obj.model3.values_list('id', flat=True)), set([self.obj1.id, other.id]))
+
+        # AND history events are created for the changes
+        self.assertEqual(self._changes(self.obj2)[0], {'comments': ['None', 'updated'], 'model1': [str(self.obj1), str(other)]})
+        self.assertEqual(self._changes(obj)[0]['model3']['title'], 'New values')
+        self.assertEqual(self._changes(obj)[1]['name'], ['Created value new1'])
+
+        # ----------
+
+        # WHEN storing the same records again
+        counts = self._upsert(records)
+
+        # THEN nothing is changed
+        self.assertEqual(counts, {'created': 0, 'updated': 0, 'unchanged': 3})
+
+        # ----------
+
+        # WHEN related values are changed
+        counts = self._upsert([{'name': 'new1', 'model1': self.obj1.id, 'model3': [other.id]}])
+
+        # THEN related values are replaced
+        self.assertEqual(counts['updated'], 1)
+        self.assertEqual(list(obj.model3.values_list('id', flat=True)), [other.id])
+        self.assertEqual(self._changes(obj)[0], {'model3': {'title': 'New values', 'data': [str(other)]}})
+
+    def test_upsert_queries(self):
+        """Number of queries does not grow with the number of updated records"""
+
+        def update(count, comments):
+            records = [{'name': 'item{}'.format(index), 'model1': self.obj1.id, 'comments': comments} for index in range(count)]
+            with CaptureQueriesContext(connection) as queries:
+                counts = self._upsert(records)
+
+            self.assertEqual(counts['updated'], count)
+            return len(queries)
+
+        # GIVEN existing items
+        self._upsert([{'name': 'item{}'.format(index), 'model1': self.obj1.id} for index in range(30)])
+
+        # WHEN updating few and many items
+        # THEN same number of queries is made
+        self.assertEqual(update(3, 'a'), update(30, 'b'))
+
+    def test_upsert_composite_key(self):
+        """Items are identified using multiple key fields"""
+
+        # WHEN storing records using composite key
+        other = TestModel.objects.create(name='other')
+        records = [
+            {'name': self.obj2.name, 'model1': self.obj1.id, 'comments': 'a'},
+            {'name': self.obj2.name, 'model1': other.id, 'comments': 'b'}
+        ]
+        counts = self._upsert(records, ['name', 'model1'])
+
+        # THEN items are matched using all key fields
+        self.assertEqual(counts, {'created': 1, 'updated': 1, 'unchanged': 0})
+        self.assertEqual(TestModel2.objects.get(id=self.obj2.id).comments, 'a')
+
+    def test_upsert_invalid(self):
+        """Invalid records are rejected"""
+
+        # WHEN record data is not valid
+        records = [{'name': 'new', 'model1': self.obj1.id}, {'name': 'new2', 'model1': 999}]
+
+        # THEN it should fail
+        with self.assertRaises(DataParsingError) as context:
+            self._upsert(records)
+
+        self.assertEqual(str(context.exception), 'Record 1: ID 999 does not exist for field model1')
+
+        # AND no data is stored
+        self.assertFalse(TestModel2.objects.filter(name='new').exists())
+
+        # ----------
+
+        # WHEN key field is not valid
+        # THEN it should fail
+        self.assertRaises(ModelManagerError, self._upsert, records, ['model3'])
+
+        # ----------
+
+        # WHEN value of key field that is not UI field is not valid
+        with self.assertRaises(DataParsingError) as context:
+            self._upsert([{'id': 'abc', 'name': 'new', 'model1': self.obj1.id}], ['id'])
+
+        # THEN it should fail
+        self.assertTrue(str(context.exception).startswith("Record 0: Data field 'id' is not valid"))
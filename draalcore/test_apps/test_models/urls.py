@@ -6,7 +6,7 @@
 from django.conf.urls import url
 
 from draalcore.rest.mixins import GetMixin, PutMixin, PostMixin, PatchMixin, DeleteMixin
-from draalcore.rest.handlers import FileUploadHandler, RestAPIBasicAuthView, AppActionsPermission
+from draalcore.rest.handlers import FileUploadHandler, RestAPIBasicAuthView, AppActionsPermission, ResponseData
 
 __author__ = "Juha Ojanpera"
 __copyright__ = "Copyright 2015"
@@ -42,10 +42,21 @@ class InvalidAPIHandler(GetMixin, PutMixin, PatchMixin, PostMixin, DeleteMixin,
     pass
 
 
+class SessionAPIHandler(GetMixin, RestAPIBasicAuthView):
+    """API handler that stores URL parameters to session and returns the session data"""
+    def _get(self, request_obj):
+        session = request_obj.request.session
+        for key, value in request_obj.url_params.items():
+            session['test_' + key] = value
+
+        return ResponseData({key: value for key, value in session.items() if key.startswith('test_')})
+
+
 urlpatterns = [
     url(r'^file-upload-invalid$', TestUploadHandler.as_view(), name='test-file-upload'),
     url(r'^file-upload-valid$', TestUploadHandler2.as_view(), name='test-file-upload2'),
     url(r'^file-upload-permission$', TestUploadHandler3.as_view(), name='test-file-upload3'),
 
-    url(r'^invalid-http-api$', InvalidAPIHandler.as_view(), name='invalid-http-api')
+    url(r'^invalid-http-api$', InvalidAPIHandler.as_view(), name='invalid-http-api'),
+    url(r'^session-api$', SessionAPIHandler.as_view(), name='test-session-api')
 ]
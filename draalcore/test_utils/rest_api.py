@@ -31,8 +31,8 @@ class AuthAPI(ClientConnectionUtility):
         data = dict(username=username, password=password)
         return self.post(self._auth_url('token'), data)
 
-    def logout(self):
-        return self.post(self._auth_url('logout'), {})
+    def logout(self, **kwargs):
+        return self.post(self._auth_url('logout'), {}, **kwargs)
 
     def register(self, data):
         return getattr(self, 'post')(self._auth_url('register'), data)
@@ -114,6 +114,10 @@ class GenericAPI(ClientConnectionUtility):
         url = reverse('rest-api-model-action', kwargs={'app': app, 'model': model, 'action': action})
         return getattr(self, 'post')(url, data) if method == 'post' else getattr(self, 'get')(url)
 
+    def import_file(self, app, model, data):
+        url = reverse('rest-api-model-action', kwargs={'app': app, 'model': model, 'action': 'import'})
+        return self.post(url, data, content_type=self.CONTENT_TYPE_MULTIPART)
+
     def model_actions(self, app, model, params=None):
         url = reverse('rest-api-model-actions-listing', kwargs={'app': app, 'model': model})
         return getattr(self, 'get')(url + self._dict2url(params))
@@ -134,10 +138,17 @@ class GenericAPI(ClientConnectionUtility):
         url = reverse('rest-api-model-meta', kwargs={'app': app, 'model': model})
         return getattr(self, 'get')(url + self._dict2url(params))
 
+    def feed(self, app, model, params=None, **kwargs):
+        url = reverse('rest-api-model-feed', kwargs={'app': app, 'model': model})
+        return self.client.get(url + self._dict2url(params), **kwargs)
+
     def root_api(self, public=False):
         url = reverse('rest-api' if not public else 'rest-api-public')
         return getattr(self, 'get')(url)
 
+    def batch(self, data):
+        return getattr(self, 'post')(reverse('rest-api-batch'), data)
+
     def app_actions(self, app):
         url = reverse('rest-api-app-actions-listing', kwargs={'app': app})
         return getattr(self, 'get')(url)
@@ -4,14 +4,9 @@
 # Add profiling support
 from .settings import MIDDLEWARE, INSTALLED_APPS
 
-# http://127.0.0.1:8000/?profile
-# MIDDLEWARE += ('draalcore.middleware.profile.InstrumentMiddleware', )
-
-# http://127.0.0.1:8000/?profiler
-# MIDDLEWARE += ('draalcore.middleware.profile.ProfileMiddleware', )
-
-# http://127.0.0.1:8000/?__geordi__
-# MIDDLEWARE += ('draalcore.middleware.profile.VisorMiddleware', )
+# http://127.0.0.1:8000/?__profile__=cprofile (or sample), staff users only.
+# Profiles are available from /api/apps/profiles
+# MIDDLEWARE += ('draalcore.middleware.profile.ProfilingMiddleware', )
 
 # http://127.0.0.1:8000/?sqldump
 # MIDDLEWARE += ('draalcore.middleware.sql.SqldumpMiddleware', )
@@ -153,6 +153,96 @@ USER_EMAIL_REDIRECT = 'settings-view'
 # Auto logout delay in seconds
 AUTO_LOGOUT_DELAY = 60 * 60  # equivalent to 60 minutes
 
+# Minimum interval in seconds between session writes of the latest user activity time
+AUTO_LOGOUT_TOUCH_GRANULARITY = 60
+
+# Lifetime of ReST API authentication token in seconds, None for no expiry
+DRAALCORE_TOKEN_LIFETIME = 14 * 24 * 60 * 60
+
+# Time in seconds that authenticated token details are cached in process memory
+DRAALCORE_TOKEN_CACHE_TTL = 30
+
+# Time in seconds that verified basic authentication credentials are cached, 0 to disable
+DRAALCORE_CREDENTIAL_CACHE_TTL = 300
+
+# Create session (log user in) on successful basic authentication
+DRAALCORE_BASIC_AUTH_LOGIN = True
+
+# Serve model and application actions using async views (recommended only under ASGI server)
+DRAALCORE_REST_ASYNC_ACTIONS = False
+
+# Maximum number of calls and worker threads for concurrent HTTP GET calls in ReST API batch request
+DRAALCORE_REST_BATCH_MAX_ITEMS = 50
+DRAALCORE_REST_BATCH_WORKERS = 4
+
+# Maximum number of changes returned by single delta sync ('since' parameter) call
+DRAALCORE_SYNC_PAGE_SIZE = 500
+
+# Delta sync cursor is held back by this many seconds and changes within the window are reported
+# again, must exceed the longest write transaction and clock difference between application servers
+DRAALCORE_SYNC_LAG = 60
+
+# Broker for model change notifications. Use 'draalcore.models.changes.CacheBroker' with shared
+# cache backend that has atomic incr() (memcached, Redis) when running multiple worker processes.
+DRAALCORE_CHANGE_BROKER = 'draalcore.models.changes.LocalBroker'
+
+# Model change feed (Server-Sent Events) heartbeat interval and maximum stream duration in seconds
+DRAALCORE_CHANGE_FEED_HEARTBEAT = 15
+DRAALCORE_CHANGE_FEED_DURATION = 300
+
+# Number of rows validated and inserted at a time by model import action and maximum number of reported row errors
+DRAALCORE_IMPORT_CHUNK_SIZE = 1000
+DRAALCORE_IMPORT_MAX_ERRORS = 1000
+
+# Model history event writing: 'sync' (immediately), 'deferred' (in bulk on transaction commit)
+# or 'async' (in bulk on transaction commit using background thread). Events written on commit are not
+# visible within the transaction and not written at all within Django's TestCase.
+DRAALCORE_EVENT_WRITE_MODE = 'sync'
+
+# Model history storage: 'logentry' (Django admin's LogEntry) or 'history' (indexed HistoryEvent model).
+# Existing events can be copied from LogEntry using 'manage.py backfill_history' command.
+DRAALCORE_HISTORY_STORE = 'logentry'
+
+# Model history events older than retention window (in days) are moved to compressed segment files
+# under archive root using 'manage.py archive_history' command
+DRAALCORE_HISTORY_RETENTION_DAYS = 365
+DRAALCORE_HISTORY_ARCHIVE_ROOT = os.path.join(PROJECT_ROOT, 'history_archive')
+
+# Number of history events between model state snapshots used by point-in-time state queries. Snapshots
+# are written by periodic job and before history archival.
+DRAALCORE_HISTORY_SNAPSHOT_INTERVAL = 100
+
+# Batch history action: maximum number of model IDs per request and default number of events per model item
+DRAALCORE_HISTORY_BATCH_MAX_IDS = 500
+DRAALCORE_HISTORY_BATCH_LIMIT = 20
+
+# Code lock backend ('draalcore.code_lock.DatabaseLockBackend', 'FileLockBackend', 'CacheLockBackend'
+# or 'AdvisoryLockBackend'), default acquire timeout and lease in seconds and file lock directory
+DRAALCORE_LOCK_BACKEND = 'draalcore.code_lock.DatabaseLockBackend'
+DRAALCORE_LOCK_TIMEOUT = 30
+DRAALCORE_LOCK_LEASE = 60
+DRAALCORE_LOCK_DIR = os.path.join(PROJECT_ROOT, 'locks')
+
+# Periodic jobs ('manage.py run_jobs'): maximum scheduler sleep between job checks in seconds, number
+# of days after which soft-deleted model items are permanently removed (None disables the removal) and
+# whether the removal may cascade into active model items (by default such items are kept)
+DRAALCORE_SCHEDULER_POLL_INTERVAL = 30
+DRAALCORE_PURGE_DELETED_DAYS = None
+DRAALCORE_PURGE_CASCADE = False
+
+# Background actions: executor ('draalcore.rest.background.ThreadExecutor' or 'draalcore.rest.background.CeleryExecutor'),
+# number of worker threads and maximum number of pending jobs of thread executor and time in seconds job results are kept
+DRAALCORE_BACKGROUND_EXECUTOR = 'draalcore.rest.background.ThreadExecutor'
+DRAALCORE_BACKGROUND_WORKERS = 4
+DRAALCORE_BACKGROUND_MAX_PENDING = 100
+DRAALCORE_BACKGROUND_RESULT_TTL = 86400
+
+# Request profiling middleware: profile directory, maximum number of stored profiles and
+# sampling interval in seconds of the sampling profiler
+DRAALCORE_PROFILE_DIR = os.path.join(PROJECT_ROOT, 'profiles')
+DRAALCORE_PROFILE_MAX_FILES = 50
+DRAALCORE_PROFILE_SAMPLE_INTERVAL = 0.005
+
 # Django REST framework default rendering
 # Comment Browsable API for production setup
 REST_FRAMEWORK = {